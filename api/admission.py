@@ -0,0 +1,229 @@
+"""
+Admission control for the API routes.
+
+Each route class gets a concurrency limit, a bounded wait queue and a
+queue-time budget. Requests that cannot get a slot within the budget are
+rejected with Overloaded so the handler can answer 503 right away instead
+of piling up behind a slow upstream.
+
+AsyncAdmissionController applies the same scheme to coroutines in the
+ASGI app (asyncio is imported on first use to keep it out of the
+serverless cold start).
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Tuple
+
+# Route class -> (max concurrent requests, max queued requests, queue budget seconds)
+ROUTE_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "search": (8, 16, 2.0),
+    "availability": (16, 32, 2.0),
+    "details": (16, 32, 2.0),
+    "trending": (4, 16, 2.0),
+    "images": (8, 32, 2.0),
+}
+
+# Waiting on the event loop costs no thread, so the ASGI app can run far
+# more requests per route class at once
+ASYNC_ROUTE_LIMITS: Dict[str, Tuple[int, int, float]] = {
+    "search": (128, 256, 2.0),
+    "availability": (256, 512, 2.0),
+    "details": (256, 512, 2.0),
+    "trending": (16, 64, 2.0),
+    "images": (32, 128, 2.0),
+}
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed by admission control."""
+
+    def __init__(self, route_class: str, retry_after: int):
+        super().__init__(f"Server busy: {route_class} capacity exceeded")
+        self.route_class = route_class
+        self.retry_after = retry_after
+
+
+class RouteLimiter:
+    """
+    Concurrency limiter with a bounded FIFO-ish wait queue.
+
+    Args:
+        name: Route class name, used in errors and stats
+        max_concurrent: Requests allowed to run at the same time
+        max_queue: Requests allowed to wait for a slot; more are shed at once
+        queue_timeout: Seconds a request may wait before it is shed
+    """
+
+    def __init__(
+        self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def acquire(self) -> None:
+        """Take a slot, waiting up to queue_timeout. Raises Overloaded on failure."""
+        with self._cond:
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                self.admitted += 1
+                return
+            if self._waiting >= self.max_queue:
+                self.shed += 1
+                raise Overloaded(self.name, self.retry_after)
+
+            self._waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed += 1
+                        raise Overloaded(self.name, self.retry_after)
+                    self._cond.wait(remaining)
+                self._active += 1
+                self.admitted += 1
+            finally:
+                self._waiting -= 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        return {
+            "active": self._active,
+            "waiting": self._waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+class AsyncRouteLimiter(RouteLimiter):
+    """
+    RouteLimiter for coroutines: waiting requests yield to the event loop
+    instead of blocking a thread.
+    """
+
+    def __init__(
+        self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float
+    ):
+        import asyncio
+
+        super().__init__(name, max_concurrent, max_queue, queue_timeout)
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting up to queue_timeout. Raises Overloaded on failure."""
+        import asyncio
+
+        async with self._cond:
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                self.admitted += 1
+                return
+            if self._waiting >= self.max_queue:
+                self.shed += 1
+                raise Overloaded(self.name, self.retry_after)
+
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self._active < self.max_concurrent),
+                    self.queue_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.shed += 1
+                raise Overloaded(self.name, self.retry_after) from None
+            finally:
+                self._waiting -= 1
+            self._active += 1
+            self.admitted += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+
+class AdmissionController:
+    """
+    One RouteLimiter per route class.
+
+    Limits can be overridden with ADMISSION_<CLASS>_CONCURRENCY,
+    ADMISSION_<CLASS>_QUEUE and ADMISSION_<CLASS>_TIMEOUT environment variables.
+    """
+
+    limiter_class = RouteLimiter
+
+    def __init__(self, limits: Dict[str, Tuple[int, int, float]] = None):
+        self.limiters: Dict[str, RouteLimiter] = {}
+        for name, (concurrent, queue, timeout) in (limits or ROUTE_LIMITS).items():
+            prefix = f"ADMISSION_{name.upper()}_"
+            self.limiters[name] = self.limiter_class(
+                name,
+                int(os.getenv(prefix + "CONCURRENCY", concurrent)),
+                int(os.getenv(prefix + "QUEUE", queue)),
+                float(os.getenv(prefix + "TIMEOUT", timeout)),
+            )
+
+    @contextmanager
+    def admit(self, route_class: str, cached: bool = False) -> Iterator[None]:
+        """
+        Run the body under the route class limit.
+
+        Cached responses need no upstream work, so they bypass the limiter.
+        """
+        if cached:
+            yield
+            return
+        with self.limiters[route_class].slot():
+            yield
+
+    def stats(self) -> Dict[str, Dict]:
+        return {name: limiter.stats() for name, limiter in self.limiters.items()}
+
+
+class AsyncAdmissionController(AdmissionController):
+    """AdmissionController for the ASGI app; use `async with admission.admit(...)`."""
+
+    limiter_class = AsyncRouteLimiter
+
+    def __init__(self, limits: Dict[str, Tuple[int, int, float]] = None):
+        super().__init__(limits or ASYNC_ROUTE_LIMITS)
+
+    @asynccontextmanager
+    async def admit(self, route_class: str, cached: bool = False) -> AsyncIterator[None]:
+        if cached:
+            yield
+            return
+        async with self.limiters[route_class].slot():
+            yield
@@ -0,0 +1,328 @@
+"""
+POST /api/bundle: several API operations in one round trip.
+
+A page view typically needs trending plus details and providers for a few
+titles; on Vercel each of those is a function invocation of its own. A
+bundle lists them instead:
+
+    {"operations": [
+        {"id": "top", "op": "trending"},
+        {"op": "details", "title_id": 27205, "media_type": "movie"},
+        {"op": "countries", "title_id": 27205, "media_type": "movie", "format": "codes"},
+        {"op": "search", "query": "dark", "availability": true}
+    ]}
+
+Operations take the parameters of their standalone endpoint (query string
+or search body). They run concurrently against the server's finder and
+response cache, each admitted under its endpoint's route class, and the
+results come back in request order with their own status and timing:
+
+    {"success": true, "results": [
+        {"id": "top", "op": "trending", "status": 200, "ms": 0.3, "body": {...}},
+        ...
+    ]}
+
+A body is exactly what the standalone endpoint would have sent. Cached
+ones are spliced in as the ready-encoded bytes of the response cache.
+"""
+
+import contextvars
+import json
+import time
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from admission import Overloaded
+from cache import normalize_query
+from jsonlog import get_logger
+from netflix_finder import availability_options, country_format, offer_filters, trending_filters
+from responses import EncodedResponse
+
+log = get_logger("bundle")
+
+OPERATIONS = ("search", "trending", "countries", "providers", "details")
+
+# Most operations a bundle may hold
+MAX_OPERATIONS = 16
+
+# Threads running the operations of bundles on the threaded servers
+BUNDLE_WORKERS = 8
+
+_pool = None
+
+
+class Plan:
+    """
+    One operation, resolved into what its standalone endpoint would do.
+
+    Args:
+        route_class: Admission route class of the endpoint
+        cached: Whether the finder already has the data (skips admission)
+        key: Response cache key, the same as the endpoint's
+        build: Produces the payload on a miss (a coroutine with the async finder)
+        ttl: Seconds the response may be cached, see ResponseCache.get_or_encode
+    """
+
+    __slots__ = ("id", "op", "route_class", "cached", "key", "build", "ttl")
+
+    def __init__(
+        self,
+        id: Any,
+        op: str,
+        route_class: str,
+        cached: Callable[[], bool],
+        key: Hashable,
+        build: Callable[[], Any],
+        ttl: Callable[[], Optional[float]],
+    ):
+        self.id = id
+        self.op = op
+        self.route_class = route_class
+        self.cached = cached
+        self.key = key
+        self.build = build
+        self.ttl = ttl
+
+
+class Result:
+    """Outcome of one operation: HTTP status, JSON body bytes and run time."""
+
+    __slots__ = ("id", "op", "status", "body", "ms")
+
+    def __init__(self, id: Any, op: Any, status: int, body: bytes, ms: float = 0.0):
+        self.id = id
+        self.op = op
+        self.status = status
+        self.body = body
+        self.ms = ms
+
+
+def parse_bundle(body: bytes) -> List[Dict]:
+    """
+    Decode a /api/bundle request body and return its operations.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        raise ValueError("Invalid request body") from None
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise ValueError(f"At most {MAX_OPERATIONS} operations per bundle")
+    if not all(isinstance(op, dict) for op in operations):
+        raise ValueError("Each operation must be an object")
+    return operations
+
+
+def _error(message: str) -> bytes:
+    return json.dumps({"success": False, "message": message}).encode()
+
+
+def _query(spec: Mapping) -> Dict[str, str]:
+    """Operation fields as query parameters: JSON numbers and bools become strings."""
+    return {
+        name: str(value).lower() if isinstance(value, bool) else str(value)
+        for name, value in spec.items()
+        if value is not None
+    }
+
+
+def _title(spec: Mapping) -> Tuple[int, str]:
+    title_id, media_type = spec.get("title_id"), spec.get("media_type")
+    if isinstance(title_id, str) and title_id.isdigit():
+        title_id = int(title_id)
+    if not isinstance(title_id, int) or isinstance(title_id, bool) or title_id <= 0:
+        raise ValueError("title_id must be a positive integer")
+    if media_type not in ("movie", "tv"):
+        raise ValueError("Invalid media_type. Use 'movie' or 'tv'")
+    return title_id, media_type
+
+
+def _search_build(finder, query: str, availability: bool, country: Optional[str]):
+    def build():
+        response = finder.display_results(finder.search_titles(query))
+        if availability:
+            response = finder.search_availability(response, country)
+        return response
+
+    return build
+
+
+def _async_search_build(finder, query: str, availability: bool, country: Optional[str]):
+    async def build():
+        response = finder.display_results(await finder.search_titles(query))
+        if availability:
+            response = await finder.search_availability(response, country)
+        return response
+
+    return build
+
+
+def plan(finder, spec: Mapping, is_async: bool = False) -> Plan:
+    """
+    Resolve one operation of a bundle against a finder.
+
+    Args:
+        finder: The server's NetflixTitleFinder or AsyncNetflixTitleFinder
+        spec: The operation object: "op", an optional "id", and the
+            endpoint's parameters
+        is_async: Whether finder is the async finder
+
+    Raises:
+        ValueError: With a message fit for a 400 result
+    """
+    op, op_id = spec.get("op"), spec.get("id")
+    if op == "search":
+        query = spec.get("query")
+        query = query.strip() if isinstance(query, str) else ""
+        if not query:
+            raise ValueError("Query is required")
+        availability, country = availability_options(spec)
+        key = ("search", normalize_query(query))
+        if availability:
+            key += ("availability", country)
+        build = (_async_search_build if is_async else _search_build)(
+            finder, query, availability, country
+        )
+        return Plan(
+            op_id,
+            op,
+            "search",
+            lambda: finder.is_cached("search", query),
+            key,
+            build,
+            lambda: finder.cached_ttl("availability" if availability else "search", query),
+        )
+    if op == "trending":
+        country, provider, only_available, offer = trending_filters(_query(spec))
+        return Plan(
+            op_id,
+            op,
+            "trending",
+            lambda: finder.is_cached("trending"),
+            ("trending", country, provider, only_available, offer),
+            lambda: finder.get_trending(country, provider, only_available, offer),
+            lambda: finder.cached_ttl("trending", country),
+        )
+    if op in ("countries", "providers"):
+        title_id, media_type = _title(spec)
+        provider, offer = offer_filters(_query(spec))
+        fmt = country_format(_query(spec))
+        get = finder.get_countries if op == "countries" else finder.get_all_providers
+        return Plan(
+            op_id,
+            op,
+            "availability",
+            lambda: finder.is_cached("providers", media_type, title_id),
+            (op, media_type, title_id, provider, offer, fmt),
+            lambda: get(title_id, media_type, provider, offer, fmt),
+            lambda: finder.cached_ttl("providers", media_type, title_id),
+        )
+    if op == "details":
+        title_id, media_type = _title(spec)
+        return Plan(
+            op_id,
+            op,
+            "details",
+            lambda: finder.is_cached("details", media_type, title_id),
+            ("details", media_type, title_id),
+            lambda: finder.get_title_details(title_id, media_type),
+            lambda: finder.cached_ttl("details", media_type, title_id),
+        )
+    raise ValueError(f"Invalid op. Use one of: {', '.join(OPERATIONS)}")
+
+
+def _plans(finder, operations: List[Dict], is_async: bool) -> List:
+    """A Plan per operation, or a 400 Result for those that do not parse."""
+    plans = []
+    for spec in operations:
+        try:
+            plans.append(plan(finder, spec, is_async))
+        except ValueError as e:
+            plans.append(Result(spec.get("id"), spec.get("op"), 400, _error(str(e))))
+    return plans
+
+
+def _failure(p: Plan, error: Exception) -> Tuple[int, bytes]:
+    if isinstance(error, Overloaded):
+        return 503, _error(str(error))
+    log.error("bundle_operation_failed", op=p.op, error=str(error))
+    return 500, _error(f"Error: {error}")
+
+
+def _execute(p: Plan, response_cache, admission) -> Result:
+    start = time.perf_counter()
+    try:
+        with admission.admit(p.route_class, p.cached()):
+            encoded = response_cache.get_or_encode(p.key, p.build, p.ttl)
+        status, body = 200, encoded.body
+    except Exception as e:
+        status, body = _failure(p, e)
+    return Result(p.id, p.op, status, body, (time.perf_counter() - start) * 1000)
+
+
+def _bundle_pool():
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        _pool = ThreadPoolExecutor(max_workers=BUNDLE_WORKERS, thread_name_prefix="bundle")
+    return _pool
+
+
+def run_bundle(finder, operations: List[Dict], response_cache, admission) -> EncodedResponse:
+    """
+    Run the operations of a bundle concurrently on a thread pool and
+    encode the combined response. Each operation runs in a copy of the
+    caller's context, so under its request deadline and log fields.
+    """
+    plans = _plans(finder, operations, is_async=False)
+    pool = _bundle_pool()
+    futures = [
+        pool.submit(contextvars.copy_context().run, _execute, p, response_cache, admission)
+        for p in plans
+        if isinstance(p, Plan)
+    ]
+    executed = (future.result() for future in futures)
+    return encode_results([next(executed) if isinstance(p, Plan) else p for p in plans])
+
+
+async def _execute_async(p: Plan, response_cache, admission) -> Result:
+    start = time.perf_counter()
+    try:
+        async with admission.admit(p.route_class, p.cached()):
+            encoded = response_cache.get(p.key)
+            if encoded is None:
+                encoded = EncodedResponse.from_payload(await p.build())
+                response_cache.store(p.key, encoded, p.ttl)
+        status, body = 200, encoded.body
+    except Exception as e:
+        status, body = _failure(p, e)
+    return Result(p.id, p.op, status, body, (time.perf_counter() - start) * 1000)
+
+
+async def run_bundle_async(
+    finder, operations: List[Dict], response_cache, admission
+) -> EncodedResponse:
+    """run_bundle() for the ASGI app: operations are gathered on the event loop."""
+    import asyncio
+
+    plans = _plans(finder, operations, is_async=True)
+    executed = iter(
+        await asyncio.gather(
+            *(_execute_async(p, response_cache, admission) for p in plans if isinstance(p, Plan))
+        )
+    )
+    return encode_results([next(executed) if isinstance(p, Plan) else p for p in plans])
+
+
+def encode_results(results: List[Result]) -> EncodedResponse:
+    """The bundle response, with each result body spliced in as is."""
+    parts = []
+    for r in results:
+        head = json.dumps({"id": r.id, "op": r.op, "status": r.status, "ms": round(r.ms, 1)})
+        parts.append(head[:-1].encode() + b', "body": ' + r.body + b"}")
+    return EncodedResponse(b'{"success": true, "results": [' + b", ".join(parts) + b"]}", True)
@@ -0,0 +1,257 @@
+"""
+Synthetic title catalogs for offline runs and scale tests.
+
+A catalog is written by scripts/generate_catalog.py as two files:
+`<path>` is JSON lines, a header followed by one title per line (offers
+map offer type -> provider id -> packed country codes, "USGBCA"), and
+`<path>.idx` has one short line per title, [media_type, id, offset,
+popularity, title], so loading does not parse the full records. Titles
+are read from a memory map on demand, which keeps catalogs with millions
+of titles usable.
+
+tmdb_response() answers the TMDB paths NetflixTitleFinder calls
+(search/multi, trending/all/week, {type}/{id}, {type}/{id}/watch/providers)
+with TMDB-shaped bodies built from the catalog. The finder's sample mode
+(see SAMPLE_CATALOG in netflix_finder.py) and scripts/tmdb_stub.py
+--catalog both serve data through it.
+"""
+
+import bisect
+import heapq
+import json
+import math
+import mmap
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cache import normalize_query
+
+SEARCH_PAGE_SIZE = 20
+TRENDING_SIZE = 20
+
+# Expansions of the last, possibly unfinished, query word
+MAX_PREFIX_TOKENS = 50
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(normalize_query(text))
+
+
+class Catalog:
+    """
+    Read-only title catalog with a token index for search.
+
+    Args:
+        path: Catalog JSONL file written by scripts/generate_catalog.py
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.header: Dict = {}
+        self._keys: List[Tuple[str, int]] = []
+        self._offsets: Dict[Tuple[str, int], int] = {}
+        self._popularity: List[float] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._vocabulary: Optional[List[str]] = None
+        self._trending: Optional[List[int]] = None
+        self._map: Optional[mmap.mmap] = None
+        self.load_seconds = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        with open(self.path, "rb") as f:
+            self.header = json.loads(f.readline())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        index_path = Path(f"{self.path}.idx")
+        if index_path.exists():
+            with open(index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    media_type, title_id, offset, popularity, title = json.loads(line)
+                    self._add(media_type, title_id, offset, popularity, title)
+        else:
+            offset = self._map.find(b"\n") + 1
+            while offset < len(self._map):
+                end = self._map.find(b"\n", offset)
+                end = len(self._map) if end == -1 else end
+                record = json.loads(self._map[offset:end])
+                self._add(
+                    record["media_type"],
+                    record["id"],
+                    offset,
+                    record["popularity"],
+                    record["title"],
+                )
+                offset = end + 1
+        self._postings = dict(self._postings)
+        self.load_seconds = time.perf_counter() - start
+
+    def _add(self, media_type: str, title_id: int, offset: int, popularity: float, title: str):
+        row = len(self._keys)
+        key = (media_type, title_id)
+        self._keys.append(key)
+        self._offsets[key] = offset
+        self._popularity.append(popularity)
+        for token in set(tokenize(title)):
+            self._postings[token].append(row)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _read(self, offset: int) -> Dict:
+        end = self._map.find(b"\n", offset)
+        return json.loads(self._map[offset : end if end != -1 else len(self._map)])
+
+    def get(self, media_type: str, title_id: int) -> Optional[Dict]:
+        offset = self._offsets.get((media_type, title_id))
+        return self._read(offset) if offset is not None else None
+
+    def _rows_for_prefix(self, prefix: str) -> List[int]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        rows: List[int] = []
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for token in self._vocabulary[start : start + MAX_PREFIX_TOKENS]:
+            if not token.startswith(prefix):
+                break
+            rows.extend(self._postings[token])
+        return rows
+
+    def search(self, query: str) -> List[int]:
+        """
+        Rows matching every query word, most popular first. The last word
+        may be a prefix, as while typing.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        candidates = [self._postings.get(token, []) for token in tokens[:-1]]
+        candidates.append(self._rows_for_prefix(tokens[-1]))
+        candidates.sort(key=len)
+        matches = set(candidates[0])
+        for rows in candidates[1:]:
+            if not matches:
+                break
+            matches.intersection_update(rows)
+        return sorted(matches, key=self._popularity.__getitem__, reverse=True)
+
+    def record(self, row: int) -> Dict:
+        return self._read(self._offsets[self._keys[row]])
+
+    def trending(self) -> List[Dict]:
+        if self._trending is None:
+            self._trending = heapq.nlargest(
+                TRENDING_SIZE, range(len(self._keys)), key=self._popularity.__getitem__
+            )
+        return [self.record(row) for row in self._trending]
+
+
+def _date_field(record: Dict) -> str:
+    return "release_date" if record["media_type"] == "movie" else "first_air_date"
+
+
+def _title_field(record: Dict) -> str:
+    return "title" if record["media_type"] == "movie" else "name"
+
+
+def search_result(record: Dict) -> Dict:
+    """A title as it appears in TMDB search and trending results."""
+    return {
+        "id": record["id"],
+        "media_type": record["media_type"],
+        _title_field(record): record["title"],
+        _date_field(record): record["date"],
+        "poster_path": record["poster_path"],
+        "vote_average": record["vote_average"],
+        "popularity": record["popularity"],
+    }
+
+
+def providers_body(catalog: Catalog, record: Dict) -> Dict:
+    """TMDB /{type}/{id}/watch/providers body: offers pivoted per country."""
+    providers = catalog.header.get("providers", {})
+    results: Dict[str, Dict] = {}
+    for offer_type, by_provider in record.get("offers", {}).items():
+        for provider_id, countries in by_provider.items():
+            meta = providers.get(provider_id, {})
+            offer = {
+                "provider_id": int(provider_id),
+                "provider_name": meta.get("name", f"Provider {provider_id}"),
+                "logo_path": meta.get("logo_path"),
+                "display_priority": meta.get("display_priority", 0),
+            }
+            for i in range(0, len(countries), 2):
+                code = countries[i : i + 2]
+                region = results.get(code)
+                if region is None:
+                    region = results[code] = {
+                        "link": f"https://www.themoviedb.org/{record['media_type']}"
+                        f"/{record['id']}/watch?locale={code}"
+                    }
+                region.setdefault(offer_type, []).append(offer)
+    return {"id": record["id"], "results": results}
+
+
+def details_body(catalog: Catalog, record: Dict) -> Dict:
+    """TMDB /{type}/{id}?append_to_response=credits body."""
+    genres = catalog.header.get("genres", {})
+    body = search_result(record)
+    body.update(
+        overview=record.get("overview", ""),
+        tagline=record.get("tagline", ""),
+        genres=[{"id": g, "name": genres.get(str(g), str(g))} for g in record.get("genres", [])],
+        credits={
+            "cast": [
+                {"name": name, "character": character, "profile_path": None}
+                for name, character in record.get("cast", [])
+            ]
+        },
+    )
+    if record["media_type"] == "movie":
+        body["runtime"] = record.get("runtime")
+    else:
+        body["episode_run_time"] = [record["runtime"]] if record.get("runtime") else []
+    return body
+
+
+def tmdb_response(catalog: Catalog, path: str, params: Dict) -> Optional[Dict]:
+    """
+    Body TMDB would return for path (relative to /3), or None for a 404.
+
+    Args:
+        catalog: Catalog to answer from
+        path: e.g. '/search/multi' or '/movie/27205/watch/providers'
+        params: Query parameters, with single values
+    """
+    parts = path.strip("/").split("/")
+    if parts == ["search", "multi"]:
+        rows = catalog.search(params.get("query", ""))
+        page = max(1, int(params.get("page", 1)))
+        start = (page - 1) * SEARCH_PAGE_SIZE
+        return {
+            "page": page,
+            "results": [
+                search_result(catalog.record(row))
+                for row in rows[start : start + SEARCH_PAGE_SIZE]
+            ],
+            "total_pages": max(1, math.ceil(len(rows) / SEARCH_PAGE_SIZE)),
+            "total_results": len(rows),
+        }
+    if parts == ["trending", "all", "week"]:
+        results = [search_result(record) for record in catalog.trending()]
+        return {"page": 1, "results": results, "total_pages": 1, "total_results": len(results)}
+    if len(parts) >= 2 and parts[0] in ("movie", "tv") and parts[1].isdigit():
+        record = catalog.get(parts[0], int(parts[1]))
+        if record is None:
+            return None
+        if parts[2:] == ["watch", "providers"]:
+            return providers_body(catalog, record)
+        if not parts[2:]:
+            return details_body(catalog, record)
+    return None
@@ -0,0 +1,293 @@
+"""
+Same-origin proxy for TMDB poster, profile and logo images.
+
+Serves /api/img/<size>/<file>, where size is a TMDB size name ("w342",
+"original") or any width "w<N>". Images are fetched from the smallest TMDB
+size that covers the requested width, downscaled with Pillow when needed,
+and stored in a content-addressed disk cache. The SHA-256 of the bytes is
+the file name and the ETag, so responses can be cached as immutable.
+
+The disk cache holds at most IMAGE_CACHE_MAX_BYTES; past that the least
+recently served images are deleted. Fetches from TMDB are bounded by the
+request deadline (see upstream.py).
+
+requests and Pillow are imported on first use to keep cold starts fast.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from upstream import call_timeout
+
+TMDB_IMAGE_UPSTREAM = os.getenv("TMDB_IMAGE_UPSTREAM", "https://image.tmdb.org/t/p")
+
+# Widths TMDB serves directly, smallest first
+TMDB_WIDTHS = [45, 92, 154, 185, 300, 342, 500, 780, 1280]
+MAX_WIDTH = 1280
+
+# Largest total size of the disk cache, in bytes
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Sent with every image: no content sniffing, and an SVG opened directly
+# can neither run scripts nor load anything
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox",
+}
+
+_SIZE = re.compile(r"^(?:original|w(\d{1,4}))$")
+_FILENAME = re.compile(r"^[A-Za-z0-9_-]+\.(jpg|jpeg|png|webp|svg)$")
+
+_CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+_PIL_FORMATS = {"image/jpeg": "JPEG", "image/png": "PNG", "image/webp": "WEBP"}
+
+
+class ProxiedImage(NamedTuple):
+    body: bytes
+    content_type: str
+    etag: str
+
+
+class ImageNotFound(Exception):
+    """Raised when TMDB has no image at the requested path."""
+
+
+class ImageProxy:
+    """
+    Fetches, resizes and caches TMDB images on local disk.
+
+    Args:
+        cache_dir: Directory for cached images (defaults to IMAGE_CACHE_DIR
+            or a folder under the system temp dir, which is writable on Vercel)
+        upstream: Base URL of the image server, e.g. a local stub in tests
+        max_bytes: Disk cache size bound; IMAGE_CACHE_MAX_BYTES by default
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        upstream: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.cache_dir = Path(
+            cache_dir
+            or os.getenv("IMAGE_CACHE_DIR")
+            or Path(tempfile.gettempdir()) / "wherecaniwatchthis-img"
+        )
+        self.upstream = (upstream or TMDB_IMAGE_UPSTREAM).rstrip("/")
+        self.max_bytes = IMAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._session = None
+        # ref -> "<digest> <content type>", least recently served first
+        self._refs: "OrderedDict[str, str]" = OrderedDict()
+        # digest -> [size in bytes, number of refs]
+        self._blobs: Dict[str, List[int]] = {}
+        self._bytes = 0
+        self._indexed = False
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    @staticmethod
+    def parse_size(size: str) -> Optional[int]:
+        """Return the requested width, None for 'original'. Raises ValueError if invalid."""
+        match = _SIZE.match(size)
+        if not match:
+            raise ValueError(f"Invalid image size '{size}'")
+        if match.group(1) is None:
+            return None
+        width = int(match.group(1))
+        if not 0 < width <= MAX_WIDTH:
+            raise ValueError(f"Image width must be between 1 and {MAX_WIDTH}")
+        return width
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.cache_dir / "blobs" / digest[:2] / digest
+
+    def _ref_path(self, ref: str) -> Path:
+        return self.cache_dir / "refs" / ref
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _index(self) -> None:
+        """
+        Index the images already on disk, oldest first, once per process.
+        Called with the lock held.
+        """
+        if self._indexed:
+            return
+        self._indexed = True
+        found = []
+        for ref_path in (self.cache_dir / "refs").glob("*"):
+            try:
+                entry = ref_path.read_text()
+                size = self._blob_path(entry.split(" ", 1)[0]).stat().st_size
+                found.append((ref_path.stat().st_mtime, ref_path.name, entry, size))
+            except (OSError, ValueError):
+                ref_path.unlink(missing_ok=True)
+        for _, ref, entry, size in sorted(found):
+            self._add(ref, entry, size)
+        for blob in (self.cache_dir / "blobs").glob("*/*"):
+            if blob.name not in self._blobs:
+                blob.unlink(missing_ok=True)
+        self._evict()
+
+    def _add(self, ref: str, entry: str, size: int) -> None:
+        """Count a cached image as the most recently served. Called with the lock held."""
+        if ref in self._refs:
+            self._refs.move_to_end(ref)
+            return
+        self._refs[ref] = entry
+        digest = entry.split(" ", 1)[0]
+        blob = self._blobs.get(digest)
+        if blob is None:
+            self._blobs[digest] = [size, 1]
+            self._bytes += size
+        else:
+            blob[1] += 1
+        self._bytes += len(entry)
+
+    def _forget(self, ref: str) -> None:
+        """Drop a ref, and its blob if no other ref uses it. Called with the lock held."""
+        entry = self._refs.pop(ref, None)
+        if entry is None:
+            return
+        self._ref_path(ref).unlink(missing_ok=True)
+        self._bytes -= len(entry)
+        digest = entry.split(" ", 1)[0]
+        blob = self._blobs.get(digest)
+        if blob is None:
+            return
+        blob[1] -= 1
+        if blob[1] == 0:
+            del self._blobs[digest]
+            self._bytes -= blob[0]
+            self._blob_path(digest).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Delete least recently served images until under max_bytes. Called with the lock held."""
+        while self._bytes > self.max_bytes and self._refs:
+            self._forget(next(iter(self._refs)))
+
+    @staticmethod
+    def _ref(size: str, filename: str) -> str:
+        return hashlib.sha256(f"{size}/{filename}".encode()).hexdigest()
+
+    def is_cached(self, size: str, filename: str) -> bool:
+        """Whether get() can serve size/filename without calling TMDB."""
+        with self._lock:
+            self._index()
+            return self._ref(size, filename) in self._refs
+
+    def _lookup(self, ref: str) -> Optional[ProxiedImage]:
+        with self._lock:
+            self._index()
+            entry = self._refs.get(ref)
+            if entry is None:
+                return None
+            self._refs.move_to_end(ref)
+        digest, content_type = entry.split(" ", 1)
+        try:
+            body = self._blob_path(digest).read_bytes()
+            # The ref's mtime orders the index rebuilt by the next process
+            os.utime(self._ref_path(ref))
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(ref)
+            return None
+        return ProxiedImage(body, content_type, f'"{digest}"')
+
+    def _store(self, ref: str, body: bytes, content_type: str) -> ProxiedImage:
+        digest = hashlib.sha256(body).hexdigest()
+        entry = f"{digest} {content_type}"
+        with self._lock:
+            self._index()
+            blob = self._blob_path(digest)
+            if digest not in self._blobs or not blob.exists():
+                self._write(blob, body)
+            self._write(self._ref_path(ref), entry.encode())
+            self._add(ref, entry, len(body))
+            self._evict()
+        return ProxiedImage(body, content_type, f'"{digest}"')
+
+    def _fetch(self, tmdb_size: str, filename: str) -> bytes:
+        response = self.session.get(
+            f"{self.upstream}/{tmdb_size}/{filename}", timeout=call_timeout()
+        )
+        if response.status_code == 404:
+            raise ImageNotFound(filename)
+        response.raise_for_status()
+        return response.content
+
+    def _resize(self, data: bytes, width: int, content_type: str) -> bytes:
+        if content_type not in _PIL_FORMATS:
+            return data
+        try:
+            from PIL import Image
+        except ImportError:  # Pillow is optional; images are then served at TMDB size
+            return data
+        with Image.open(io.BytesIO(data)) as img:
+            if img.width <= width:
+                return data
+            height = max(1, round(img.height * width / img.width))
+            resized = img.resize((width, height), Image.LANCZOS)
+            out = io.BytesIO()
+            resized.save(out, _PIL_FORMATS[content_type], quality=85, optimize=True)
+            return out.getvalue()
+
+    def get(self, size: str, filename: str) -> ProxiedImage:
+        """
+        Return the image for size/filename, from disk cache when possible.
+
+        Raises:
+            ValueError: size or filename is not valid
+            ImageNotFound: TMDB has no such image
+            DeadlineExceeded: The request deadline passed before a TMDB fetch
+        """
+        width = self.parse_size(size)
+        match = _FILENAME.match(filename)
+        if not match:
+            raise ValueError(f"Invalid image path '{filename}'")
+        content_type = _CONTENT_TYPES[match.group(1).lower()]
+
+        ref = self._ref(size, filename)
+        cached = self._lookup(ref)
+        if cached is not None:
+            return cached
+
+        if width is None:
+            data = self._fetch("original", filename)
+        else:
+            tmdb_width = next((w for w in TMDB_WIDTHS if w >= width), None)
+            try:
+                data = self._fetch(f"w{tmdb_width}", filename)
+            except ImageNotFound:
+                # Not every TMDB size exists for every image type
+                data = self._fetch("original", filename)
+            data = self._resize(data, width, content_type)
+        return self._store(ref, data, content_type)
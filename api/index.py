@@ -0,0 +1,366 @@
+"""
+Single Vercel entry point for every /api route.
+
+vercel.json rewrites /api/* here, so one warm instance (with one
+NetflixTitleFinder and one set of caches) serves all endpoints instead of
+each endpoint paying its own cold start. Requests are dispatched through a
+precompiled route table.
+"""
+
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+import json
+import re
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from netflix_finder import (
+    NetflixTitleFinder,
+    availability_options,
+    country_format,
+    offer_filters,
+    ranking_filters,
+    trending_filters,
+)
+from admission import AdmissionController, Overloaded
+from bundle import parse_bundle, run_bundle
+from upstream import REQUEST_BUDGET, deadline
+from responses import IMMUTABLE_MAX_AGE, ResponseCache, write_json, etag_matches
+from cache import normalize_query
+from image_proxy import CACHE_CONTROL, SECURITY_HEADERS, ImageNotFound, ImageProxy
+from jsonlog import get_logger, log_stats, request_context, route_name
+from warmup import Warmup
+
+finder = NetflixTitleFinder()
+admission = AdmissionController()
+response_cache = ResponseCache()
+image_proxy = ImageProxy()
+log = get_logger("api")
+
+# Popular titles are fetched on a background thread while the instance
+# serves requests (WARMUP_SEED, see warmup.py)
+warmup = Warmup()
+warmup.start(finder)
+
+_TITLE = r"(?P<title_id>\d+)/(?P<media_type>[^/]+)"
+
+
+def search(request):
+    try:
+        content_length = int(request.headers.get("Content-Length", 0))
+        body = request.rfile.read(content_length)
+        data = json.loads(body) if body else {}
+        query = data.get("query", "").strip()
+    except (ValueError, AttributeError):
+        request.send_json(400, {"success": False, "message": "Invalid request body"})
+        return
+
+    if not query:
+        request.send_json(400, {"success": False, "message": "Query is required"})
+        return
+    try:
+        availability, country = availability_options(data)
+    except ValueError as e:
+        request.send_json(400, {"success": False, "message": str(e)})
+        return
+
+    def build():
+        # Search for titles and format results for API response
+        response = finder.display_results(finder.search_titles(query))
+        if availability:
+            response = finder.search_availability(response, country)
+        return response
+
+    key = ("search", normalize_query(query))
+    if availability:
+        key += ("availability", country)
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "search", finder.is_cached("search", query)
+    ):
+        response = response_cache.get_or_encode(
+            key,
+            build,
+            lambda: finder.cached_ttl("availability" if availability else "search", query),
+        )
+    write_json(request, response)
+
+
+def bundle(request):
+    try:
+        content_length = int(request.headers.get("Content-Length", 0))
+        operations = parse_bundle(request.rfile.read(content_length))
+    except ValueError as e:
+        request.send_json(400, {"success": False, "message": str(e)})
+        return
+
+    with deadline(REQUEST_BUDGET):
+        result = run_bundle(finder, operations, response_cache, admission)
+    write_json(request, result)
+
+
+def trending(request):
+    try:
+        country, provider, only_available, offer = trending_filters(request.query)
+    except ValueError as e:
+        request.send_json(400, {"success": False, "message": str(e)})
+        return
+
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "trending", finder.is_cached("trending")
+    ):
+        result = response_cache.get_or_encode(
+            ("trending", country, provider, only_available, offer),
+            lambda: finder.get_trending(country, provider, only_available, offer),
+            lambda: finder.cached_ttl("trending", country),
+        )
+    # Partly annotated responses must not be cached downstream either
+    write_json(
+        request,
+        result,
+        "trending" if result.complete else None,
+        finder.cached_ttl("trending", country),
+    )
+
+
+def rankings(request):
+    try:
+        provider, k = ranking_filters(request.query)
+    except ValueError as e:
+        request.send_json(400, {"success": False, "message": str(e)})
+        return
+    write_json(request, finder.get_rankings(provider, k))
+
+
+def countries(request, title_id, media_type):
+    try:
+        provider, offer = offer_filters(request.query)
+        fmt = country_format(request.query)
+    except ValueError as e:
+        request.send_json(400, {"success": False, "message": str(e)})
+        return
+
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "availability", finder.is_cached("providers", media_type, title_id)
+    ):
+        result = response_cache.get_or_encode(
+            ("countries", media_type, title_id, provider, offer, fmt),
+            lambda: finder.get_countries(title_id, media_type, provider, offer, fmt),
+            lambda: finder.cached_ttl("providers", media_type, title_id),
+        )
+    write_json(
+        request, result, "countries", finder.cached_ttl("providers", media_type, title_id)
+    )
+
+
+def providers(request, title_id, media_type):
+    try:
+        provider, offer = offer_filters(request.query)
+        fmt = country_format(request.query)
+    except ValueError as e:
+        request.send_json(400, {"success": False, "message": str(e)})
+        return
+
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "availability", finder.is_cached("providers", media_type, title_id)
+    ):
+        result = response_cache.get_or_encode(
+            ("providers", media_type, title_id, provider, offer, fmt),
+            lambda: finder.get_all_providers(title_id, media_type, provider, offer, fmt),
+            lambda: finder.cached_ttl("providers", media_type, title_id),
+        )
+    write_json(
+        request, result, "providers", finder.cached_ttl("providers", media_type, title_id)
+    )
+
+
+def country_table(request, version):
+    table = finder.country_table()
+    if version != table["version"]:
+        request.send_json(
+            404,
+            {
+                "success": False,
+                "message": "Unknown country table version",
+                "version": table["version"],
+            },
+        )
+        return
+    result = response_cache.get_or_encode(
+        ("country_table",), finder.country_table, lambda: IMMUTABLE_MAX_AGE
+    )
+    write_json(request, result, "country_table")
+
+
+def details(request, title_id, media_type):
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "details", finder.is_cached("details", media_type, title_id)
+    ):
+        result = response_cache.get_or_encode(
+            ("details", media_type, title_id),
+            lambda: finder.get_title_details(title_id, media_type),
+            lambda: finder.cached_ttl("details", media_type, title_id),
+        )
+    write_json(request, result, "details")
+
+
+def image(request, size, filename):
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "images", image_proxy.is_cached(size, filename)
+    ):
+        try:
+            proxied = image_proxy.get(size, filename)
+        except ValueError as e:
+            request.send_json(400, {"success": False, "message": str(e)})
+            return
+        except ImageNotFound:
+            request.send_json(404, {"success": False, "message": "Image not found"})
+            return
+        except Exception as e:
+            request.send_json(502, {"success": False, "message": f"Error: {str(e)}"})
+            return
+
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": proxied.etag}
+    if etag_matches(request.headers.get("If-None-Match"), proxied.etag):
+        request.send_response(304)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        return
+
+    request.send_response(200)
+    request.send_header("Content-Type", proxied.content_type)
+    request.send_header("Content-Length", str(len(proxied.body)))
+    request.send_header("Access-Control-Allow-Origin", "*")
+    for name, value in {**headers, **SECURITY_HEADERS}.items():
+        request.send_header(name, value)
+    request.end_headers()
+    request.wfile.write(proxied.body)
+
+
+def health(request):
+    request.send_json(
+        200,
+        {
+            "status": "ok",
+            "api_key_configured": finder.api_key_configured,
+            "data_source": finder.data_source,
+            "upstream": finder.upstream.snapshot(),
+            "provider_ttl": finder.provider_ttls.snapshot(),
+            "revalidation": dict(finder.revalidation),
+            "warmup": warmup.snapshot(),
+            "logging": log_stats(),
+        },
+    )
+
+
+# (method, compiled path pattern, view, whether the view takes a title)
+ROUTES = [
+    ("GET", re.compile(r"^/api/health/?$"), health, False),
+    ("POST", re.compile(r"^/api/search/?$"), search, False),
+    ("POST", re.compile(r"^/api/bundle/?$"), bundle, False),
+    ("GET", re.compile(r"^/api/trending/?$"), trending, False),
+    ("GET", re.compile(r"^/api/rankings/?$"), rankings, False),
+    ("GET", re.compile(rf"^/api/countries/{_TITLE}/?$"), countries, True),
+    ("GET", re.compile(rf"^/api/providers/{_TITLE}/?$"), providers, True),
+    ("GET", re.compile(rf"^/api/details/{_TITLE}/?$"), details, True),
+    ("GET", re.compile(r"^/api/country-table/(?P<version>[0-9a-f]+)$"), country_table, False),
+    ("GET", re.compile(r"^/api/img/(?P<size>[^/]+)/(?P<filename>[^/]+)$"), image, False),
+]
+
+
+class handler(BaseHTTPRequestHandler):
+    request_id = None
+    status = None
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        if self.request_id:
+            self.send_header("X-Request-ID", self.request_id)
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        # Access lines are logged as structured "request" records instead
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        path_matched = False
+        for route_method, pattern, view, takes_title in ROUTES:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            if route_method != method:
+                path_matched = True
+                continue
+
+            params = match.groupdict()
+            if takes_title:
+                if params["media_type"] not in ["movie", "tv"]:
+                    self.send_json(
+                        400,
+                        {
+                            "success": False,
+                            "message": "Invalid media_type. Use 'movie' or 'tv'",
+                        },
+                    )
+                    return
+                params["title_id"] = int(params["title_id"])
+
+            start = time.perf_counter()
+            with request_context(
+                route_name(url.path), self.headers.get("X-Request-ID")
+            ) as self.request_id:
+                try:
+                    view(self, **params)
+                except Overloaded as e:
+                    self.send_json(
+                        503,
+                        {"success": False, "message": str(e)},
+                        {"Retry-After": str(e.retry_after)},
+                    )
+                except Exception as e:
+                    log.error("unhandled_error", error=str(e))
+                    self.send_json(500, {"success": False, "message": f"Error: {str(e)}"})
+                log.info(
+                    "request",
+                    method=method,
+                    path=url.path,
+                    status=self.status,
+                    duration_ms=round((time.perf_counter() - start) * 1000, 1),
+                )
+            return
+
+        if path_matched:
+            self.send_json(405, {"success": False, "message": "Method not allowed"})
+        else:
+            self.send_json(404, {"success": False, "message": "Not found"})
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
@@ -4,15 +4,43 @@ Where Can I Watch This? - Search for movies/shows and find countries where they'
 Uses TMDB (The Movie Database) - Free API with Netflix availability data
 """
 
-import requests
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Mapping, Optional, Set, Tuple
+import contextvars
 import os
+import threading
+import time
 import json
 from pathlib import Path
-from dotenv import load_dotenv
+
+from cache import SearchCache, StoredResponse, TTLCache, normalize_query
+from jsonlog import get_logger
+from rankings import TOP_K, ProviderRankings
+from records import NO_OFFERS, OFFER_TYPES, CastMember, Title, TitleDetails, TitleOffers
+from ttl_policy import ProviderTTLPolicy
+from upstream import UpstreamClient, time_remaining
+
+log = get_logger("finder")
+
+
+def _load_dotenv() -> None:
+    """
+    Load environment variables from a .env file, if there is one.
+
+    python-dotenv is only imported when a .env file exists, so deployments
+    configured through real environment variables skip it at cold start.
+    """
+    here = Path(__file__).resolve().parent
+    for directory in (Path.cwd(), here, here.parent):
+        env_file = directory / ".env"
+        if env_file.is_file():
+            from dotenv import load_dotenv
+
+            load_dotenv(env_file)
+            return
+
 
 # Load environment variables from .env file
-load_dotenv()
+_load_dotenv()
 
 MAJOR_PROVIDERS = {
     8: "Netflix",
@@ -28,17 +56,197 @@ MAJOR_PROVIDERS = {
     283: "Crunchyroll",
 }
 
+# Cache lifetimes in seconds, per kind of TMDB resource; for "providers" this
+# is the base that ttl_policy.ProviderTTLPolicy scales per title
+CACHE_TTLS = {
+    "search": 15 * 60,
+    "providers": 6 * 3600,
+    "details": 24 * 3600,
+    "trending": 3600,
+}
+
+# Expired responses of these kinds are kept, with their validators, for
+# STALE_TTL seconds so they can be refreshed with a conditional GET
+REVALIDATED_KINDS = ("providers", "details", "trending")
+STALE_TTL = 7 * 24 * 3600
+
+# Known-missing titles and empty searches are cached briefly, in their own
+# bounded cache so junk traffic cannot evict real entries
+NEGATIVE_CACHE_TTL = 5 * 60
+NEGATIVE_CACHE_SIZE = 1024
+
+# Threads fetching watch/providers for trending titles in the background
+TRENDING_PRECOMPUTE_WORKERS = 8
+
+# Seconds before trending titles whose lookup failed (an error, or a status
+# other than 200 and 404) are looked up again, on the next /api/trending
+TRENDING_RETRY_DELAY = 30.0
+
+# Seconds a search may spend on the per-title availability summary (see
+# search_availability), and threads for those lookups: one TMDB page each
+AVAILABILITY_BUDGET = float(os.getenv("AVAILABILITY_BUDGET", 1.5))
+AVAILABILITY_WORKERS = 20
+
+# Country list formats of /api/countries and /api/providers: display names,
+# ISO codes, or a bitmap over the published country table (see country_table)
+COUNTRY_FORMATS = ("names", "codes", "packed")
+
+# Titles per ranking in /api/rankings unless k is given (at most rankings.TOP_K)
+RANKING_SIZE = 20
+
+# Stands in for an API key in sample mode with a synthetic catalog, so the
+# normal fetch/cache path runs against the catalog instead of TMDB
+SAMPLE_CATALOG_KEY = "sample-catalog"
+
+
+def country_code(value) -> str:
+    """
+    Validate and uppercase an ISO 3166-1 alpha-2 country code.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    code = value.upper() if isinstance(value, str) else ""
+    if len(code) != 2 or not code.isalpha():
+        raise ValueError("Invalid country. Use an ISO 3166-1 alpha-2 code")
+    return code
+
+
+def offer_filters(params: Mapping[str, str]) -> Tuple[Optional[int], str]:
+    """
+    Parse the provider and offer query parameters of /api/countries,
+    /api/providers and /api/trending: a TMDB provider id (None if not
+    given) and an offer type, 'flatrate' by default.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    provider = params.get("provider")
+    if provider is not None:
+        if not provider.isdigit():
+            raise ValueError("Invalid provider. Use a TMDB provider id")
+        provider = int(provider)
+    offer = params.get("offer", "flatrate").lower()
+    if offer not in OFFER_TYPES:
+        raise ValueError(f"Invalid offer. Use one of: {', '.join(OFFER_TYPES)}")
+    return provider, offer
+
+
+def country_format(params: Mapping[str, str]) -> str:
+    """
+    Parse the format query parameter of /api/countries and /api/providers.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    fmt = params.get("format", "names").lower()
+    if fmt not in COUNTRY_FORMATS:
+        raise ValueError(f"Invalid format. Use one of: {', '.join(COUNTRY_FORMATS)}")
+    return fmt
+
+
+def trending_filters(
+    params: Mapping[str, str],
+) -> Tuple[Optional[str], Optional[int], bool, str]:
+    """
+    Parse /api/trending query parameters: country, provider,
+    only_available and offer.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    country = params.get("country")
+    if country is not None:
+        country = country_code(country)
+    provider, offer = offer_filters(params)
+    only_available = params.get("only_available", "").lower() in ("1", "true")
+    filtered = provider is not None or only_available or "offer" in params
+    if filtered and country is None:
+        raise ValueError("country is required with provider, offer or only_available")
+    return country, provider, only_available, offer
+
+
+def ranking_filters(params: Mapping[str, str]) -> Tuple[Optional[int], int]:
+    """
+    Parse /api/rankings query parameters: provider (None for Netflix),
+    one of MAJOR_PROVIDERS, and k, the titles per ranking.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    provider = params.get("provider")
+    if provider is not None:
+        if not provider.isdigit():
+            raise ValueError("Invalid provider. Use a TMDB provider id")
+        provider = int(provider)
+        if provider not in MAJOR_PROVIDERS:
+            ids = ", ".join(str(p) for p in MAJOR_PROVIDERS)
+            raise ValueError(f"Rankings cover the major providers only: {ids}")
+    k = params.get("k", str(RANKING_SIZE))
+    if not k.isdigit() or not 1 <= int(k) <= TOP_K:
+        raise ValueError(f"Invalid k. Use a number from 1 to {TOP_K}")
+    return provider, int(k)
+
+
+def availability_options(data: Mapping) -> Tuple[bool, Optional[str]]:
+    """
+    Parse the availability fields of a /api/search body: whether to add
+    per-title summaries ("availability": true, implied by "country"), and
+    the caller's country.
+
+    Raises:
+        ValueError: With a message fit for a 400 response
+    """
+    country = data.get("country")
+    if country is not None:
+        country = country_code(country)
+    return bool(data.get("availability")) or country is not None, country
+
 
 class NetflixTitleFinder:
     def __init__(self):
         """Initialize the Netflix Title Finder"""
-        self.tmdb_base_url = "https://api.themoviedb.org/3"
+        self.tmdb_base_url = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
         self.api_key = self._get_api_key()
         self.netflix_provider_id = 8  # Netflix provider ID on TMDB
         self.country_map = self._load_countries()
-        self.tmdb_image_base_url = (
-            "https://image.tmdb.org/t/p/w342"  # Poster image base URL
+        # Image base URL; set IMAGE_BASE_URL=/api/img to serve images through
+        # the same-origin proxy (image_proxy.py) instead of image.tmdb.org
+        self.image_base_url = os.getenv(
+            "IMAGE_BASE_URL", "https://image.tmdb.org/t/p"
+        ).rstrip("/")
+        self.cache = TTLCache(maxsize=int(os.getenv("FINDER_CACHE_SIZE", 2048)))
+        self.negative_cache = TTLCache(
+            maxsize=int(os.getenv("FINDER_NEGATIVE_CACHE_SIZE", NEGATIVE_CACHE_SIZE)),
+            ttl=NEGATIVE_CACHE_TTL,
+        )
+        self.search_cache = SearchCache(ttl=CACHE_TTLS["search"])
+        # Outlives self.cache entries, see REVALIDATED_KINDS
+        self.stale = TTLCache(
+            maxsize=int(os.getenv("FINDER_CACHE_SIZE", 2048)), ttl=STALE_TTL
         )
+        self.revalidation = {"not_modified": 0, "unchanged": 0, "changed": 0}
+        self._stats_lock = threading.Lock()
+        # watch/providers entries live longer for old, stable titles and
+        # shorter for new releases and titles whose offers keep changing
+        self.provider_ttls = ProviderTTLPolicy(CACHE_TTLS["providers"])
+        # Top titles per major provider, updated as providers bodies are parsed
+        self.rankings = ProviderRankings(MAJOR_PROVIDERS)
+        self.upstream = UpstreamClient(
+            hedge=os.getenv("TMDB_HEDGE") == "1", transport=self._sample_transport()
+        )
+        # (media_type, id) -> offers of the current trending titles; filled
+        # in the background on refresh
+        self.trending_offers: Dict[Tuple[str, int], TitleOffers] = {}
+        self._trending_keys: List[Tuple[str, int]] = []
+        # Trending titles being looked up, and when to retry failed lookups
+        self._precomputing: Set[Tuple[str, int]] = set()
+        self._precompute_retry_at: Optional[float] = None
+        self._trending_lock = threading.Lock()
+        self._background = None
+        self._lookups = None
+        self._country_table: Optional[Dict] = None
+        self._country_index: Dict[str, int] = {}
 
     def _get_api_key(self) -> str:
         """
@@ -49,35 +257,266 @@ class NetflixTitleFinder:
         3. Add TMDB_API_KEY=your_key to .env file
         """
         api_key = os.getenv("TMDB_API_KEY")
+        if not api_key and os.getenv("SAMPLE_CATALOG"):
+            return SAMPLE_CATALOG_KEY
         if not api_key:
-            print(
-                "\n⚠️  NOTE: No TMDB API key found. Add TMDB_API_KEY to your .env file for real data."
+            log.warning(
+                "api_key_missing",
+                message="No TMDB_API_KEY set; using sample data. "
+                "Get a free key at https://www.themoviedb.org/settings/api",
             )
-            print("   Get a FREE API key at: https://www.themoviedb.org/settings/api\n")
-            print("   Using sample data for demonstration...\n")
         return api_key
 
+    @property
+    def api_key_configured(self) -> bool:
+        """Whether a real TMDB API key is set, not the SAMPLE_CATALOG stand-in."""
+        return bool(self.api_key) and self.api_key != SAMPLE_CATALOG_KEY
+
+    @property
+    def data_source(self) -> str:
+        """Where titles come from: "tmdb", "sample_catalog" or the built-in "sample_data"."""
+        if self.api_key == SAMPLE_CATALOG_KEY:
+            return "sample_catalog"
+        return "tmdb" if self.api_key else "sample_data"
+
+    def _sample_transport(self):
+        """
+        Transport serving the SAMPLE_CATALOG synthetic catalog (see
+        scripts/generate_catalog.py) in place of TMDB when no API key is
+        set, or None to use the configured TMDB transport.
+        """
+        if self.api_key != SAMPLE_CATALOG_KEY:
+            return None
+        from transport import CatalogTransport
+
+        transport = CatalogTransport(os.environ["SAMPLE_CATALOG"])
+        log.info(
+            "sample_catalog_loaded",
+            path=os.environ["SAMPLE_CATALOG"],
+            titles=len(transport.catalog),
+            load_ms=round(transport.catalog.load_seconds * 1000, 1),
+        )
+        return transport
+
     def _load_countries(self) -> Dict[str, str]:
         """
-        Load country code to country name mappings from countries.json file.
+        Load country code to country name mappings.
+
+        Uses the precompiled countries_table module (generated from
+        countries.json by scripts/build_country_table.py) and falls back to
+        parsing countries.json if it is missing.
 
         Returns:
             Dictionary mapping country codes to country names
         """
+        try:
+            from countries_table import COUNTRIES
+
+            return COUNTRIES
+        except ImportError:
+            pass
+
         try:
             countries_file = Path(__file__).parent / "countries.json"
             with open(countries_file, "r", encoding="utf-8") as f:
                 return json.load(f)
         except FileNotFoundError:
-            print("⚠️  Warning: countries.json file not found. Using fallback mappings.")
+            log.warning("countries_file_missing")
             return {}
         except json.JSONDecodeError:
-            print("⚠️  Warning: Error reading countries.json. Using fallback mappings.")
+            log.warning("countries_file_invalid")
             return {}
 
-    def search_titles(self, query: str) -> List[Dict]:
+    def _get_json(
+        self, cache_key: Optional[Tuple], path: str, params: Optional[Dict] = None
+    ) -> Tuple[int, Optional[Dict]]:
+        """
+        GET a TMDB endpoint, serving successful responses from the cache.
+        The call is bounded by the current request deadline (see upstream.deadline).
+        404s are remembered in the negative cache. Expired entries of
+        REVALIDATED_KINDS are revalidated with a conditional GET, and an
+        unchanged body is reused rather than parsed again.
+
+        Args:
+            cache_key: Cache key whose first element selects the TTL in
+                CACHE_TTLS, or None to bypass caching
+            path: Endpoint path relative to the TMDB base URL
+            params: Extra query parameters besides the API key
+
+        Returns:
+            Tuple of (HTTP status, parsed JSON body or None)
+        """
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
+        stored = self._stored_response(cache_key)
+        query = {"api_key": self.api_key}
+        query.update(params or {})
+        response = self.upstream.get(
+            f"{self.tmdb_base_url}{path}",
+            params=query,
+            headers=stored.conditional_headers() if stored is not None else None,
+        )
+        return self._accept_response(cache_key, stored, response)
+
+    def _cached_response(
+        self, cache_key: Optional[Tuple]
+    ) -> Optional[Tuple[int, Optional[Dict]]]:
+        """Return (status, body) from the positive or negative cache, if present."""
+        if cache_key is None:
+            return None
+        if cache_key in self.negative_cache:
+            return 404, None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return 200, cached
+        return None
+
+    def _stored_response(self, cache_key: Optional[Tuple]) -> Optional[StoredResponse]:
+        if cache_key is None or cache_key[0] not in REVALIDATED_KINDS:
+            return None
+        return self.stale.get(cache_key)
+
+    def _accept_response(
+        self, cache_key: Optional[Tuple], stored: Optional[StoredResponse], response
+    ) -> Tuple[int, Optional[Dict]]:
+        """
+        Turn a TMDB response into (status, body) and cache it, reusing the
+        stored body when the response is a 304 or has identical content.
+        For REVALIDATED_KINDS the body is the parsed record, see _parse().
+        """
+        status = response.status_code
+        if cache_key is None or cache_key[0] not in REVALIDATED_KINDS:
+            data = response.json() if status == 200 else None
+            return self._remember_response(cache_key, status, data)
+
+        if status == 304 and stored is not None:
+            self._count_revalidation("not_modified")
+        elif status == 200:
+            digest = StoredResponse.digest_of(response.content)
+            if stored is not None and stored.digest == digest:
+                self._count_revalidation("unchanged")
+            else:
+                if stored is not None:
+                    self._count_revalidation("changed")
+                stored = StoredResponse(self._parse(cache_key, response.json()), digest)
+        else:
+            return self._remember_response(cache_key, status, None)
+        stored.update_validators(response.headers)
+        self.stale.set(cache_key, stored)
+        return self._remember_response(cache_key, 200, stored.body, stored.digest)
+
+    def _parse(self, cache_key: Tuple, body: Dict) -> Any:
+        """Compact record(s) kept in the cache for a TMDB body (see records.py)."""
+        kind = cache_key[0]
+        if kind == "providers":
+            offers = TitleOffers.from_tmdb(body)
+            self.rankings.observe_offers(cache_key[1], cache_key[2], offers)
+            return offers
+        if kind == "details":
+            details = self._details_record(body)
+            self.provider_ttls.observe_title(
+                cache_key[1], cache_key[2], details.date, details.popularity
+            )
+            self.rankings.observe_title(
+                cache_key[1],
+                cache_key[2],
+                body.get("title") or body.get("name"),
+                details.popularity,
+            )
+            return details
+        if kind == "trending":
+            return self._trending_records(body)
+        return body
+
+    def _count_revalidation(self, outcome: str) -> None:
+        with self._stats_lock:
+            self.revalidation[outcome] += 1
+
+    def _derive(self, cache_key: Tuple, body: Any, build: Callable[[Any], Any]) -> Any:
+        """
+        build(body), computed once per stored response: while revalidation
+        finds the body unchanged, the earlier result is returned as is.
+        """
+        stored = self.stale.get(cache_key)
+        if stored is None or stored.body is not body:
+            return build(body)
+        name = build.__name__
+        if name not in stored.derived:
+            stored.derived[name] = build(body)
+        return stored.derived[name]
+
+    def _remember_response(
+        self,
+        cache_key: Optional[Tuple],
+        status: int,
+        data: Any,
+        digest: Optional[bytes] = None,
+    ) -> Tuple[int, Any]:
+        """
+        Cache a fresh TMDB response (200s and 404s) and pass it through.
+        digest identifies the response content (see StoredResponse).
+        """
+        if cache_key is not None:
+            if status == 200:
+                if cache_key[0] == "providers":
+                    ttl = self.provider_ttls.ttl(cache_key[1], cache_key[2], digest)
+                else:
+                    ttl = CACHE_TTLS[cache_key[0]]
+                self.cache.set(cache_key, data, ttl)
+            elif status == 404:
+                self.negative_cache.set(cache_key, True)
+        return status, data if status == 200 else None
+
+    def is_cached(self, kind: str, *args) -> bool:
+        """
+        Check whether a request can be answered without calling TMDB.
+
+        Args:
+            kind: 'search', 'providers', 'details' or 'trending'
+            args: The rest of the cache key, e.g. (media_type, title_id)
+        """
+        if not self.api_key:
+            return True
+        if kind == "search":
+            query = normalize_query(args[0])
+            return query in self.search_cache or ("search", query) in self.negative_cache
+        key = (kind, *args)
+        return key in self.cache or key in self.negative_cache
+
+    def cached_ttl(self, kind: str, *args) -> Optional[float]:
+        """
+        Seconds until the cached data behind a request expires, or None if
+        it is not cached. Responses derived from that data (see
+        responses.ResponseCache) must not outlive it.
+
+        For 'trending', pass the country of an annotated request: its
+        response is only cacheable once every title is annotated, and
+        expires with the first of the titles' watch/providers entries.
+        'availability' takes a search query, and covers the search results
+        together with the watch/providers data summarized for each of them.
+        """
+        if kind == "availability":
+            return self._availability_ttl(args[0])
+        if kind == "trending" and args and args[0]:
+            if not self.trending_precomputed():
+                return None
+            ttls = [self.cache.ttl_left(("trending",))]
+            ttls += [self._providers_ttl_left(key) for key in self._trending_keys]
+            return None if None in ttls else min(ttls)
+        if kind == "trending":
+            return self.cache.ttl_left(("trending",))
+        if kind == "search":
+            return self.search_cache.ttl_left(args[0])
+        return self.cache.ttl_left((kind, *args))
+
+    def search_titles(self, query: str) -> List[Title]:
         """
         Search for movie/TV show titles matching the query using TMDB API.
+        Queries are normalized (see cache.normalize_query) so that spelling
+        variants share one cache entry, and a query extending a cached one
+        with complete results is answered locally.
 
         Args:
             query: The search term (movie or TV show title)
@@ -85,89 +524,148 @@ class NetflixTitleFinder:
         Returns:
             List of matching titles with metadata including poster image
         """
-        print(f"\nSearching for '{query}'...")
+        log.debug("search", query=query)
 
         if not self.api_key:
             return self._get_sample_data(query)
 
+        query = normalize_query(query)
+        cache_key = ("search", query)
+        if cache_key in self.negative_cache:
+            log.debug("search_empty", query=query, cached=True)
+            return []
+        cached = self.search_cache.get(query)
+        if cached is not None:
+            return cached
+
         try:
-            url = f"{self.tmdb_base_url}/search/multi"
-            params = {"api_key": self.api_key, "query": query, "page": 1}
-
-            response = requests.get(url, params=params, timeout=10)
-
-            if response.status_code == 200:
-                results = response.json().get("results", [])
-                # Filter to only movies and TV shows
-                filtered_results = [
-                    r for r in results if r.get("media_type") in ["movie", "tv"]
-                ]
-                if filtered_results:
-                    # Add poster images
-                    for result in filtered_results:
-                        result["poster_url"] = self._get_poster_url(
-                            result.get("poster_path")
-                        )
-                    return filtered_results
-                else:
-                    print("No movies or TV shows found.")
-                    return []
+            status, body = self._get_json(
+                None, "/search/multi", {"query": query, "page": 1}
+            )
+
+            if status == 200:
+                return self._search_results(query, body)
             else:
-                print(f"Error: API returned status {response.status_code}")
+                log.warning("upstream_status", path="/search/multi", status=status)
                 return self._get_sample_data(query)
 
         except Exception as e:
-            print(
-                f"Warning: Could not reach API ({e}). Using sample data for demonstration..."
-            )
+            log.warning("upstream_error", path="/search/multi", error=str(e))
             return self._get_sample_data(query)
 
-    def get_netflix_countries(self, title: Dict) -> List[str]:
+    def _search_results(self, query: str, body: Dict) -> List[Title]:
+        """Filter a /search/multi body to movies and TV shows and cache the result."""
+        results = body.get("results", [])
+        # Filter to only movies and TV shows
+        filtered_results = [
+            self._title(r) for r in results if r.get("media_type") in ["movie", "tv"]
+        ]
+        if filtered_results:
+            for result in filtered_results:
+                self._observe_title(result)
+            # Everything TMDB matched fits on this page
+            complete = body.get("total_pages", 1) <= 1
+            self.search_cache.set(query, filtered_results, complete)
+            return filtered_results
+        else:
+            log.debug("search_empty", query=query, cached=False)
+            self.negative_cache.set(("search", query), True)
+            return []
+
+    def get_netflix_countries(self, title: Title) -> List[str]:
         """
         Fetch Netflix availability countries for a specific title.
 
         Args:
-            title: Title dictionary from search results
+            title: Title record from search results
 
         Returns:
             List of country codes/names where title is available on Netflix
         """
         if not self.api_key:
-            return title.get("netflix_countries", [])
+            return self._sample_netflix_countries(title.id)
 
         try:
-            media_type = title.get("media_type", "movie")
-            title_id = title.get("id")
+            media_type = title.media_type
+            title_id = title.id
 
             if not title_id:
                 return []
 
-            url = f"{self.tmdb_base_url}/{media_type}/{title_id}/watch/providers"
-            params = {"api_key": self.api_key}
-
-            response = requests.get(url, params=params, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json().get("results", {})
-                countries = []
-
-                # Extract Netflix availability from all regions
-                for country_code, provider_data in data.items():
-                    providers = provider_data.get("flatrate", [])
-                    if any(
-                        p.get("provider_id") == self.netflix_provider_id
-                        for p in providers
-                    ):
-                        countries.append(self._code_to_country_name(country_code))
+            key = ("providers", media_type, title_id)
+            status, body = self._get_json(key, f"/{media_type}/{title_id}/watch/providers")
 
-                return sorted(countries) if countries else []
+            if status == 200:
+                return self._derive(key, body, self._netflix_countries)
             else:
                 return []
 
         except Exception as e:
-            print(f"Warning: Could not fetch provider data ({e})")
+            log.warning("upstream_error", path="watch/providers", error=str(e))
             return []
 
+    def _netflix_countries(self, offers: TitleOffers) -> List[str]:
+        """Sorted names of the countries where Netflix streams a title."""
+        return self._country_names(offers.countries(self.netflix_provider_id))
+
+    def _country_names(self, codes) -> List[str]:
+        return sorted(self._code_to_country_name(code) for code in codes)
+
+    def country_table(self) -> Dict:
+        """
+        The published country table: ISO codes and names in a fixed order,
+        under a version derived from their content, so clients can cache
+        it for good. A packed country list (format=packed) is a bitmap over
+        this order.
+        """
+        if self._country_table is None:
+            import hashlib
+
+            codes = sorted(self.country_map)
+            names = [self.country_map[code] for code in codes]
+            digest = hashlib.blake2b(json.dumps([codes, names]).encode(), digest_size=6)
+            self._country_index = {code: i for i, code in enumerate(codes)}
+            self._country_table = {
+                "success": True,
+                "version": digest.hexdigest(),
+                "codes": codes,
+                "names": names,
+            }
+        return self._country_table
+
+    def _format_countries(self, codes, country_format: str) -> Tuple[Any, List[str]]:
+        """
+        Country codes in one of COUNTRY_FORMATS, plus those a packed list
+        cannot hold because the country table lacks them.
+
+        Packed lists are base64: country i of the table is set if bit
+        i % 8 of byte i // 8 is.
+        """
+        if country_format == "names":
+            return self._country_names(codes), []
+        if country_format == "codes":
+            return sorted(codes), []
+        import base64
+
+        self.country_table()
+        bits = bytearray((len(self._country_index) + 7) // 8)
+        unlisted = []
+        for code in codes:
+            i = self._country_index.get(code)
+            if i is None:
+                unlisted.append(code)
+            else:
+                bits[i // 8] |= 1 << (i % 8)
+        return base64.b64encode(bits).decode(), sorted(unlisted)
+
+    def _with_table(self, response: Dict, country_format: str, unlisted=()) -> Dict:
+        """Tag a response holding country codes with the table version they use."""
+        if country_format != "names":
+            response["table"] = self.country_table()["version"]
+        if unlisted:
+            response["unlisted"] = unlisted
+        return response
+
     def _code_to_country_name(self, code: str) -> str:
         """
         Convert country code to country name using the loaded country_map.
@@ -180,6 +678,21 @@ class NetflixTitleFinder:
         """
         return self.country_map.get(code, code)
 
+    def _image_url(self, image_path: Optional[str], size: str) -> Optional[str]:
+        """
+        Generate full image URL from a TMDB image path.
+
+        Args:
+            image_path: Relative image path from TMDB API (e.g. '/abc.jpg')
+            size: TMDB size name, e.g. 'w342' or 'original'
+
+        Returns:
+            Full image URL or None if not available
+        """
+        if image_path:
+            return f"{self.image_base_url}/{size}{image_path}"
+        return None
+
     def _get_poster_url(self, poster_path: Optional[str]) -> Optional[str]:
         """
         Generate full poster image URL from TMDB poster path.
@@ -190,15 +703,31 @@ class NetflixTitleFinder:
         Returns:
             Full poster image URL or None if not available
         """
-        if poster_path:
-            return f"{self.tmdb_image_base_url}{poster_path}"
-        return None
+        return self._image_url(poster_path, "w342")
 
-    def _get_sample_data(self, query: str) -> List[Dict]:
+    def _get_sample_data(self, query: str) -> List[Title]:
         """
         Return sample data for demonstration when API key is not available
         """
-        sample_titles = {
+        query_lower = query.lower()
+        results = []
+
+        for key, titles in self._sample_titles().items():
+            if query_lower in key:
+                results.extend(Title.from_tmdb(t, t.get("poster_url")) for t in titles)
+
+        return results
+
+    def _sample_netflix_countries(self, title_id: int) -> List[str]:
+        for titles in self._sample_titles().values():
+            for t in titles:
+                if t["id"] == title_id:
+                    return t["netflix_countries"]
+        return []
+
+    def _sample_titles(self) -> Dict[str, List[Dict]]:
+        """Sample titles keyed by the query that finds them."""
+        return {
             "attack on titan": [
                 {
                     "title": "Attack on Titan",
@@ -274,16 +803,7 @@ class NetflixTitleFinder:
             ],
         }
 
-        query_lower = query.lower()
-        results = []
-
-        for key, titles in sample_titles.items():
-            if query_lower in key:
-                results.extend(titles)
-
-        return results
-
-    def display_results(self, results: List[Dict]) -> Optional[Dict]:
+    def display_results(self, results: List[Title]) -> Optional[Dict]:
         """
         Format search results for API response.
 
@@ -296,29 +816,24 @@ class NetflixTitleFinder:
         if not results:
             return {"success": False, "message": "No results found.", "data": []}
 
-        formatted_results = []
-        for result in results:
-            # Handle both TMDB and sample data formats
-            title = result.get("title") or result.get("name", "Unknown")
-            media_type = result.get("media_type", "unknown")
-            release_year = result.get("release_date", result.get("first_air_date", ""))
-            year = release_year[:4] if release_year else ""
-            rating = result.get("vote_average", 0)
+        return {"success": True, "data": [result.display() for result in results]}
 
-            formatted_results.append(
-                {
-                    "id": result.get("id"),
-                    "title": title,
-                    "type": media_type,
-                    "year": year,
-                    "poster": result.get("poster_url"),
-                    "rating": rating,
-                }
-            )
+    def _title(self, result: Dict) -> Title:
+        """Title record for a TMDB search or trending result."""
+        return Title.from_tmdb(result, self._get_poster_url(result.get("poster_path")))
 
-        return {"success": True, "data": formatted_results}
+    def _observe_title(self, title: Title) -> None:
+        self.provider_ttls.observe_title(title.media_type, title.id, title.date, title.popularity)
+        self.rankings.observe_title(title.media_type, title.id, title.title, title.popularity)
 
-    def get_countries(self, title_id: int, media_type: str) -> Dict:
+    def get_countries(
+        self,
+        title_id: int,
+        media_type: str,
+        provider: Optional[int] = None,
+        offer: str = "flatrate",
+        country_format: str = "names",
+    ) -> Dict:
         """
         Get countries where a title is available on Netflix.
         Returns formatted data suitable for API response.
@@ -326,136 +841,489 @@ class NetflixTitleFinder:
         Args:
             title_id: The TMDB title ID
             media_type: 'movie' or 'tv'
+            provider: TMDB provider id to check instead of Netflix
+            offer: Offer type, e.g. 'rent' for where it can be rented
+            country_format: One of COUNTRY_FORMATS; codes and packed
+                responses name their country table version in "table"
 
         Returns:
             Dictionary with countries data for API response
         """
         try:
-            url = f"{self.tmdb_base_url}/{media_type}/{title_id}/watch/providers"
-            params = {"api_key": self.api_key}
-
-            response = requests.get(url, params=params, timeout=10)
-
-            if response.status_code == 200:
-                data = response.json().get("results", {})
-                countries = []
-
-                # Extract Netflix availability from all regions
-                for country_code, provider_data in data.items():
-                    providers = provider_data.get("flatrate", [])
-                    if any(
-                        p.get("provider_id") == self.netflix_provider_id
-                        for p in providers
-                    ):
-                        countries.append(self._code_to_country_name(country_code))
-
-                sorted_countries = sorted(countries) if countries else []
-                return {"success": True, "data": sorted_countries}
+            key = ("providers", media_type, title_id)
+            status, body = self._get_json(
+                key,
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+
+            if status == 200:
+                data, unlisted = self._countries_data(key, body, provider, offer, country_format)
+                return self._with_table({"success": True, "data": data}, country_format, unlisted)
             else:
                 return {"success": False, "data": []}
 
         except Exception as e:
-            print(f"Warning: Could not fetch provider data ({e})")
+            log.warning("upstream_error", path="watch/providers", error=str(e))
             return {"success": False, "data": []}
 
+    def _countries_data(
+        self,
+        key: Tuple,
+        offers: TitleOffers,
+        provider: Optional[int],
+        offer: str,
+        country_format: str = "names",
+    ) -> Tuple[Any, List[str]]:
+        """
+        get_countries() data from the index, and the unlisted codes of a
+        packed list; Netflix streaming by name is memoized.
+        """
+        provider = provider or self.netflix_provider_id
+        if (provider, offer, country_format) == (self.netflix_provider_id, "flatrate", "names"):
+            return self._derive(key, offers, self._netflix_countries), []
+        return self._format_countries(offers.countries(provider, offer), country_format)
+
+    def search_availability(
+        self,
+        response: Dict,
+        country: Optional[str] = None,
+        budget: float = AVAILABILITY_BUDGET,
+    ) -> Dict:
+        """
+        Add a Netflix availability summary to each title of a
+        display_results() response.
+
+        Cached watch/providers data is used as is; the rest is fetched
+        concurrently, and titles whose lookup has not finished within
+        `budget` seconds get "unknown" rather than delaying the response.
+        Late lookups carry on until the request deadline and fill the
+        provider cache, so a repeated search can answer them.
+
+        Args:
+            response: Output of display_results()
+            country: ISO code; also report whether Netflix has each title there
+            budget: Seconds to wait for uncached lookups, at most the time
+                left before the request deadline
 
-    def get_trending(self) -> Dict:
+        Returns:
+            The response with "availability" set on every title, either
+            {"netflix_countries": 12, "in_country": true} or "unknown"
+        """
+        titles = response.get("data", [])
+        if not titles or not self.api_key:
+            return self._with_availability(response, {}, country)
+
+        bodies: Dict[Tuple[str, int], Optional[TitleOffers]] = {}
+        pending = {}
+        for title in titles:
+            key = (title["type"], title["id"])
+            if key in bodies or key in pending:
+                continue
+            if self.is_cached("providers", *key):
+                bodies[key] = self._title_offers(*key)
+            else:
+                # Each lookup runs in a copy of this context, so under the
+                # request deadline and with the request's log fields
+                context = contextvars.copy_context()
+                pending[key] = self._lookup_pool().submit(
+                    context.run, self._title_offers, *key
+                )
+        if pending:
+            from concurrent.futures import wait
+
+            wait(pending.values(), timeout=self._availability_wait(budget))
+        for key, future in pending.items():
+            if future.done() and future.exception() is None:
+                bodies[key] = future.result()
+        return self._with_availability(response, bodies, country)
+
+    def _availability_wait(self, budget: float) -> float:
+        remaining = time_remaining()
+        return max(0.0, budget if remaining is None else min(budget, remaining))
+
+    def _lookup_pool(self):
+        if self._lookups is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._lookups = ThreadPoolExecutor(
+                max_workers=AVAILABILITY_WORKERS, thread_name_prefix="availability"
+            )
+        return self._lookups
+
+    def _title_offers(self, media_type: str, title_id: int) -> Optional[TitleOffers]:
+        """A title's watch/providers offers, or None if TMDB has none."""
+        try:
+            status, body = self._get_json(
+                ("providers", media_type, title_id),
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+        except Exception as e:
+            log.debug("availability_lookup_failed", title_id=title_id, error=str(e))
+            raise
+        return body if status == 200 else None
+
+    def fetch_offers(self, media_type: str, title_id: int) -> Tuple[int, Optional[TitleOffers]]:
+        """
+        A title's watch/providers offers with the TMDB status, for bulk
+        jobs (see scripts/crawl_availability.py). Unlike the API methods it
+        reports every status, e.g. 429, and lets upstream errors through,
+        so the caller can tell a missing title from one worth retrying.
+        """
+        return self._get_json(
+            ("providers", media_type, title_id),
+            f"/{media_type}/{title_id}/watch/providers",
+        )
+
+    def _with_availability(
+        self,
+        response: Dict,
+        bodies: Dict[Tuple[str, int], Optional[TitleOffers]],
+        country: Optional[str],
+    ) -> Dict:
+        """Copy of a display_results() response with per-title summaries."""
+        titles = []
+        for title in response.get("data", []):
+            offers = bodies.get((title["type"], title["id"]))
+            if offers is None:
+                summary = "unknown"
+            else:
+                codes = offers.countries(self.netflix_provider_id)
+                summary = {
+                    "netflix_countries": len(codes),
+                    "in_country": country in codes if country else None,
+                }
+            titles.append({**title, "availability": summary})
+        return {**response, "data": titles}
+
+    def _availability_ttl(self, query: str) -> Optional[float]:
+        """cached_ttl() of a search plus the provider data of all its results."""
+        ttls = [self.search_cache.ttl_left(query)]
+        for result in self.search_cache.get(normalize_query(query)) or []:
+            key = ("providers", result.media_type, result.id)
+            ttls.append(self.cache.ttl_left(key))
+        return None if None in ttls else min(ttls)
+
+    def get_trending(
+        self,
+        country: Optional[str] = None,
+        provider: Optional[int] = None,
+        only_available: bool = False,
+        offer: str = "flatrate",
+    ) -> Dict:
+        """
+        Get trending movies and TV shows this week from TMDB.
+
+        Args:
+            country: ISO code; annotate each title with "available", whether
+                `provider` has `offer` offers for it there (None while not
+                yet known)
+            provider: TMDB provider id, Netflix by default
+            only_available: Keep only titles known to be available
+            offer: Offer type, streaming ('flatrate') by default
+
+        An annotated response has "complete": false while some title's
+        "available" is still unknown; it must not be cached.
+        """
         if not self.api_key:
             return {"success": True, "data": []}
         try:
-            url = f"{self.tmdb_base_url}/trending/all/week"
-            params = {"api_key": self.api_key, "language": "en-US"}
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
+            fresh = ("trending",) not in self.cache
+            status, body = self._get_json(
+                ("trending",), "/trending/all/week", {"language": "en-US"}
+            )
+            if status != 200:
                 return {"success": False, "data": []}
-            results = response.json().get("results", [])
-            formatted = []
-            for r in results:
-                if r.get("media_type") not in ["movie", "tv"]:
-                    continue
-                poster = self._get_poster_url(r.get("poster_path"))
-                if not poster:
-                    continue
-                title = r.get("title") or r.get("name", "Unknown")
-                year = (r.get("release_date") or r.get("first_air_date") or "")[:4]
-                formatted.append({
-                    "id": r.get("id"),
-                    "title": title,
-                    "type": r.get("media_type"),
-                    "year": year,
-                    "poster": poster,
-                    "rating": r.get("vote_average", 0),
-                })
-            return {"success": True, "data": formatted}
+            data = self._derive(("trending",), body, self._format_trending)
         except Exception:
             return {"success": False, "data": []}
 
-    def get_all_providers(self, title_id: int, media_type: str) -> Dict:
+        if fresh:
+            self._refresh_trending_offers(data)
+        expired = self._expire_trending_offers()
+        if fresh or expired or self._precompute_retry_due():
+            self._precompute_trending()
+        if country is None:
+            return {"success": True, "data": data}
+        return self._annotate_trending(data, country, provider, only_available, offer)
+
+    def _providers_ttl_left(self, key: Tuple[str, int]) -> Optional[float]:
+        """Seconds left on a title's cached watch/providers answer, found or 404."""
+        ttl = self.cache.ttl_left(("providers", *key))
+        return ttl if ttl is not None else self.negative_cache.ttl_left(("providers", *key))
+
+    def _expire_trending_offers(self) -> bool:
+        """
+        Forget the trending offers whose watch/providers cache entry has
+        expired, so they are looked up again rather than served stale for as
+        long as the title keeps trending. Returns whether any were.
+        """
+        with self._trending_lock:
+            expired = [
+                key for key in self.trending_offers if not self.is_cached("providers", *key)
+            ]
+            for key in expired:
+                del self.trending_offers[key]
+        return bool(expired)
+
+    def _refresh_trending_offers(self, titles: List[Dict]) -> None:
+        """Start tracking a new trending list, keeping offers already known."""
+        keys = [(t["type"], t["id"]) for t in titles]
+        known = self.trending_offers
+        self.trending_offers = {k: known[k] for k in keys if k in known}
+        self._trending_keys = keys
+
+    def _background_pool(self):
+        if self._background is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._background = ThreadPoolExecutor(
+                max_workers=TRENDING_PRECOMPUTE_WORKERS, thread_name_prefix="precompute"
+            )
+        return self._background
+
+    def _precompute_trending(self) -> None:
+        """
+        Fetch watch/providers for every trending title concurrently, so
+        annotated /api/trending requests never wait on TMDB. Lookups go
+        through the provider cache, and run outside any request deadline.
+        """
+        pool = self._background_pool()
+        for media_type, title_id in self._trending_to_index():
+            pool.submit(self._index_trending_offers, media_type, title_id)
+
+    def _trending_to_index(self) -> List[Tuple[str, int]]:
+        """Trending titles with unknown offers and no lookup in flight, now marked in flight."""
+        with self._trending_lock:
+            keys = [
+                key
+                for key in self._trending_keys
+                if key not in self.trending_offers and key not in self._precomputing
+            ]
+            self._precomputing.update(keys)
+        return keys
+
+    def _precompute_retry_due(self) -> bool:
+        """Whether failed trending lookups are due for a retry (which it claims)."""
+        with self._trending_lock:
+            retry_at = self._precompute_retry_at
+            if retry_at is None or time.monotonic() < retry_at:
+                return False
+            self._precompute_retry_at = None
+            return True
+
+    def _store_trending_offers(
+        self, key: Tuple[str, int], status: Optional[int], body: Optional[TitleOffers]
+    ) -> None:
+        """
+        Record a trending title's lookup. Only a 404 means "no offers"; after
+        an error (status None) or another status, such as a 429 or 5xx,
+        the offers stay unknown and the lookup is retried later.
+        """
+        with self._trending_lock:
+            self._precomputing.discard(key)
+            if status == 200:
+                self.trending_offers[key] = body
+            elif status == 404:
+                self.trending_offers[key] = NO_OFFERS
+            elif self._precompute_retry_at is None:
+                self._precompute_retry_at = time.monotonic() + TRENDING_RETRY_DELAY
+
+    def _index_trending_offers(self, media_type: str, title_id: int) -> None:
+        status, body = None, None
+        try:
+            status, body = self._get_json(
+                ("providers", media_type, title_id),
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+            if status not in (200, 404):
+                log.warning("trending_precompute_failed", title_id=title_id, status=status)
+        except Exception as e:
+            log.warning("trending_precompute_failed", title_id=title_id, error=str(e))
+        finally:
+            self._store_trending_offers((media_type, title_id), status, body)
+
+    def get_rankings(self, provider: Optional[int] = None, k: int = RANKING_SIZE) -> Dict:
+        """
+        Rankings of a major provider's titles (see rankings.py): "widest",
+        those offered in the most countries, and "exclusive", the most
+        popular ones offered in a single country. Flatrate offers only.
+        They cover the titles whose providers this instance has fetched,
+        so serving them never calls TMDB.
+
+        Args:
+            provider: TMDB provider id, Netflix by default
+            k: Titles per ranking, at most rankings.TOP_K
+        """
+        provider = provider or self.netflix_provider_id
+        return {
+            "success": True,
+            "provider": provider,
+            "offer": "flatrate",
+            "tracked_titles": self.rankings.tracked(),
+            **self.rankings.rankings(provider, k),
+        }
+
+    def trending_precomputed(self) -> bool:
+        """Whether provider offers are known for every current trending title."""
+        return all(key in self.trending_offers for key in self._trending_keys)
+
+    def _annotate_trending(
+        self,
+        titles: List[Dict],
+        country: str,
+        provider: Optional[int],
+        only_available: bool,
+        offer: str = "flatrate",
+    ) -> Dict:
+        """Mark trending titles with availability from the precomputed offers."""
+        provider = provider or self.netflix_provider_id
+        annotated = []
+        complete = True
+        for title in titles:
+            offers = self.trending_offers.get((title["type"], title["id"]))
+            available = None if offers is None else country in offers.countries(provider, offer)
+            complete = complete and available is not None
+            if only_available and not available:
+                continue
+            annotated.append({**title, "available": available})
+        return {
+            "success": True,
+            "country": country,
+            "provider": provider,
+            "offer": offer,
+            "complete": complete,
+            "data": annotated,
+        }
+
+    def _trending_records(self, body: Dict) -> Tuple[Title, ...]:
+        """Movies and TV shows with posters from a /trending body."""
+        titles = []
+        for r in body.get("results", []):
+            if r.get("media_type") not in ["movie", "tv"]:
+                continue
+            title = self._title(r)
+            self._observe_title(title)
+            if title.poster:
+                titles.append(title)
+        return tuple(titles)
+
+    def _format_trending(self, titles: Tuple[Title, ...]) -> List[Dict]:
+        return [title.display() for title in titles]
+
+    def get_all_providers(
+        self,
+        title_id: int,
+        media_type: str,
+        provider: Optional[int] = None,
+        offer: str = "flatrate",
+        country_format: str = "names",
+    ) -> Dict:
+        """
+        Get all major streaming providers for a title, grouped by provider name.
+
+        Args:
+            provider: Only this TMDB provider, major or not
+            offer: Offer type, e.g. 'rent' for rental stores
+            country_format: One of COUNTRY_FORMATS, as in get_countries()
+        """
         if not self.api_key:
             return {"success": True, "data": {}}
         try:
-            url = f"{self.tmdb_base_url}/{media_type}/{title_id}/watch/providers"
-            params = {"api_key": self.api_key}
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
+            key = ("providers", media_type, title_id)
+            status, body = self._get_json(
+                key,
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+            if status != 200:
                 return {"success": False, "data": {}}
-            data = response.json().get("results", {})
-            providers_map: Dict[str, Dict] = {}
-            for country_code, provider_data in data.items():
-                country_name = self._code_to_country_name(country_code)
-                for provider in provider_data.get("flatrate", []):
-                    pid = provider.get("provider_id")
-                    pname = MAJOR_PROVIDERS.get(pid)
-                    if not pname:
-                        continue
-                    if pname not in providers_map:
-                        logo_path = provider.get("logo_path", "")
-                        providers_map[pname] = {
-                            "countries": [],
-                            "logo": f"https://image.tmdb.org/t/p/original{logo_path}" if logo_path else None,
-                        }
-                    if country_name not in providers_map[pname]["countries"]:
-                        providers_map[pname]["countries"].append(country_name)
-            for p in providers_map.values():
-                p["countries"] = sorted(p["countries"])
-            return {"success": True, "data": providers_map}
+            data = self._providers_data(key, body, provider, offer, country_format)
+            return self._with_table({"success": True, "data": data}, country_format)
         except Exception:
             return {"success": False, "data": {}}
 
+    def _providers_data(
+        self,
+        key: Tuple,
+        offers: TitleOffers,
+        provider: Optional[int],
+        offer: str,
+        country_format: str = "names",
+    ) -> Dict[str, Dict]:
+        """get_all_providers() data from the index; the unfiltered one is memoized."""
+        if (provider, offer, country_format) == (None, "flatrate", "names"):
+            return self._derive(key, offers, self._group_providers)
+        return self._group_providers(offers, offer, provider, country_format)
+
+    def _group_providers(
+        self,
+        offers: TitleOffers,
+        offer: str = "flatrate",
+        provider: Optional[int] = None,
+        country_format: str = "names",
+    ) -> Dict[str, Dict]:
+        """
+        Countries and logo per provider with `offer` offers for a title:
+        the major providers, or only `provider` if given.
+        """
+        providers_map: Dict[str, Dict] = {}
+        for listed, codes in offers.offered(offer):
+            if provider is None:
+                pname = MAJOR_PROVIDERS.get(listed.provider_id)
+                if not pname:
+                    continue
+            elif listed.provider_id == provider:
+                pname = MAJOR_PROVIDERS.get(provider, listed.provider_name)
+            else:
+                continue
+            if pname not in providers_map:
+                providers_map[pname] = {
+                    "countries": set(),
+                    "logo": self._image_url(listed.logo_path, "original"),
+                }
+            providers_map[pname]["countries"].update(codes)
+        for p in providers_map.values():
+            p["countries"], unlisted = self._format_countries(p["countries"], country_format)
+            if unlisted:
+                p["unlisted"] = unlisted
+        return providers_map
+
     def get_title_details(self, title_id: int, media_type: str) -> Dict:
+        """Get rich metadata for a title: overview, genres, cast, runtime."""
         if not self.api_key:
             return {"success": True, "data": {}}
         try:
-            url = f"{self.tmdb_base_url}/{media_type}/{title_id}"
-            params = {"api_key": self.api_key, "append_to_response": "credits"}
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
+            status, d = self._get_json(
+                ("details", media_type, title_id),
+                f"/{media_type}/{title_id}",
+                {"append_to_response": "credits"},
+            )
+            if status != 200:
                 return {"success": False, "data": {}}
-            d = response.json()
-            genres = [g["name"] for g in d.get("genres", [])]
-            cast = [
-                {
-                    "name": c["name"],
-                    "character": c.get("character", ""),
-                    "photo": f"https://image.tmdb.org/t/p/w185{c['profile_path']}" if c.get("profile_path") else None,
-                }
-                for c in d.get("credits", {}).get("cast", [])[:8]
-            ]
-            episode_run = d.get("episode_run_time", [])
-            runtime = d.get("runtime") or (episode_run[0] if episode_run else None)
-            return {
-                "success": True,
-                "data": {
-                    "overview": d.get("overview", ""),
-                    "tagline": d.get("tagline", ""),
-                    "genres": genres,
-                    "cast": cast,
-                    "runtime": runtime,
-                },
-            }
+            return {"success": True, "data": d.display()}
         except Exception:
             return {"success": False, "data": {}}
 
+    def _details_record(self, d: Dict) -> TitleDetails:
+        """Overview, genres, top cast and runtime from a /{type}/{id} body."""
+        cast = tuple(
+            CastMember(
+                c["name"],
+                c.get("character", ""),
+                self._image_url(c.get("profile_path"), "w185"),
+            )
+            for c in d.get("credits", {}).get("cast", [])[:8]
+        )
+        episode_run = d.get("episode_run_time", [])
+        return TitleDetails(
+            overview=d.get("overview", ""),
+            tagline=d.get("tagline", ""),
+            genres=tuple(g["name"] for g in d.get("genres", [])),
+            cast=cast,
+            runtime=d.get("runtime") or (episode_run[0] if episode_run else None),
+            date=d.get("release_date") or d.get("first_air_date") or "",
+            popularity=d.get("popularity") or 0.0,
+        )
+
 
 # API Usage Example:
 # finder = NetflixTitleFinder()
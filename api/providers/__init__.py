@@ -1 +0,0 @@
-# This file makes the directory a Python package
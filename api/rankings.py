@@ -0,0 +1,361 @@
+"""
+Top-K title rankings per streaming provider, kept up to date as the
+finder parses watch/providers bodies.
+
+Two rankings per provider, over flatrate (subscription) offers:
+
+- widest: titles offered in the most countries
+- exclusive: the most popular titles offered in exactly one country
+
+Each ranking is a bounded min-heap (_TopK), so recording a title costs at
+most a heap push and reading a ranking sorts K entries. The finder calls
+observe_offers() from _parse(), i.e. for every new or changed providers
+body, and observe_title() with names and popularity from search,
+trending and details results. Rankings only cover titles this instance
+has looked up, and /api/rankings never calls TMDB.
+
+With RANKINGS_SNAPSHOT set, the titles behind the rankings are saved to
+that JSON file at most every SAVE_INTERVAL seconds (on a background
+thread) and at exit, and loaded on first use, so rankings survive
+restarts. Without it they are kept in memory only.
+"""
+
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from jsonlog import get_logger
+
+log = get_logger("rankings")
+
+RANKINGS = ("widest", "exclusive")
+
+# Titles kept per ranking, and so the largest k /api/rankings serves
+TOP_K = 100
+
+# Titles whose offers are remembered (LRU; ranked titles are never evicted)
+MAX_TRACKED = 20000
+
+# Least seconds between snapshot writes
+SAVE_INTERVAL = 60.0
+
+SNAPSHOT_VERSION = 1
+
+# (media_type, title id)
+TitleKey = Tuple[str, int]
+
+
+class _Tracked:
+    """
+    What the rankings know about one title.
+
+    Args:
+        offers: Provider id -> number of countries with offers, or the
+            country code itself when there is only one (no tuple per entry)
+    """
+
+    __slots__ = ("name", "popularity", "offers")
+
+    def __init__(
+        self,
+        name: Optional[str],
+        popularity: float,
+        offers: Dict[int, Union[int, str]],
+    ):
+        self.name = name
+        self.popularity = popularity
+        self.offers = offers
+
+
+class _TopK:
+    """
+    The k highest-scoring titles, in a min-heap of (score, key) whose root
+    is the weakest member. Rescoring pushes a new entry instead of moving
+    the old one, so an entry only counts while members[key] is its score.
+
+    Titles that drop out of the heap are forgotten, so when a member's
+    score falls (or it leaves) a title outside may now rank above it; the
+    ranking is then marked stale and rebuilt by the owner before reading.
+    """
+
+    __slots__ = ("k", "heap", "members", "stale")
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[Tuple[tuple, TitleKey]] = []
+        self.members: Dict[TitleKey, tuple] = {}
+        self.stale = False
+
+    def offer(self, key: TitleKey, score: tuple) -> None:
+        current = self.members.get(key)
+        if current is not None:
+            if score < current:
+                self.stale = True
+            if score != current:
+                self.members[key] = score
+                heapq.heappush(self.heap, (score, key))
+                if len(self.heap) > 2 * self.k:
+                    self._rebuild_heap()
+            return
+        if len(self.members) < self.k:
+            self.members[key] = score
+            heapq.heappush(self.heap, (score, key))
+            return
+        while self.members.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        if score > self.heap[0][0]:
+            _, weakest = heapq.heapreplace(self.heap, (score, key))
+            del self.members[weakest]
+            self.members[key] = score
+
+    def remove(self, key: TitleKey) -> None:
+        if self.members.pop(key, None) is not None:
+            self.stale = True
+
+    def rebuild(self, scored: Iterable[Tuple[TitleKey, tuple]]) -> None:
+        self.members = dict(heapq.nlargest(self.k, scored, key=lambda item: item[1]))
+        self._rebuild_heap()
+        self.stale = False
+
+    def _rebuild_heap(self) -> None:
+        self.heap = [(score, key) for key, score in self.members.items()]
+        heapq.heapify(self.heap)
+
+    def ranked(self) -> List[TitleKey]:
+        """Members, best first."""
+        return sorted(self.members, key=lambda key: (self.members[key], key), reverse=True)
+
+
+class ProviderRankings:
+    """
+    The widest and exclusive rankings of a set of providers.
+
+    Args:
+        providers: TMDB provider ids to rank titles for
+        path: Snapshot file; None for RANKINGS_SNAPSHOT. Without either
+            (or with ""), rankings are kept in memory only
+        k: Titles kept per ranking
+        max_tracked: Titles whose offers are kept to rebuild rankings from
+    """
+
+    def __init__(
+        self,
+        providers: Iterable[int],
+        path: Optional[str] = None,
+        k: int = TOP_K,
+        max_tracked: int = MAX_TRACKED,
+    ):
+        self.providers = frozenset(providers)
+        self.k = k
+        self.max_tracked = max_tracked
+        path = os.getenv("RANKINGS_SNAPSHOT") if path is None else path
+        self._path: Optional[Path] = Path(path) if path else None
+        self._titles: "OrderedDict[TitleKey, _Tracked]" = OrderedDict()
+        # Names and popularity of titles seen before their offers
+        self._meta: "OrderedDict[TitleKey, Tuple[Optional[str], float]]" = OrderedDict()
+        self._boards: Dict[Tuple[int, str], _TopK] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._changed = False
+        self._saving = False
+        self._saved_at = time.monotonic()
+
+    def observe_offers(self, media_type: str, title_id: int, offers) -> None:
+        """
+        Rank a title by a freshly parsed watch/providers body.
+
+        Args:
+            offers: records.TitleOffers of the title
+        """
+        counts = {}
+        for provider_id in self.providers:
+            codes = offers.countries(provider_id)
+            if codes:
+                counts[provider_id] = codes[0] if len(codes) == 1 else len(codes)
+        key = (media_type, title_id)
+        with self._lock:
+            self._load()
+            tracked = self._titles.get(key)
+            if tracked is None:
+                if not counts:
+                    return
+                name, popularity = self._meta.pop(key, (None, 0.0))
+                tracked = _Tracked(name, popularity, {})
+            previous, tracked.offers = tracked.offers, counts
+            self._rank(key, tracked, previous)
+            if counts:
+                self._track(key, tracked)
+            else:
+                del self._titles[key]
+                self._remember_meta(key, tracked.name, tracked.popularity)
+            self._changed = True
+            self._maybe_save()
+
+    def observe_title(
+        self, media_type: str, title_id: int, name: Optional[str], popularity: float
+    ) -> None:
+        """Note the name and TMDB popularity of a title, ranked or not (yet)."""
+        if media_type not in ("movie", "tv") or not title_id:
+            return
+        key = (media_type, title_id)
+        popularity = float(popularity or 0.0)
+        with self._lock:
+            self._load()
+            tracked = self._titles.get(key)
+            if tracked is None:
+                self._remember_meta(key, name, popularity)
+                return
+            name = name or tracked.name
+            if (name, popularity) == (tracked.name, tracked.popularity):
+                return
+            tracked.name, tracked.popularity = name, popularity
+            self._rank(key, tracked, tracked.offers)
+            self._changed = True
+
+    def _remember_meta(self, key: TitleKey, name: Optional[str], popularity: float) -> None:
+        self._meta[key] = (name, popularity)
+        self._meta.move_to_end(key)
+        while len(self._meta) > self.max_tracked:
+            self._meta.popitem(last=False)
+
+    def _board(self, provider_id: int, ranking: str) -> _TopK:
+        board = self._boards.get((provider_id, ranking))
+        if board is None:
+            board = self._boards[(provider_id, ranking)] = _TopK(self.k)
+        return board
+
+    @staticmethod
+    def _score(ranking: str, tracked: _Tracked, provider_id: int) -> Optional[tuple]:
+        """A title's score in a ranking, or None if it does not qualify."""
+        count = tracked.offers.get(provider_id, 0)
+        if isinstance(count, str):
+            count = 1
+        if ranking == "widest":
+            return (count, tracked.popularity) if count else None
+        return (tracked.popularity,) if count == 1 else None
+
+    def _rank(self, key: TitleKey, tracked: _Tracked, previous: Dict) -> None:
+        for provider_id in set(previous) | set(tracked.offers):
+            for ranking in RANKINGS:
+                score = self._score(ranking, tracked, provider_id)
+                board = self._board(provider_id, ranking)
+                if score is None:
+                    board.remove(key)
+                else:
+                    board.offer(key, score)
+
+    def _track(self, key: TitleKey, tracked: _Tracked) -> None:
+        self._titles[key] = tracked
+        self._titles.move_to_end(key)
+        attempts = len(self._titles)
+        while len(self._titles) > self.max_tracked and attempts:
+            attempts -= 1
+            old_key, old = self._titles.popitem(last=False)
+            if any(
+                old_key in self._board(provider_id, ranking).members
+                for provider_id in old.offers
+                for ranking in RANKINGS
+            ):
+                self._titles[old_key] = old
+
+    def rankings(self, provider_id: int, k: int) -> Dict[str, List[Dict]]:
+        """The top k titles of each ranking of a provider, best first."""
+        with self._lock:
+            self._load()
+            result = {}
+            for ranking in RANKINGS:
+                board = self._board(provider_id, ranking)
+                if board.stale:
+                    board.rebuild(
+                        (key, score)
+                        for key, tracked in self._titles.items()
+                        for score in (self._score(ranking, tracked, provider_id),)
+                        if score is not None
+                    )
+                result[ranking] = [
+                    self._entry(key, self._titles[key], provider_id)
+                    for key in board.ranked()[:k]
+                ]
+            return result
+
+    @staticmethod
+    def _entry(key: TitleKey, tracked: _Tracked, provider_id: int) -> Dict:
+        offers = tracked.offers[provider_id]
+        entry = {"id": key[1], "type": key[0], "title": tracked.name, "countries": offers}
+        if isinstance(offers, str):
+            entry.update(countries=1, country=offers)
+        return entry
+
+    def tracked(self) -> int:
+        """Titles the rankings are kept over."""
+        with self._lock:
+            self._load()
+            return len(self._titles)
+
+    def _load(self) -> None:
+        """Restore the snapshot, once, on first use. Called with the lock held."""
+        if self._loaded:
+            return
+        self._loaded = True
+        path = self._path
+        if path is None:
+            return
+        atexit.register(self.save)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                return
+            for media_type, title_id, name, popularity, offers in snapshot["titles"]:
+                key = (media_type, title_id)
+                tracked = _Tracked(name, popularity, dict(offers))
+                self._track(key, tracked)
+                self._rank(key, tracked, {})
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning("rankings_snapshot_invalid", path=str(path), error=str(e))
+            return
+        log.info("rankings_restored", path=str(path), titles=len(self._titles))
+
+    def _maybe_save(self) -> None:
+        """Save in the background if due. Called with the lock held."""
+        if self._saving or self._path is None:
+            return
+        if time.monotonic() - self._saved_at < SAVE_INTERVAL:
+            return
+        self._saving = True
+        threading.Thread(target=self.save, name="rankings-save", daemon=True).start()
+
+    def save(self) -> None:
+        """Write the snapshot now, if anything changed since the last one."""
+        with self._lock:
+            path = self._path
+            if path is None or not self._changed:
+                self._saving = False
+                return
+            titles = [
+                [*key, t.name, t.popularity, list(t.offers.items())]
+                for key, t in self._titles.items()
+            ]
+            self._changed = False
+            self._saved_at = time.monotonic()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": SNAPSHOT_VERSION, "titles": titles}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("rankings_snapshot_failed", path=str(path), error=str(e))
+            with self._lock:
+                self._changed = True
+        finally:
+            with self._lock:
+                self._saving = False
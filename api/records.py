@@ -0,0 +1,220 @@
+"""
+Compact records for the TMDB data the finder caches.
+
+TMDB bodies carry far more than the API serves: a search result has a
+dozen fields we never read, a details body the whole cast and crew, and a
+watch/providers body repeats each provider's name and logo in every
+country it lists. The finder turns each body into these records as soon
+as it is parsed, keeping only what the API needs, and caches the records
+instead. Formatting an API response is then a projection of a few
+attributes (see display()).
+
+Records are plain classes with __slots__, so an instance has no
+per-object __dict__. They are treated as immutable once built. (Not
+dataclasses: importing that module costs more than the whole finder at
+cold start.)
+"""
+
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Offer types in a watch/providers body, per country
+OFFER_TYPES = ("flatrate", "free", "ads", "rent", "buy")
+
+
+class Title:
+    """
+    A movie or TV show from a search or trending result.
+
+    Args:
+        date: release_date for movies, first_air_date for TV, possibly ""
+        poster: Full poster URL
+    """
+
+    __slots__ = (
+        "id",
+        "media_type",
+        "title",
+        "original_title",
+        "date",
+        "poster",
+        "rating",
+        "popularity",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        media_type: str,
+        title: str,
+        original_title: Optional[str],
+        date: str,
+        poster: Optional[str],
+        rating: float,
+        popularity: float,
+    ):
+        self.id = id
+        self.media_type = media_type
+        self.title = title
+        self.original_title = original_title
+        self.date = date
+        self.poster = poster
+        self.rating = rating
+        self.popularity = popularity
+
+    @classmethod
+    def from_tmdb(cls, result: Dict, poster: Optional[str]) -> "Title":
+        """
+        Args:
+            result: A TMDB search/trending result
+            poster: Poster URL built from the result's poster_path
+        """
+        return cls(
+            id=result.get("id"),
+            media_type=result.get("media_type", "unknown"),
+            title=result.get("title") or result.get("name", "Unknown"),
+            original_title=result.get("original_title") or result.get("original_name"),
+            date=result.get("release_date") or result.get("first_air_date") or "",
+            poster=poster,
+            rating=result.get("vote_average", 0),
+            popularity=result.get("popularity") or 0.0,
+        )
+
+    def display(self) -> Dict:
+        """The title as it appears in /api/search and /api/trending."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "type": self.media_type,
+            "year": self.date[:4],
+            "poster": self.poster,
+            "rating": self.rating,
+        }
+
+
+class CastMember:
+    """
+    Args:
+        photo: Full profile image URL
+    """
+
+    __slots__ = ("name", "character", "photo")
+
+    def __init__(self, name: str, character: str, photo: Optional[str]):
+        self.name = name
+        self.character = character
+        self.photo = photo
+
+    def display(self) -> Dict:
+        return {"name": self.name, "character": self.character, "photo": self.photo}
+
+
+class TitleDetails:
+    """
+    What /api/details serves from a /{type}/{id} body.
+
+    Args:
+        date, popularity: Kept for the provider TTL policy, not served
+    """
+
+    __slots__ = ("overview", "tagline", "genres", "cast", "runtime", "date", "popularity")
+
+    def __init__(
+        self,
+        overview: str,
+        tagline: str,
+        genres: Tuple[str, ...],
+        cast: Tuple[CastMember, ...],
+        runtime: Optional[int],
+        date: str,
+        popularity: float,
+    ):
+        self.overview = overview
+        self.tagline = tagline
+        self.genres = genres
+        self.cast = cast
+        self.runtime = runtime
+        self.date = date
+        self.popularity = popularity
+
+    def display(self) -> Dict:
+        return {
+            "overview": self.overview,
+            "tagline": self.tagline,
+            "genres": list(self.genres),
+            "cast": [member.display() for member in self.cast],
+            "runtime": self.runtime,
+        }
+
+
+class ProviderOffer:
+    """A streaming provider as listed in a watch/providers body."""
+
+    __slots__ = ("provider_id", "provider_name", "logo_path")
+
+    def __init__(self, provider_id: int, provider_name: str, logo_path: Optional[str]):
+        self.provider_id = provider_id
+        self.provider_name = provider_name
+        self.logo_path = logo_path
+
+
+class TitleOffers:
+    """
+    Offers from a watch/providers body, indexed by provider and offer
+    type: (provider id, offer type) -> country codes with that offer.
+    Questions like "where is it on Netflix" or "where can I rent it on
+    Apple TV" are then a single lookup. One ProviderOffer is kept per
+    provider, and country codes are interned tuples, shared between
+    entries with the same countries (a frozenset costs 200+ bytes even
+    for one country, and the lists are short enough to scan).
+
+    Args:
+        providers: Provider id -> provider, for every provider listed
+        index: (provider id, offer type) -> sorted country codes
+    """
+
+    __slots__ = ("providers", "_index")
+
+    def __init__(
+        self,
+        providers: Dict[int, ProviderOffer],
+        index: Dict[Tuple[int, str], Tuple[str, ...]],
+    ):
+        self.providers = providers
+        self._index = index
+
+    @classmethod
+    def from_tmdb(cls, body: Dict) -> "TitleOffers":
+        providers: Dict[int, ProviderOffer] = {}
+        countries: Dict[Tuple[int, str], List[str]] = {}
+        for country_code, provider_data in body.get("results", {}).items():
+            country_code = sys.intern(country_code)
+            for offer_type in OFFER_TYPES:
+                for p in provider_data.get(offer_type) or ():
+                    pid = p.get("provider_id")
+                    if pid not in providers:
+                        providers[pid] = ProviderOffer(
+                            pid, p.get("provider_name", ""), p.get("logo_path")
+                        )
+                    countries.setdefault((pid, offer_type), []).append(country_code)
+        shared: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        index = {}
+        for key, codes in countries.items():
+            codes = tuple(sorted(set(codes)))
+            index[key] = shared.setdefault(codes, codes)
+        return cls(providers, index)
+
+    def countries(self, provider_id: int, offer_type: str = "flatrate") -> Tuple[str, ...]:
+        """Country codes where a provider has offers of a type."""
+        return self._index.get((provider_id, offer_type), ())
+
+    def offered(
+        self, offer_type: str = "flatrate"
+    ) -> Iterator[Tuple[ProviderOffer, Tuple[str, ...]]]:
+        """Each provider with offers of a type, with its country codes."""
+        for (pid, kind), codes in self._index.items():
+            if kind == offer_type:
+                yield self.providers[pid], codes
+
+
+NO_OFFERS = TitleOffers({}, {})
@@ -0,0 +1,361 @@
+"""
+Pluggable transports under the TMDB clients: live, record and replay.
+
+    TMDB_TRANSPORT=live      # default: real HTTP (requests / httpx)
+    TMDB_TRANSPORT=record    # real HTTP, and save every response to a cassette
+    TMDB_TRANSPORT=replay    # answer from the cassette only, no network
+    TMDB_CASSETTE=tmdb.cassette
+    TMDB_REPLAY_LATENCY=recorded   # or a fixed delay in ms; default 0
+
+A cassette is two files: `<path>` holds the raw response bodies back to
+back, and `<path>.idx` has one JSON line per response,
+[key, offset, length, status, latency_ms]. Recording only appends, so it
+is safe to stop at any time. Replay loads just the index and memory-maps
+the bodies, so a lookup is a dict hit plus a slice, fast enough not to
+distort throughput benchmarks.
+
+Keys ignore the host and the api_key parameter, so a cassette recorded
+against api.themoviedb.org replays under any TMDB_BASE_URL. The finder
+only calls TMDB when TMDB_API_KEY is set, so replay runs need it set to
+some placeholder value.
+"""
+
+import json
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+TRANSPORT_MODES = ("live", "record", "replay")
+DEFAULT_CASSETTE = "tmdb.cassette"
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request the cassette has no response for."""
+
+
+def request_key(url: str, params: Optional[Dict] = None) -> str:
+    """Canonical cassette key: path plus sorted query, without host or api_key."""
+    query = sorted((k, str(v)) for k, v in (params or {}).items() if k != "api_key")
+    return f"GET {urlsplit(url).path}?{urlencode(query)}"
+
+
+class BufferedResponse:
+    """The subset of the requests/httpx Response API the finder uses."""
+
+    __slots__ = ("status_code", "content", "headers")
+
+    def __init__(self, status_code: int, content: bytes, headers: Optional[Dict] = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Cassette:
+    """
+    Append-only store of recorded responses with a line-per-entry index.
+
+    A key recorded more than once replays its latest response. Cassettes
+    are shared per path within a process, see Cassette.open().
+    """
+
+    _open: Dict[str, "Cassette"] = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.index_path = Path(f"{path}.idx")
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Tuple[int, int, int, float]]] = None
+        self._order: List[str] = []
+        self._bodies = None
+        self._index = None
+        self._map: Optional[mmap.mmap] = None
+
+    @classmethod
+    def open(cls, path: str) -> "Cassette":
+        path = os.path.abspath(path)
+        with cls._open_lock:
+            if path not in cls._open:
+                cls._open[path] = cls(path)
+            return cls._open[path]
+
+    def _load(self) -> Dict[str, Tuple[int, int, int, float]]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    entries, order = {}, []
+                    if self.index_path.exists():
+                        with open(self.index_path, "r", encoding="utf-8") as f:
+                            for line in f:
+                                if not line.strip():
+                                    continue
+                                key, offset, length, status, latency_ms = json.loads(line)
+                                entries[key] = (offset, length, status, latency_ms)
+                                order.append(key)
+                    self._order = order
+                    self._entries = entries
+        return self._entries
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def keys(self) -> List[str]:
+        """Recorded keys in recording order, repeats included (the traffic mix)."""
+        self._load()
+        return list(self._order)
+
+    def record(self, key: str, status: int, body: bytes, latency_ms: float) -> None:
+        entries = self._load()
+        with self._lock:
+            if self._bodies is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._bodies = open(self.path, "ab")
+                self._index = open(self.index_path, "a", encoding="utf-8")
+            offset = self._bodies.seek(0, os.SEEK_END)
+            self._bodies.write(body)
+            self._bodies.flush()
+            entry = (offset, len(body), status, round(latency_ms, 1))
+            self._index.write(json.dumps([key, *entry]) + "\n")
+            self._index.flush()
+            entries[key] = entry
+            self._order.append(key)
+            self._map = None
+
+    def lookup(self, key: str) -> Optional[Tuple[int, bytes, float]]:
+        """Return (status, body, latency_ms) recorded for key, or None."""
+        entry = self._load().get(key)
+        if entry is None:
+            return None
+        offset, length, status, latency_ms = entry
+        if length == 0:
+            return status, b"", latency_ms
+        body_map = self._map
+        if body_map is None:
+            with self._lock:
+                if self._map is None:
+                    with open(self.path, "rb") as f:
+                        self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                body_map = self._map
+        return status, body_map[offset : offset + length], latency_ms
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._bodies, self._index):
+                if f is not None:
+                    f.close()
+            self._bodies = self._index = self._map = None
+
+
+class RequestsTransport:
+    """Live blocking HTTP on a shared requests.Session."""
+
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> "requests.Session":
+        if self._session is None:
+            import requests
+
+            with self._lock:
+                if self._session is None:
+                    self._session = requests.Session()
+        return self._session
+
+    def get(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ) -> "requests.Response":
+        return self.session.get(url, params=params, timeout=timeout, headers=headers)
+
+
+class HttpxTransport:
+    """Live asyncio HTTP on a pooled httpx.AsyncClient."""
+
+    def __init__(self, max_connections: int = 256, timeout: float = 10.0):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aget(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ) -> "httpx.Response":
+        return await self.client.get(url, params=params, timeout=timeout, headers=headers)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class RecordingTransport:
+    """
+    Pass requests to a live transport and save each response to a cassette.
+
+    304 answers to conditional requests are not saved: cassette keys ignore
+    headers, so the latest full response stays the one replayed.
+    """
+
+    def __init__(self, live, cassette: Cassette):
+        self.live = live
+        self.cassette = cassette
+
+    def get(self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None):
+        start = time.monotonic()
+        response = self.live.get(url, params, timeout, headers)
+        self._save(url, params, response, start)
+        return response
+
+    async def aget(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ):
+        start = time.monotonic()
+        response = await self.live.aget(url, params, timeout, headers)
+        self._save(url, params, response, start)
+        return response
+
+    def _save(self, url: str, params: Optional[Dict], response, start: float) -> None:
+        if response.status_code == 304:
+            return
+        self.cassette.record(
+            request_key(url, params),
+            response.status_code,
+            response.content,
+            (time.monotonic() - start) * 1000,
+        )
+
+    async def aclose(self) -> None:
+        if hasattr(self.live, "aclose"):
+            await self.live.aclose()
+
+
+class CatalogTransport:
+    """
+    Answer TMDB requests from a synthetic catalog (see catalog.py).
+
+    Args:
+        path: Catalog file written by scripts/generate_catalog.py
+    """
+
+    def __init__(self, path: str):
+        from catalog import Catalog
+
+        self.catalog = Catalog(path)
+
+    def get(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ) -> BufferedResponse:
+        from catalog import tmdb_response
+
+        path = urlsplit(url).path
+        path = path[path.find("/", 1) :] if path.startswith("/3/") else path
+        params = {k: v for k, v in (params or {}).items() if k != "api_key"}
+        body = tmdb_response(self.catalog, path, params)
+        if body is None:
+            return BufferedResponse(404, b'{"status_code": 34, "success": false}')
+        return BufferedResponse(200, json.dumps(body).encode())
+
+    async def aget(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ) -> BufferedResponse:
+        return self.get(url, params, timeout)
+
+
+class ReplayTransport:
+    """
+    Serve responses from a cassette without touching the network.
+    Conditional request headers are ignored: the full response is replayed.
+
+    Args:
+        cassette: Recorded responses
+        latency: None for no delay, "recorded" to sleep for each response's
+            recorded latency, or a fixed delay in milliseconds
+    """
+
+    def __init__(self, cassette: Cassette, latency=None):
+        self.cassette = cassette
+        self.latency = latency
+        self.misses = 0
+
+    def _lookup(self, url: str, params: Optional[Dict]) -> Tuple[BufferedResponse, float]:
+        key = request_key(url, params)
+        recorded = self.cassette.lookup(key)
+        if recorded is None:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded response for {key}")
+        status, body, latency_ms = recorded
+        if self.latency is None:
+            delay = 0.0
+        elif self.latency == "recorded":
+            delay = latency_ms / 1000
+        else:
+            delay = float(self.latency) / 1000
+        return BufferedResponse(status, body), delay
+
+    def get(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ) -> BufferedResponse:
+        response, delay = self._lookup(url, params)
+        if delay:
+            time.sleep(min(delay, timeout))
+        return response
+
+    async def aget(
+        self, url: str, params: Optional[Dict], timeout: float, headers: Optional[Dict] = None
+    ) -> BufferedResponse:
+        response, delay = self._lookup(url, params)
+        if delay:
+            import asyncio
+
+            await asyncio.sleep(min(delay, timeout))
+        return response
+
+
+def build_transport(live):
+    """
+    Wrap a live transport according to TMDB_TRANSPORT (see module docstring).
+
+    Args:
+        live: RequestsTransport or HttpxTransport used for live and record modes
+    """
+    mode = os.getenv("TMDB_TRANSPORT", "live").lower()
+    if mode not in TRANSPORT_MODES:
+        raise ValueError(f"TMDB_TRANSPORT must be one of {', '.join(TRANSPORT_MODES)}")
+    if mode == "live":
+        return live
+    cassette = Cassette.open(os.getenv("TMDB_CASSETTE", DEFAULT_CASSETTE))
+    if mode == "record":
+        return RecordingTransport(live, cassette)
+    latency = os.getenv("TMDB_REPLAY_LATENCY") or None
+    if latency is not None and latency != "recorded" and float(latency) == 0:
+        latency = None
+    return ReplayTransport(cassette, latency)
@@ -0,0 +1,216 @@
+"""
+Cache warm-up for new server instances.
+
+After a deploy, the first users of each instance would all wait on TMDB
+for the same popular titles. Warm-up fetches watch/providers and details
+for a seed list of titles in the background as soon as the server
+starts, so those requests find them cached:
+
+    WARMUP_SEED=trending            # this week's trending titles
+    WARMUP_SEED=seed.txt            # one title per line: "movie 27205", "tv/1399",
+                                    # or a scripts/generate_catalog.py .idx line
+    WARMUP_LIMIT=200                # most titles to warm
+    WARMUP_WORKERS=4                # titles warmed at a time
+
+Without WARMUP_SEED there is no warm-up. It never delays startup: the
+servers start it on a daemon thread (a task on the event loop for the
+ASGI app) and serve requests meanwhile. Each title is fetched under the
+usual request deadline, and progress is reported in /api/health.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from jsonlog import get_logger
+from upstream import REQUEST_BUDGET, deadline
+
+log = get_logger("warmup")
+
+TRENDING_SEED = "trending"
+WARMUP_LIMIT = 200
+WARMUP_WORKERS = 4
+
+
+def parse_title(line: str, default_type: str = "movie") -> Optional[Tuple[str, int]]:
+    """
+    (media_type, id) from a seed line, None for blank and # lines.
+
+    Raises:
+        ValueError: For a line that names no movie or TV title
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("["):
+        media_type, title_id = json.loads(line)[:2]
+    else:
+        parts = line.replace("/", " ").replace(",", " ").split()
+        if len(parts) not in (1, 2):
+            raise ValueError(f"Invalid title {line!r}")
+        media_type, title_id = parts if len(parts) == 2 else (default_type, parts[0])
+    if media_type not in ("movie", "tv"):
+        raise ValueError(f"Invalid media type {media_type!r}")
+    return media_type, int(title_id)
+
+
+class Warmup:
+    """
+    One warm-up run and its progress.
+
+    Args:
+        seed: TRENDING_SEED, a seed file path, or "" for no warm-up;
+            WARMUP_SEED by default
+        limit: Most titles to warm; WARMUP_LIMIT by default
+        workers: Titles warmed concurrently; WARMUP_WORKERS by default
+    """
+
+    def __init__(
+        self,
+        seed: Optional[str] = None,
+        limit: Optional[int] = None,
+        workers: Optional[int] = None,
+    ):
+        self.seed = os.getenv("WARMUP_SEED", "") if seed is None else seed
+        self.limit = int(os.getenv("WARMUP_LIMIT", WARMUP_LIMIT)) if limit is None else limit
+        self.workers = (
+            int(os.getenv("WARMUP_WORKERS", WARMUP_WORKERS)) if workers is None else workers
+        )
+        self.status = "pending" if self.seed else "off"
+        self.error: Optional[str] = None
+        self.total = 0
+        self.warmed = 0
+        self.failed = 0
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._task = None
+        self._lock = threading.Lock()
+
+    def _begin(self) -> bool:
+        with self._lock:
+            if self.status != "pending":
+                return False
+            self.status = "running"
+            self._started = time.monotonic()
+            return True
+
+    def start(self, finder) -> None:
+        """Warm a NetflixTitleFinder's caches on a daemon thread."""
+        if self._begin():
+            threading.Thread(target=self._run, args=(finder,), name="warmup", daemon=True).start()
+
+    def start_async(self, finder) -> None:
+        """Warm an AsyncNetflixTitleFinder's caches in a task on the running loop."""
+        if self._begin():
+            import asyncio
+
+            self._task = asyncio.get_running_loop().create_task(self._run_async(finder))
+
+    def cancel(self) -> None:
+        """Stop an async warm-up, e.g. at shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+
+    def _titles(self, trending: Optional[Dict] = None) -> List[Tuple[str, int]]:
+        if self.seed == TRENDING_SEED:
+            titles: Iterable = ((t["type"], t["id"]) for t in (trending or {}).get("data", []))
+            return list(itertools.islice(titles, self.limit))
+        titles = []
+        with open(self.seed, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    title = parse_title(line)
+                except (ValueError, IndexError) as e:
+                    log.warning("warmup_seed_invalid", line=line_no, error=str(e))
+                    continue
+                if title is not None:
+                    titles.append(title)
+                    if len(titles) >= self.limit:
+                        break
+        return titles
+
+    def _seeded(self, titles: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        self.total = len(titles)
+        log.info("warmup_started", seed=self.seed, titles=self.total, workers=self.workers)
+        return titles
+
+    def _count(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.warmed += 1
+            else:
+                self.failed += 1
+
+    def _finish(self, error: Optional[Exception] = None) -> None:
+        self._finished = time.monotonic()
+        self.status = "failed" if error is not None else "done"
+        if error is not None:
+            self.error = str(error)
+            log.warning("warmup_failed", seed=self.seed, error=self.error)
+        else:
+            log.info("warmup_done", **self.snapshot())
+
+    @staticmethod
+    def _warm(finder, media_type: str, title_id: int) -> bool:
+        with deadline(REQUEST_BUDGET):
+            countries = finder.get_countries(title_id, media_type)
+            details = finder.get_title_details(title_id, media_type)
+        return bool(countries["success"] and details["success"])
+
+    def _run(self, finder) -> None:
+        try:
+            trending = finder.get_trending() if self.seed == TRENDING_SEED else None
+            titles = self._seeded(self._titles(trending))
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="warmup") as pool:
+                for ok in pool.map(lambda title: self._warm(finder, *title), titles):
+                    self._count(ok)
+        except Exception as e:
+            self._finish(e)
+        else:
+            self._finish()
+
+    async def _run_async(self, finder) -> None:
+        import asyncio
+
+        slots = asyncio.Semaphore(self.workers)
+
+        async def warm(media_type: str, title_id: int) -> None:
+            async with slots:
+                with deadline(REQUEST_BUDGET):
+                    countries = await finder.get_countries(title_id, media_type)
+                    details = await finder.get_title_details(title_id, media_type)
+            self._count(bool(countries["success"] and details["success"]))
+
+        try:
+            trending = await finder.get_trending() if self.seed == TRENDING_SEED else None
+            titles = self._seeded(self._titles(trending))
+            await asyncio.gather(*(warm(*title) for title in titles))
+        except asyncio.CancelledError:
+            self._finish(RuntimeError("cancelled"))
+            raise
+        except Exception as e:
+            self._finish(e)
+        else:
+            self._finish()
+
+    def snapshot(self) -> Dict:
+        """Progress for /api/health."""
+        stats = {"status": self.status}
+        if self.status == "off":
+            return stats
+        end = self._finished or time.monotonic()
+        stats.update(
+            seed=self.seed,
+            titles=self.total,
+            warmed=self.warmed,
+            failed=self.failed,
+            elapsed_s=round(end - self._started, 1) if self._started else 0.0,
+        )
+        if self.error:
+            stats["error"] = self.error
+        return stats
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: one dispatcher function vs one function per endpoint.
+
+Each run starts fresh Python processes, the way Vercel starts cold
+instances. In the "dispatcher" layout a single process imports
+api/index.py and serves one request to every endpoint. In the
+"per-endpoint" layout every endpoint gets its own process running that
+endpoint's handler from scripts/cold_start_endpoints/, which, like the old
+api/<endpoint>.py files, imports only what the endpoint uses. The import
+and NetflixTitleFinder construction are then paid once per endpoint.
+
+Without TMDB_API_KEY the finder answers from sample data, so no network is
+needed. To include upstream calls, point it at scripts/tmdb_stub.py:
+
+    TMDB_API_KEY=stub TMDB_BASE_URL=http://127.0.0.1:8765/3 \\
+        python scripts/bench_cold_start.py --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+API_DIR = SCRIPTS_DIR.parent / "api"
+ENDPOINTS_DIR = SCRIPTS_DIR / "cold_start_endpoints"
+
+# (method, path, JSON body, per-endpoint handler module)
+ENDPOINTS = [
+    ("GET", "/api/health", None, "health"),
+    ("POST", "/api/search", {"query": "inception"}, "search"),
+    ("GET", "/api/trending", None, "trending"),
+    ("GET", "/api/countries/27205/movie", None, "countries"),
+    ("GET", "/api/providers/27205/movie", None, "providers"),
+    ("GET", "/api/details/27205/movie", None, "details"),
+]
+
+# Runs inside the child process: import the function, serve the given
+# requests over a real socket, report timings as JSON on stdout
+CHILD = r"""
+import importlib, io, json, sys, threading, time, urllib.request
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import contextlib
+with contextlib.redirect_stdout(io.StringIO()):
+    function = importlib.import_module(sys.argv[2])
+imported = time.perf_counter()
+from http.server import ThreadingHTTPServer
+server = ThreadingHTTPServer(("127.0.0.1", 0), function.handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base = f"http://127.0.0.1:{server.server_address[1]}"
+for method, path, body, _ in json.loads(sys.argv[3]):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    with contextlib.redirect_stdout(io.StringIO()):
+        urllib.request.urlopen(request).read()
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "total_ms": (done - start) * 1000}))
+"""
+
+
+def run_process(directory: Path, module: str, endpoints) -> dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(directory), module, json.dumps(endpoints)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["wall_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def measure(runs: int) -> dict:
+    layouts = {"dispatcher": [], "per-endpoint": []}
+    for _ in range(runs):
+        layouts["dispatcher"].append(run_process(API_DIR, "index", ENDPOINTS)["wall_ms"])
+        layouts["per-endpoint"].append(
+            sum(
+                run_process(ENDPOINTS_DIR, endpoint[3], [endpoint])["wall_ms"]
+                for endpoint in ENDPOINTS
+            )
+        )
+    return layouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = measure(args.runs)
+    print(f"Cold start for {len(ENDPOINTS)} endpoints, {args.runs} runs (wall ms)")
+    for layout, samples in results.items():
+        print(
+            f"  {layout:<13} median {statistics.median(samples):8.1f}"
+            f"  min {min(samples):8.1f}  max {max(samples):8.1f}"
+        )
+    ratio = statistics.median(results["per-endpoint"]) / statistics.median(results["dispatcher"])
+    print(f"  per-endpoint layout is {ratio:.1f}x slower to bring every route up")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Memory held by cached TMDB data: raw parsed JSON vs the finder's records.
+
+Builds TMDB-shaped search, watch/providers and details bodies with the
+stub's generators (scripts/tmdb_stub.py), then measures with tracemalloc
+what stays allocated when they are kept the way the finder used to cache
+them (json.loads dicts) and the way it does now (records.py objects):
+
+    python scripts/bench_memory.py --titles 5000
+
+Stub bodies are smaller than real TMDB ones (10 cast members and no crew
+in details, 12 countries in providers), so real savings are larger.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR.parent / "src"))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def retained(build):
+    """Bytes still allocated after build() returns, with its result alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cached TMDB data sizes")
+    parser.add_argument("--titles", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("TMDB_API_KEY", "bench")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    # Keep these titles out of the rankings snapshot servers load (see rankings.py)
+    os.environ.setdefault("RANKINGS_SNAPSHOT", "")
+    from tmdb_stub import _details, _providers, _title
+    from netflix_finder import NetflixTitleFinder
+
+    finder = NetflixTitleFinder()
+    ids = range(1, args.titles + 1)
+    media = ["movie" if i % 2 else "tv" for i in ids]
+    # Serialized once up front, so both sides parse the same bytes
+    bodies = {
+        "search": [json.dumps(_title(i, m)) for i, m in zip(ids, media)],
+        "providers": [json.dumps(_providers(i)) for i in ids],
+        "details": [json.dumps(_details(i, m)) for i, m in zip(ids, media)],
+    }
+
+    def search_raw():
+        results = [json.loads(b) for b in bodies["search"]]
+        for r in results:
+            r["poster_url"] = finder._get_poster_url(r.get("poster_path"))
+        return results
+
+    records = {
+        "search": lambda: [finder._title(json.loads(b)) for b in bodies["search"]],
+        "providers": lambda: [
+            finder._parse(("providers", m, i), json.loads(b))
+            for i, m, b in zip(ids, media, bodies["providers"])
+        ],
+        "details": lambda: [
+            finder._parse(("details", m, i), json.loads(b))
+            for i, m, b in zip(ids, media, bodies["details"])
+        ],
+    }
+    raw = {
+        "search": search_raw,
+        "providers": lambda: [json.loads(b) for b in bodies["providers"]],
+        "details": lambda: [json.loads(b) for b in bodies["details"]],
+    }
+
+    print(f"{args.titles:,} titles, bytes retained per cached entry")
+    print(f"  {'kind':<10} {'raw json':>10} {'records':>10} {'saved':>7}")
+    for kind in ("search", "providers", "details"):
+        raw_size = retained(raw[kind]) / args.titles
+        record_size = retained(records[kind]) / args.titles
+        saved = 1 - record_size / raw_size
+        print(f"  {kind:<10} {raw_size:>10,.0f} {record_size:>10,.0f} {saved:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
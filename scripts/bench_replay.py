@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded traffic mix through NetflixTitleFinder with no network.
+
+Record a cassette by running the API (or any finder workload) with
+TMDB_TRANSPORT=record, against TMDB or scripts/tmdb_stub.py:
+
+    TMDB_TRANSPORT=record TMDB_CASSETTE=traffic.cassette npm run api
+
+then replay the same mix of search_titles / get_countries /
+get_all_providers / get_title_details / get_trending calls:
+
+    python scripts/bench_replay.py traffic.cassette --runs 5 --threads 8
+    python scripts/bench_replay.py traffic.cassette --latency recorded
+
+Every run starts with a fresh finder (cold caches), so each recorded
+request is replayed once per call that needs it.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+_TITLE_PATH = re.compile(r"/(movie|tv)/(\d+)(/watch/providers)?$")
+
+
+def finder_calls(keys):
+    """Turn cassette keys into (method name, args) finder calls."""
+    calls = []
+    for key in keys:
+        path, _, query = key.removeprefix("GET ").partition("?")
+        if path.endswith("/search/multi"):
+            calls.append(("search_titles", (parse_qs(query)["query"][0],)))
+        elif "/trending/" in path:
+            calls.append(("get_trending", ()))
+        else:
+            match = _TITLE_PATH.search(path)
+            if not match:
+                continue
+            media_type, title_id, providers = match.groups()
+            if providers:
+                calls.append(("get_countries", (int(title_id), media_type)))
+                calls.append(("get_all_providers", (int(title_id), media_type)))
+            else:
+                calls.append(("get_title_details", (int(title_id), media_type)))
+    return calls
+
+
+def run_once(calls, threads: int) -> float:
+    from netflix_finder import NetflixTitleFinder
+
+    finder = NetflixTitleFinder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(getattr(finder, name), *args) for name, args in calls]:
+            future.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a cassette through the finder")
+    parser.add_argument("cassette")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument(
+        "--latency", default="0", help="'recorded', or a fixed delay per response in ms"
+    )
+    args = parser.parse_args()
+
+    os.environ["TMDB_TRANSPORT"] = "replay"
+    os.environ["TMDB_CASSETTE"] = args.cassette
+    os.environ["TMDB_REPLAY_LATENCY"] = args.latency
+    os.environ.setdefault("TMDB_API_KEY", "replay")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    # Keep these titles out of the rankings snapshot servers load (see rankings.py)
+    os.environ.setdefault("RANKINGS_SNAPSHOT", "")
+    sys.path.insert(0, str(SRC_DIR))
+    from transport import Cassette
+
+    cassette = Cassette.open(args.cassette)
+    keys = cassette.keys()
+    calls = finder_calls(keys)
+    print(f"{len(keys)} recorded requests ({len(cassette)} unique) -> {len(calls)} finder calls")
+
+    # Raw lookup cost, to show what replay adds on top of the finder's own work
+    start = time.perf_counter()
+    for key in keys:
+        cassette.lookup(key)
+    lookup_us = (time.perf_counter() - start) / max(1, len(keys)) * 1e6
+    print(f"  cassette lookup: {lookup_us:.1f} us/request")
+
+    samples = [run_once(calls, args.threads) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(
+        f"  replay: median {median * 1000:.1f} ms, "
+        f"{len(calls) / median:,.0f} calls/s over {args.runs} runs, {args.threads} thread(s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
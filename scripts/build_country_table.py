@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Generate countries_table.py from countries.json.
+
+The finder imports the generated module instead of parsing JSON on every
+cold start; Python caches its bytecode, so loading the table is a single
+unmarshal. Run after editing countries.json:
+
+    python scripts/build_country_table.py          # regenerate
+    python scripts/build_country_table.py --check  # fail if out of date
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE = ROOT / "src" / "countries.json"
+TARGETS = [ROOT / "src" / "countries_table.py", ROOT / "api" / "countries_table.py"]
+
+HEADER = '''"""
+ISO 3166-1 alpha-2 code -> country name.
+
+Generated from countries.json by scripts/build_country_table.py; do not edit.
+"""
+
+'''
+
+
+def render(countries: dict) -> str:
+    lines = [f"    {code!r}: {name!r},\n" for code, name in countries.items()]
+    return HEADER + "COUNTRIES = {\n" + "".join(lines) + "}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build countries_table.py")
+    parser.add_argument(
+        "--check", action="store_true", help="Exit 1 if a generated file is stale"
+    )
+    args = parser.parse_args()
+
+    with open(SOURCE, "r", encoding="utf-8") as f:
+        content = render(json.load(f))
+
+    stale = []
+    for target in TARGETS:
+        current = target.read_text(encoding="utf-8") if target.exists() else None
+        if current == content:
+            continue
+        stale.append(target)
+        if not args.check:
+            target.write_text(content, encoding="utf-8")
+
+    if args.check and stale:
+        print("Out of date: " + ", ".join(str(t.relative_to(ROOT)) for t in stale))
+        sys.exit(1)
+    if not args.check:
+        print(f"Wrote {len(stale)} file(s)")
+
+
+if __name__ == "__main__":
+    main()
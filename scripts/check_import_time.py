@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Import-time regression check for the serverless entry point.
+
+Imports api/index.py in fresh interpreters under `python -X importtime`
+and fails (exit 1) when:
+  - the best cumulative import time of `index` exceeds the budget, or
+  - a module that must stay lazy (requests, dotenv, Pillow, brotli, ...)
+    is imported at startup.
+
+    python scripts/check_import_time.py               # default budget
+    python scripts/check_import_time.py --budget-ms 80 --runs 7
+
+tests/test_import_time.py runs the same checks under pytest.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+# Cumulative import time allowed for `import index`, in milliseconds
+STARTUP_BUDGET_MS = 75
+
+# Modules only needed once a request actually calls TMDB or resizes an image
+LAZY_MODULES = ("requests", "urllib3", "dotenv", "PIL", "brotli", "concurrent.futures")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def import_profile():
+    """Return [(module, self_us, cumulative_us, depth)] for one fresh import."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import index"],
+        cwd=API_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            profile.append((module, int(self_us), int(cumulative_us), len(indent)))
+    return profile
+
+
+def index_ms(profile) -> float:
+    """Cumulative import time of `index` in a profile, in milliseconds."""
+    return next(c for m, _, c, _ in profile if m == "index") / 1000
+
+
+def eager_modules(profile):
+    """LAZY_MODULES (or their submodules) a profile shows imported at startup."""
+    return sorted(
+        {m for m, _, _, _ in profile if m in LAZY_MODULES or m.split(".")[0] in LAZY_MODULES}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check api/index.py import time")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    best_ms, best_profile = None, None
+    for _ in range(args.runs):
+        profile = import_profile()
+        if best_ms is None or index_ms(profile) < best_ms:
+            best_ms, best_profile = index_ms(profile), profile
+
+    print(f"import index: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    # importtime lists a module's imports right before the module itself
+    end = next(i for i, p in enumerate(best_profile) if p[0] == "index")
+    start = end
+    while start > 0 and best_profile[start - 1][3] > best_profile[end][3]:
+        start -= 1
+    direct = [p for p in best_profile[start:end] if p[3] == best_profile[end][3] + 2]
+    print("Slowest direct imports of index:")
+    for module, _, cumulative, _ in sorted(direct, key=lambda p: -p[2])[:8]:
+        print(f"  {cumulative / 1000:7.1f} ms  {module}")
+
+    failures = []
+    eager = eager_modules(best_profile)
+    if eager:
+        failures.append("imported at startup but should be lazy: " + ", ".join(eager))
+    if best_ms > args.budget_ms:
+        failures.append(f"import time {best_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Shared plumbing of the per-endpoint handlers (stdlib only, like each of
+the old api/<endpoint>.py files had inline).
+"""
+
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+# The handlers import the shared modules from api/, as the old files did
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "api"))
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def parse(self):
+        """Path segments after /api/<endpoint> and the query parameters."""
+        url = urlsplit(self.path)
+        self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        return url.path.strip("/").split("/")[2:]
+
+    def send_json(self, status, payload):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
@@ -0,0 +1,27 @@
+from _base import JsonHandler
+
+from netflix_finder import NetflixTitleFinder, country_format, offer_filters
+from admission import AdmissionController
+from upstream import REQUEST_BUDGET, deadline
+from responses import ResponseCache, write_json
+
+finder = NetflixTitleFinder()
+admission = AdmissionController()
+response_cache = ResponseCache()
+
+
+class handler(JsonHandler):
+    def do_GET(self):
+        title_id, media_type = self.parse()
+        title_id = int(title_id)
+        provider, offer = offer_filters(self.query)
+        fmt = country_format(self.query)
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "availability", finder.is_cached("providers", media_type, title_id)
+        ):
+            result = response_cache.get_or_encode(
+                ("countries", media_type, title_id, provider, offer, fmt),
+                lambda: finder.get_countries(title_id, media_type, provider, offer, fmt),
+                lambda: finder.cached_ttl("providers", media_type, title_id),
+            )
+        write_json(self, result, "countries")
@@ -0,0 +1,25 @@
+from _base import JsonHandler
+
+from netflix_finder import NetflixTitleFinder
+from admission import AdmissionController
+from upstream import REQUEST_BUDGET, deadline
+from responses import ResponseCache, write_json
+
+finder = NetflixTitleFinder()
+admission = AdmissionController()
+response_cache = ResponseCache()
+
+
+class handler(JsonHandler):
+    def do_GET(self):
+        title_id, media_type = self.parse()
+        title_id = int(title_id)
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "details", finder.is_cached("details", media_type, title_id)
+        ):
+            result = response_cache.get_or_encode(
+                ("details", media_type, title_id),
+                lambda: finder.get_title_details(title_id, media_type),
+                lambda: finder.cached_ttl("details", media_type, title_id),
+            )
+        write_json(self, result, "details")
@@ -0,0 +1,18 @@
+from _base import JsonHandler
+
+from netflix_finder import NetflixTitleFinder
+
+finder = NetflixTitleFinder()
+
+
+class handler(JsonHandler):
+    def do_GET(self):
+        self.send_json(
+            200,
+            {
+                "status": "ok",
+                "api_key_configured": finder.api_key_configured,
+            "data_source": finder.data_source,
+                "upstream": finder.upstream.snapshot(),
+            },
+        )
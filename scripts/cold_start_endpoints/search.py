@@ -0,0 +1,28 @@
+import json
+
+from _base import JsonHandler
+
+from netflix_finder import NetflixTitleFinder
+from admission import AdmissionController
+from upstream import REQUEST_BUDGET, deadline
+from responses import ResponseCache, write_json
+from cache import normalize_query
+
+finder = NetflixTitleFinder()
+admission = AdmissionController()
+response_cache = ResponseCache()
+
+
+class handler(JsonHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        query = (json.loads(body) if body else {}).get("query", "").strip()
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "search", finder.is_cached("search", query)
+        ):
+            response = response_cache.get_or_encode(
+                ("search", normalize_query(query)),
+                lambda: finder.display_results(finder.search_titles(query)),
+                lambda: finder.cached_ttl("search", query),
+            )
+        write_json(self, response)
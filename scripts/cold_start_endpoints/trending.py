@@ -0,0 +1,23 @@
+from _base import JsonHandler
+
+from netflix_finder import NetflixTitleFinder, trending_filters
+from admission import AdmissionController
+from upstream import REQUEST_BUDGET, deadline
+from responses import ResponseCache, write_json
+
+finder = NetflixTitleFinder()
+admission = AdmissionController()
+response_cache = ResponseCache()
+
+
+class handler(JsonHandler):
+    def do_GET(self):
+        self.parse()
+        country, provider, only_available, offer = trending_filters(self.query)
+        with deadline(REQUEST_BUDGET), admission.admit("trending", finder.is_cached("trending")):
+            result = response_cache.get_or_encode(
+                ("trending", country, provider, only_available, offer),
+                lambda: finder.get_trending(country, provider, only_available, offer),
+                lambda: finder.cached_ttl("trending", country),
+            )
+        write_json(self, result, "trending")
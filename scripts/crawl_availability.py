@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Crawl streaming availability for a list of titles into gzipped JSON lines.
+
+Reads one title per line ("movie 27205", "tv/1399", a bare id taken as
+--media-type, or a catalog .idx file from scripts/generate_catalog.py)
+and fetches each title's watch/providers through NetflixTitleFinder, with
+at most --workers requests in flight and no more than --rate per second.
+Output has one line per title, in input order:
+
+    {"type": "movie", "id": 27205, "status": 200, "providers": {"Netflix": ["GB", "US"]}}
+
+Missing titles get "status": 404; titles still failing after --retries
+get the last status (or null) and an "error".
+
+Output is appended in gzip members of up to --batch titles. After each
+one, <output>.checkpoint records how many input lines and output bytes
+are complete, so rerunning the same command after an interruption drops
+any partly written member and resumes from there (--restart starts over).
+
+Try it against the stub:
+
+    python scripts/generate_catalog.py --titles 20k --out /tmp/cat.jsonl
+    python scripts/tmdb_stub.py --catalog /tmp/cat.jsonl --port 8799 &
+    TMDB_API_KEY=stub TMDB_BASE_URL=http://127.0.0.1:8799/3 \\
+        python scripts/crawl_availability.py /tmp/cat.jsonl.idx -o /tmp/avail.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# TMDB statuses worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Window of the throughput shown in progress lines, in seconds
+RATE_WINDOW = 30.0
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def major_providers(offers, offer: str) -> Dict[str, List[str]]:
+    """Major provider name -> country codes with `offer` offers."""
+    from netflix_finder import MAJOR_PROVIDERS
+
+    providers: Dict[str, set] = {}
+    for provider_id, name in MAJOR_PROVIDERS.items():
+        codes = offers.countries(provider_id, offer)
+        if codes:
+            providers.setdefault(name, set()).update(codes)
+    return {name: sorted(codes) for name, codes in providers.items()}
+
+
+def crawl_title(finder, limiter: RateLimiter, title: Tuple[str, int], args) -> Dict:
+    media_type, title_id = title
+    record = {"type": media_type, "id": title_id}
+    status, error = None, None
+    for attempt in range(args.retries + 1):
+        if attempt:
+            time.sleep(args.backoff * 2 ** (attempt - 1))
+        limiter.wait()
+        try:
+            status, offers = finder.fetch_offers(media_type, title_id)
+            error = None
+        except Exception as e:
+            status, error = None, str(e)
+            continue
+        if status == 200:
+            return {**record, "status": 200, "providers": major_providers(offers, args.offer)}
+        if status == 404:
+            return {**record, "status": 404}
+        if status not in RETRY_STATUSES:
+            break
+    return {**record, "status": status, "error": error or f"HTTP {status}"}
+
+
+class Checkpoint:
+    """
+    Progress of a crawl: input lines done and output bytes written,
+    saved atomically next to the output.
+    """
+
+    def __init__(self, path: Path, input_path: str):
+        self.path = path
+        self.state = {
+            "input": input_path,
+            "done": 0,
+            "bytes": 0,
+            "counts": {"ok": 0, "missing": 0, "failed": 0, "skipped": 0},
+        }
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        state = json.loads(self.path.read_text())
+        if state["input"] != self.state["input"]:
+            sys.exit(f"{self.path} belongs to a crawl of {state['input']}; use --restart")
+        self.state = state
+        return True
+
+    def save(self) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state))
+        os.replace(tmp, self.path)
+
+
+class BatchWriter:
+    """Appends results as gzip members, checkpointing after each member."""
+
+    def __init__(self, path: Path, checkpoint: Checkpoint, flush_seconds: float):
+        self.checkpoint = checkpoint
+        self.flush_seconds = flush_seconds
+        # Anything past the checkpoint is a member cut short by an interruption
+        self.file = open(path, "r+b" if path.exists() else "wb")
+        self.file.truncate(checkpoint.state["bytes"])
+        self.file.seek(checkpoint.state["bytes"])
+        self.lines: List[str] = []
+        self.done = checkpoint.state["done"]
+        self.counts = dict(checkpoint.state["counts"])
+        self.flushed_at = time.monotonic()
+
+    def add(self, line_no: int, record: Optional[Dict]) -> None:
+        self.done = line_no
+        if record is None:
+            self.counts["skipped"] += 1
+            return
+        status = record["status"]
+        self.counts["ok" if status == 200 else "missing" if status == 404 else "failed"] += 1
+        self.lines.append(json.dumps(record, separators=(",", ":")))
+
+    def due(self, batch: int) -> bool:
+        return len(self.lines) >= batch or (
+            time.monotonic() - self.flushed_at >= self.flush_seconds
+        )
+
+    def flush(self) -> None:
+        if self.lines:
+            member = gzip.compress(("\n".join(self.lines) + "\n").encode(), compresslevel=6)
+            self.file.write(member)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.checkpoint.state["bytes"] += len(member)
+            self.lines = []
+        self.checkpoint.state["done"] = self.done
+        self.checkpoint.state["counts"] = dict(self.counts)
+        self.checkpoint.save()
+        self.flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+class Progress:
+    """Throughput over the last RATE_WINDOW seconds, printed every `every` seconds."""
+
+    def __init__(self, total: int, start_done: int, every: float):
+        self.total = total
+        self.every = every
+        self.started = time.monotonic()
+        self.start_done = start_done
+        self.samples = deque([(self.started, start_done)])
+        self.printed_at = self.started
+
+    def update(self, done: int, counts: Dict, force: bool = False) -> None:
+        now = time.monotonic()
+        self.samples.append((now, done))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= RATE_WINDOW:
+            self.samples.popleft()
+        if not force and now - self.printed_at < self.every:
+            return
+        self.printed_at = now
+        then, done_then = self.samples[0]
+        rate = (done - done_then) / (now - then) if now > then else 0.0
+        overall = (done - self.start_done) / max(1e-9, now - self.started)
+        eta = f"{(self.total - done) / rate / 60:.1f} min" if rate else "-"
+        print(
+            f"  {done:,}/{self.total:,} ({done / max(1, self.total):.1%})  "
+            f"{rate:.1f}/s (last {RATE_WINDOW:.0f}s), {overall:.1f}/s overall  "
+            f"ok {counts['ok']:,} missing {counts['missing']:,} failed {counts['failed']:,}  "
+            f"ETA {eta}",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def _finished(future) -> bool:
+    return future is None or (future.done() and not future.cancelled())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl title availability to gzipped JSONL")
+    parser.add_argument("ids", help="File with one title per line")
+    parser.add_argument("-o", "--output", required=True, help="Output .jsonl.gz path")
+    parser.add_argument("--media-type", default="movie", help="Type of bare ids")
+    parser.add_argument("--offer", default="flatrate", help="Offer type to report")
+    parser.add_argument("--workers", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--rate", type=float, default=40.0, help="Max TMDB requests/s")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=1.0, help="First retry delay (s)")
+    parser.add_argument("--batch", type=int, default=1000, help="Titles per gzip member")
+    parser.add_argument("--flush-seconds", type=float, default=30.0)
+    parser.add_argument("--report", type=float, default=5.0, help="Seconds between reports")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    # Keep these titles out of the rankings snapshot servers load (see rankings.py)
+    os.environ.setdefault("RANKINGS_SNAPSHOT", "")
+    sys.path.insert(0, str(SRC_DIR))
+    from netflix_finder import NetflixTitleFinder
+    from records import OFFER_TYPES
+    from warmup import parse_title
+
+    if args.offer not in OFFER_TYPES:
+        parser.error(f"--offer must be one of: {', '.join(OFFER_TYPES)}")
+
+    output = Path(args.output)
+    checkpoint_path = output.with_name(output.name + ".checkpoint")
+    checkpoint = Checkpoint(checkpoint_path, os.path.abspath(args.ids))
+    if args.restart:
+        output.unlink(missing_ok=True)
+        checkpoint_path.unlink(missing_ok=True)
+    elif not checkpoint.load() and output.exists():
+        sys.exit(f"{output} exists without a checkpoint; use --restart to overwrite it")
+
+    with open(args.ids, "r", encoding="utf-8") as f:
+        total = sum(1 for _ in f)
+    done = checkpoint.state["done"]
+    if done:
+        print(f"Resuming after line {done:,} of {total:,}", file=sys.stderr)
+
+    finder = NetflixTitleFinder()
+    limiter = RateLimiter(args.rate)
+    writer = BatchWriter(output, checkpoint, args.flush_seconds)
+    progress = Progress(total, done, args.report)
+    pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="crawl")
+    # (line number, future or None) in input order; results are written in
+    # that order so the checkpoint is a single line number
+    window: deque = deque()
+
+    def write_head() -> None:
+        line_no, future = window.popleft()
+        writer.add(line_no, future.result() if future is not None else None)
+        if writer.due(args.batch):
+            writer.flush()
+        progress.update(writer.done, writer.counts)
+
+    # Stop between titles on Ctrl-C or SIGTERM, so no result is half written
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    with open(args.ids, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if stop.is_set():
+                break
+            if line_no <= done:
+                continue
+            try:
+                title = parse_title(line, args.media_type)
+            except (ValueError, IndexError) as e:
+                print(f"  line {line_no}: {e}", file=sys.stderr)
+                title = None
+            future = pool.submit(crawl_title, finder, limiter, title, args) if title else None
+            window.append((line_no, future))
+            while window and (len(window) >= args.workers * 4 or window[0][1] is None):
+                write_head()
+                if stop.is_set():
+                    break
+    if stop.is_set():
+        pool.shutdown(wait=False, cancel_futures=True)
+        # Keep finished results at the head; the rest is fetched again on resume
+        while window and _finished(window[0][1]):
+            write_head()
+        writer.close()
+        print(f"\nInterrupted after line {writer.done:,}; rerun to resume", file=sys.stderr)
+        sys.exit(130)
+    while window:
+        write_head()
+    pool.shutdown()
+    writer.close()
+    progress.update(writer.done, writer.counts, force=True)
+    elapsed = time.monotonic() - progress.started
+    print(
+        f"Done: {writer.done - done:,} lines in {elapsed:.1f}s -> {output} "
+        f"({checkpoint.state['bytes']:,} bytes)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
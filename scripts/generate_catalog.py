@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic title catalog for offline runs and scale tests.
+
+Titles get streaming availability over the country codes in
+src/countries.json and the MAJOR_PROVIDERS ids. Each provider has a
+regional footprint, a share of the catalog and a share of originals
+available across the whole footprint. Licensed titles cover a subset that
+favours large markets, and more popular titles are on more services.
+Output is deterministic for a given --seed.
+
+    python scripts/generate_catalog.py --titles 100k --out catalog.jsonl
+    python scripts/generate_catalog.py --titles 2M --out /tmp/big.jsonl --seed 7
+
+Load the result in the finder's sample mode (no TMDB_API_KEY):
+
+    SAMPLE_CATALOG=catalog.jsonl python src/api_server.py
+
+or serve it over HTTP as a fake TMDB:
+
+    python scripts/tmdb_stub.py --catalog catalog.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from netflix_finder import MAJOR_PROVIDERS  # noqa: E402
+
+with open(ROOT / "src" / "countries.json", "r", encoding="utf-8") as _f:
+    COUNTRIES = sorted(json.load(_f))
+
+# Countries no major service operates in, and territories without a
+# streaming market of their own
+UNSERVED = {"CN", "KP", "IR", "SY", "CU", "RU", "BY"}
+TERRITORIES = set(
+    "AN AQ AS AX BV CC CK CX EH FK FO GF GG GI GL GP GS GU HM IM IO JE KI MH MP MQ MS NC "
+    "NF NR NU PM PN PW RE SH SJ TF TK TV UM VA VG VI WF YT".split()
+)
+GLOBAL = [c for c in COUNTRIES if c not in UNSERVED | TERRITORIES]
+
+LATAM = "MX BR AR CO CL PE EC VE UY PY BO CR PA GT HN SV NI DO".split()
+EUROPE = (
+    "GB IE FR DE AT CH IT ES PT NL BE LU SE NO DK FI IS PL HU CZ SK RO BG GR HR SI "
+    "RS EE LV LT"
+).split()
+ASIA_PACIFIC = "JP KR TW HK SG MY TH ID PH IN AU NZ".split()
+
+# Licensing deals favour big markets
+MARKET_WEIGHTS = {
+    "US": 10, "GB": 6, "CA": 5, "DE": 5, "FR": 5, "JP": 4, "AU": 4, "BR": 4, "MX": 4,
+    "IT": 4, "ES": 4, "IN": 4, "KR": 3, "NL": 3, "SE": 2, "PL": 2, "AR": 2, "TR": 2,
+}
+
+
+def _region(*groups):
+    codes = set()
+    for group in groups:
+        codes.update(group)
+    return [c for c in COUNTRIES if c in codes]
+
+
+# Provider id -> (footprint, share of movies, share of TV, share of originals).
+# Amazon lists as 9 in its launch markets and 119 elsewhere; Max as 1899,
+# and 384 where it still runs as HBO Max.
+AMAZON_9 = {"US", "GB", "DE", "AT", "JP"}
+PROVIDER_PROFILES = {
+    8: (GLOBAL, 0.28, 0.30, 0.12),
+    9: (GLOBAL, 0.30, 0.22, 0.06),
+    337: (
+        _region(["US", "CA", "TR", "IL", "ZA"], LATAM, EUROPE, ASIA_PACIFIC),
+        0.08, 0.08, 0.5,
+    ),
+    15: (_region(["US", "JP"]), 0.10, 0.14, 0.0),
+    1899: (_region(["US"], LATAM, EUROPE[2:]), 0.09, 0.10, 0.3),
+    350: (GLOBAL, 0.02, 0.03, 1.0),
+    386: (_region(["US"]), 0.06, 0.06, 0.0),
+    531: (
+        _region("US CA AU GB IE FR DE AT CH IT KR".split(), LATAM),
+        0.07, 0.07, 0.3,
+    ),
+    283: ([c for c in GLOBAL if c not in ("JP", "KR", "VN")], 0.01, 0.06, 0.4),
+}
+
+# Transactional stores, for rent/buy offers on movies
+STORES = {2: "Apple TV", 3: "Google Play Movies"}
+STORE_MARKETS = _region(
+    "US CA TR IL ZA EG AE SA".split(), LATAM, EUROPE, ASIA_PACIFIC
+)
+
+GENRES = {
+    28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy", 80: "Crime",
+    99: "Documentary", 18: "Drama", 10751: "Family", 14: "Fantasy", 36: "History",
+    27: "Horror", 10402: "Music", 9648: "Mystery", 10749: "Romance",
+    878: "Science Fiction", 53: "Thriller", 10752: "War", 37: "Western",
+}
+
+ADJECTIVES = (
+    "Silent Hidden Last Broken Golden Crimson Endless Frozen Lost Midnight Burning "
+    "Distant Secret Wild Hollow Electric Savage Quiet Northern Forgotten Dark Bright "
+    "Iron Paper Glass Velvet Little Final Seventh Falling"
+).split()
+NOUNS = (
+    "Harbor Kingdom Protocol Garden River Empire Signal Witness Horizon Orchard "
+    "Station Summer Tide Crown Engine Island Mirror Letter Frontier Circus Forest "
+    "Dynasty Code Storm Hotel Academy Valley Planet Heist Shadow City Road"
+).split()
+FIRST_NAMES = (
+    "Ana Ben Chloe Diego Emma Farid Grace Hiro Ines Jonas Kira Liam Maya Noah Omar "
+    "Priya Quinn Rosa Sam Tara Umar Vera Will Ximena Yuki Zoe"
+).split()
+LAST_NAMES = (
+    "Adler Baptiste Chen Dubois Eriksen Fischer Garcia Haddad Ito Jensen Kowalski "
+    "Lopez Moreau Nakamura Okafor Petrov Quinn Rossi Silva Tanaka Umeh Varga Weber"
+).split()
+
+# Weighted country orders drawn once per provider; each title takes a
+# prefix of one, so generation stays O(countries on offer) per title
+PERMUTATIONS_PER_PROVIDER = 64
+
+
+def parse_count(text: str) -> int:
+    """'500', '100k' or '2.5M' -> int."""
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1].lower(), 1)
+    number = text[:-1] if multiplier > 1 else text
+    return int(float(number) * multiplier)
+
+
+def weighted_orders(rng: random.Random, countries, count: int):
+    """Country orders where heavier markets tend to come first."""
+    orders = []
+    for _ in range(count):
+        keyed = [
+            (rng.random() ** (1.0 / MARKET_WEIGHTS.get(code, 1)), code) for code in countries
+        ]
+        keyed.sort(reverse=True)
+        orders.append([code for _, code in keyed])
+    return orders
+
+
+class Generator:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.orders = {
+            pid: weighted_orders(self.rng, footprint, PERMUTATIONS_PER_PROVIDER)
+            for pid, (footprint, _, _, _) in PROVIDER_PROFILES.items()
+        }
+        self.store_orders = weighted_orders(self.rng, STORE_MARKETS, PERMUTATIONS_PER_PROVIDER)
+
+    def title_name(self) -> str:
+        rng = self.rng
+        pattern = rng.random()
+        if pattern < 0.35:
+            name = f"The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        elif pattern < 0.6:
+            name = f"{rng.choice(NOUNS)} of the {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        elif pattern < 0.85:
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        else:
+            name = f"{rng.choice(FIRST_NAMES)}'s {rng.choice(NOUNS)}"
+        if rng.random() < 0.08:
+            name += f" {rng.randint(2, 4)}"
+        return name
+
+    def offers(self, media_type: str, popularity: float):
+        """
+        Offer type -> provider id -> countries, with the country codes of
+        each offer packed into one string ("USGBCA") to keep lines short.
+        """
+        rng = self.rng
+        # Popular titles are more likely to be licensed anywhere
+        boost = 0.6 + 0.8 * min(1.0, popularity / 30)
+        flatrate = {}
+        for pid, (footprint, movie_share, tv_share, original_share) in PROVIDER_PROFILES.items():
+            share = movie_share if media_type == "movie" else tv_share
+            if rng.random() >= share * boost:
+                continue
+            if rng.random() < original_share:
+                countries = list(footprint)
+            else:
+                size = max(1, round(len(footprint) * rng.betavariate(0.6, 1.8)))
+                countries = rng.choice(self.orders[pid])[:size]
+            if pid == 9:
+                amazon_119 = [c for c in countries if c not in AMAZON_9]
+                countries = [c for c in countries if c in AMAZON_9]
+                if amazon_119:
+                    flatrate["119"] = "".join(sorted(amazon_119))
+            elif pid == 1899:
+                hbo = [c for c in countries if c in LATAM]
+                countries = [c for c in countries if c not in LATAM]
+                if hbo:
+                    flatrate["384"] = "".join(sorted(hbo))
+            if countries:
+                flatrate[str(pid)] = "".join(sorted(countries))
+
+        offers = {"flatrate": flatrate} if flatrate else {}
+        if media_type == "movie" and rng.random() < 0.7:
+            rent = {}
+            for pid in STORES:
+                size = max(1, round(len(STORE_MARKETS) * rng.betavariate(2, 2)))
+                rent[str(pid)] = "".join(sorted(rng.choice(self.store_orders)[:size]))
+            offers["rent"] = rent
+            # Apple sells wherever it rents
+            offers["buy"] = {"2": rent["2"]}
+        return offers
+
+    def title(self, title_id: int):
+        rng = self.rng
+        media_type = "movie" if rng.random() < 0.6 else "tv"
+        year = max(1930, 2025 - int(rng.expovariate(1 / 12)))
+        popularity = round(rng.paretovariate(1.2) * 2, 3)
+        if media_type == "movie":
+            runtime = max(60, int(rng.gauss(105, 18)))
+        else:
+            runtime = max(20, int(rng.gauss(45, 12)))
+        genres = rng.sample(list(GENRES), rng.randint(1, 3))
+        name = self.title_name()
+        return {
+            "id": title_id,
+            "media_type": media_type,
+            "title": name,
+            "date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "popularity": popularity,
+            "vote_average": round(min(10.0, max(1.0, rng.gauss(6.4, 1.1))), 1),
+            "poster_path": f"/synthetic/{title_id}.jpg",
+            "genres": genres,
+            "overview": f"A {GENRES[genres[0]].lower()} story about the "
+            f"{rng.choice(ADJECTIVES).lower()} {rng.choice(NOUNS).lower()}.",
+            "runtime": runtime,
+            "cast": [
+                [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(FIRST_NAMES)]
+                for _ in range(rng.randint(3, 6))
+            ],
+            "offers": self.offers(media_type, popularity),
+        }
+
+
+def header(count: int, seed: int):
+    providers = {}
+    for priority, (pid, name) in enumerate(list(MAJOR_PROVIDERS.items()) + list(STORES.items())):
+        providers[str(pid)] = {
+            "name": name,
+            "logo_path": f"/synthetic/logo{pid}.png",
+            "display_priority": priority,
+        }
+    return {
+        "catalog": 1,
+        "titles": count,
+        "seed": seed,
+        "providers": providers,
+        "genres": {str(g): name for g, name in GENRES.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic title catalog")
+    parser.add_argument("--titles", default="10k", help="Number of titles, e.g. 5000, 100k, 2M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="catalog.jsonl")
+    args = parser.parse_args()
+
+    count = parse_count(args.titles)
+    out = Path(args.out)
+    generator = Generator(args.seed)
+    start = time.perf_counter()
+    with open(out, "wb") as catalog, open(f"{out}.idx", "w", encoding="utf-8") as index:
+        offset = catalog.write(json.dumps(header(count, args.seed)).encode() + b"\n")
+        for title_id in range(1, count + 1):
+            record = generator.title(title_id)
+            line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+            index.write(
+                json.dumps(
+                    [record["media_type"], title_id, offset, record["popularity"], record["title"]]
+                )
+                + "\n"
+            )
+            offset += catalog.write(line)
+            if title_id % 100_000 == 0:
+                print(f"  {title_id:,} titles", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count:,} titles to {out} ({offset / 1e6:.1f} MB) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
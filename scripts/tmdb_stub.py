@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the TMDB API and image server.
+
+Serves deterministic fake data for the endpoints NetflixTitleFinder uses,
+plus generated images, so the finder, the image proxy and the API servers
+can be exercised without network access:
+
+    python scripts/tmdb_stub.py --port 8765
+    TMDB_BASE_URL=http://127.0.0.1:8765/3 \\
+    TMDB_IMAGE_UPSTREAM=http://127.0.0.1:8765/t/p \\
+    TMDB_API_KEY=stub python src/api_server.py
+
+With --catalog, titles come from a synthetic catalog written by
+scripts/generate_catalog.py instead of being derived from their ids.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import re
+import sys
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+COUNTRY_CODES = ["US", "GB", "CA", "AU", "DE", "FR", "JP", "IT", "ES", "MX", "BR", "IN"]
+PROVIDER_IDS = [8, 9, 337, 15, 1899, 350, 386, 531]
+
+# Ids at or above this value do not exist and answer 404
+MISSING_ID_START = 900_000_000
+
+_IMAGE = re.compile(r"^/t/p/(original|w\d+)/([A-Za-z0-9_-]+)\.(jpg|png)$")
+
+
+def _title(title_id: int, media_type: str) -> Dict:
+    name = f"Stub {'Movie' if media_type == 'movie' else 'Show'} {title_id}"
+    date = f"{1980 + title_id % 45}-0{1 + title_id % 9}-1{title_id % 10}"
+    title = {
+        "id": title_id,
+        "media_type": media_type,
+        "poster_path": f"/poster{title_id}.jpg",
+        "vote_average": round(5 + (title_id % 50) / 10, 1),
+        "popularity": float(title_id % 1000),
+    }
+    if media_type == "movie":
+        title.update(title=name, original_title=name, release_date=date)
+    else:
+        title.update(name=name, original_name=name, first_air_date=date)
+    return title
+
+
+def _providers(title_id: int) -> Dict:
+    results = {}
+    for i, code in enumerate(COUNTRY_CODES):
+        if (title_id + i) % 3 == 0:
+            continue
+        offers = [
+            {"provider_id": pid, "provider_name": f"Provider {pid}", "logo_path": f"/logo{pid}.png"}
+            for j, pid in enumerate(PROVIDER_IDS)
+            if (title_id + i + j) % 4 == 0
+        ]
+        results[code] = {
+            "link": f"https://www.themoviedb.org/{title_id}/watch?locale={code}",
+            "flatrate": offers,
+            "rent": [{"provider_id": 2, "provider_name": "Apple TV", "logo_path": "/logo2.png"}],
+        }
+    return {"id": title_id, "results": results}
+
+
+def _details(title_id: int, media_type: str) -> Dict:
+    details = _title(title_id, media_type)
+    details.update(
+        overview=f"Overview of title {title_id}.",
+        tagline="A stub tagline.",
+        genres=[{"id": 18, "name": "Drama"}],
+        runtime=90 + title_id % 60 if media_type == "movie" else None,
+        episode_run_time=[] if media_type == "movie" else [45],
+        credits={
+            "cast": [
+                {"name": f"Actor {n}", "character": f"Role {n}", "profile_path": f"/actor{n}.jpg"}
+                for n in range(10)
+            ]
+        },
+    )
+    return details
+
+
+def _png(width: int, height: int) -> bytes:
+    """Tiny solid-colour PNG, built without Pillow."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return len(data).to_bytes(4, "big") + body + zlib.crc32(body).to_bytes(4, "big")
+
+    raw = b"".join(b"\x00" + b"\x80\x20\x20" * width for _ in range(height))
+    header = width.to_bytes(4, "big") + height.to_bytes(4, "big") + b"\x08\x02\x00\x00\x00"
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _image(size: str, ext: str) -> Tuple[bytes, str]:
+    width = 2000 if size == "original" else int(size[1:])
+    height = width * 3 // 2
+    try:
+        from PIL import Image
+
+        out = io.BytesIO()
+        Image.new("RGB", (width, height), (128, 32, 32)).save(
+            out, "JPEG" if ext == "jpg" else "PNG"
+        )
+        return out.getvalue(), "image/jpeg" if ext == "jpg" else "image/png"
+    except ImportError:
+        return _png(width, height), "image/png"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    catalog = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+        etag: Optional[str] = None,
+    ):
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self, path: str, query: Dict) -> Optional[Dict]:
+        parts = path.strip("/").split("/")
+        if parts[:1] != ["3"]:
+            return None
+        parts = parts[1:]
+        if self.catalog is not None:
+            from catalog import tmdb_response
+
+            params = {k: v[0] for k, v in query.items()}
+            return tmdb_response(self.catalog, "/".join(parts), params)
+        if parts == ["search", "multi"]:
+            text = query.get("query", [""])[0]
+            seed = zlib.crc32(text.encode()) % 100_000
+            results = [_title(seed + n, "movie" if n % 2 else "tv") for n in range(8)]
+            for result in results:
+                result["title" if "title" in result else "name"] = f"{text} {result['id']}"
+            return {"page": 1, "results": results, "total_pages": 1, "total_results": len(results)}
+        if parts == ["trending", "all", "week"]:
+            results = [_title(n * 101, "movie" if n % 2 else "tv") for n in range(1, 21)]
+            return {"page": 1, "results": results, "total_pages": 1}
+        if len(parts) >= 2 and parts[0] in ("movie", "tv") and parts[1].isdigit():
+            title_id = int(parts[1])
+            if title_id >= MISSING_ID_START:
+                return None
+            if parts[2:] == ["watch", "providers"]:
+                return _providers(title_id)
+            if not parts[2:]:
+                return _details(title_id, parts[0])
+        return None
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        url = urlparse(self.path)
+
+        image = _IMAGE.match(url.path)
+        if image:
+            body, content_type = _image(image.group(1), image.group(3))
+            self._send(200, body, content_type)
+            return
+
+        data = self.route(url.path, parse_qs(url.query))
+        if data is None:
+            self._send(404, json.dumps({"status_code": 34, "success": False}).encode())
+            return
+        body = json.dumps(data).encode()
+        # Like TMDB's CDN: an ETag per body, and 304 for a matching If-None-Match
+        self._send(200, body, etag=f'"{hashlib.md5(body).hexdigest()}"')
+
+
+class StubServer(ThreadingHTTPServer):
+    # Load tests open hundreds of connections at once; the default listen
+    # backlog of 5 would drop most of them into SYN retries
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def serve(
+    host: str = "127.0.0.1", port: int = 8765, delay: float = 0.0, catalog: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub server; call serve_forever() on it."""
+    attrs = {"delay": delay}
+    if catalog:
+        from catalog import Catalog
+
+        attrs["catalog"] = Catalog(catalog)
+    handler = type("Handler", (StubHandler,), attrs)
+    return StubServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local TMDB API and image stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--catalog", help="Serve titles from a generate_catalog.py file")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.delay, args.catalog)
+    print(f"TMDB stub listening on http://{args.host}:{server.server_address[1]}/3")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,26 @@ Flask API server for Where Can I Watch This?
 Provides REST endpoints for the frontend to call
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
-from netflix_finder import NetflixTitleFinder
+from netflix_finder import (
+    NetflixTitleFinder,
+    availability_options,
+    country_format,
+    offer_filters,
+    ranking_filters,
+    trending_filters,
+)
+from admission import AdmissionController, Overloaded
+from bundle import parse_bundle, run_bundle
+from upstream import REQUEST_BUDGET, deadline
+from image_proxy import CACHE_CONTROL, SECURITY_HEADERS, ImageNotFound, ImageProxy
+from responses import IMMUTABLE_MAX_AGE, ResponseCache, build_response, etag_matches
+from cache import normalize_query
+from jsonlog import get_logger, log_stats, request_context, route_name
+from warmup import Warmup
 import os
+import time
 
 app = Flask(__name__)
 
@@ -17,6 +33,79 @@ CORS(app)
 # Initialize the Netflix Title Finder
 finder = NetflixTitleFinder()
 
+# Same-origin image proxy with a disk cache
+image_proxy = ImageProxy()
+
+# Serialized responses, reused until the finder data behind them expires
+response_cache = ResponseCache()
+
+# Per-route-class concurrency limits; /api/health is never limited
+admission = AdmissionController()
+
+# Fetches popular titles into the finder caches in the background (WARMUP_SEED).
+# The debug reloader's watcher process imports this module too; only the
+# process serving requests warms up.
+warmup = Warmup()
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN"):
+    warmup.start(finder)
+
+log = get_logger("api")
+
+
+@app.before_request
+def start_request_log():
+    """Tag log records of this request with its id and route (see jsonlog)."""
+    g.request_log = request_context(
+        route_name(request.path), request.headers.get("X-Request-ID")
+    )
+    g.request_id = g.request_log.__enter__()
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def finish_request_log(response):
+    response.headers["X-Request-ID"] = g.request_id
+    log.info(
+        "request",
+        method=request.method,
+        path=request.path,
+        status=response.status_code,
+        duration_ms=round((time.perf_counter() - g.request_start) * 1000, 1),
+    )
+    return response
+
+
+@app.teardown_request
+def end_request_log(error=None):
+    request_log = g.pop("request_log", None)
+    if request_log is not None:
+        request_log.__exit__(None, None, None)
+
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    """Shed load with a fast 503 instead of queueing behind a slow upstream."""
+    response = jsonify({"success": False, "message": str(e)})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
+
+def cacheable_json(payload, endpoint=None, ttl=None):
+    """
+    JSON response (a dict or a cached EncodedResponse) compressed per
+    Accept-Encoding. For GET endpoints it also carries a strong ETag and
+    the endpoint's Cache-Control (its CDN lifetime is `ttl` when given),
+    and is a bodiless 304 if the client's If-None-Match already matches.
+    """
+    status, headers, body = build_response(
+        payload,
+        endpoint,
+        request.headers.get("Accept-Encoding"),
+        request.headers.get("If-None-Match"),
+        ttl,
+    )
+    return Response(body, status=status, headers=headers)
+
 
 @app.route("/api/search", methods=["POST"])
 def search():
@@ -25,7 +114,9 @@ def search():
 
     Expected request body:
     {
-        "query": "Inception"
+        "query": "Inception",
+        "availability": true,   // optional: add a Netflix summary per title
+        "country": "GB"         // optional: also check this country
     }
 
     Returns:
@@ -37,7 +128,8 @@ def search():
                 "title": "Inception",
                 "type": "movie",
                 "year": "2010",
-                "poster": "https://image.tmdb.org/t/p/w342/..."
+                "poster": "https://image.tmdb.org/t/p/w342/...",
+                "availability": {"netflix_countries": 12, "in_country": true}
             }
         ]
     }
@@ -48,15 +140,36 @@ def search():
 
         if not query:
             return jsonify({"success": False, "message": "Query is required"}), 400
+        try:
+            availability, country = availability_options(data)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
 
-        # Search for titles
-        results = finder.search_titles(query)
+        def build():
+            # Search for titles and format results for API response
+            response = finder.display_results(finder.search_titles(query))
+            if availability:
+                response = finder.search_availability(response, country)
+            return response
 
-        # Format results for API response
-        formatted_response = finder.display_results(results)
+        # With availability, titles whose lookup missed the budget say
+        # "unknown" and the response is not cached (see cached_ttl)
+        key = ("search", normalize_query(query))
+        if availability:
+            key += ("availability", country)
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "search", finder.is_cached("search", query)
+        ):
+            formatted_response = response_cache.get_or_encode(
+                key,
+                build,
+                lambda: finder.cached_ttl("availability" if availability else "search", query),
+            )
 
-        return jsonify(formatted_response), 200
+        return cacheable_json(formatted_response)
 
+    except Overloaded:
+        raise
     except Exception as e:
         return (
             jsonify({"success": False, "message": f"Error: {str(e)}"}),
@@ -64,6 +177,43 @@ def search():
         )
 
 
+@app.route("/api/bundle", methods=["POST"])
+def bundle():
+    """
+    Several operations in one request, run concurrently (see bundle.py)
+
+    Expected request body:
+    {
+        "operations": [
+            {"id": "top", "op": "trending"},
+            {"op": "details", "title_id": 27205, "media_type": "movie"},
+            {"op": "countries", "title_id": 27205, "media_type": "movie"}
+        ]
+    }
+    Operations: search, trending, countries, providers, details, with the
+    parameters of those endpoints.
+
+    Returns:
+    {
+        "success": true,
+        "results": [
+            {"id": "top", "op": "trending", "status": 200, "ms": 0.4, "body": {...}},
+            ...
+        ]
+    }
+    """
+    try:
+        operations = parse_bundle(request.get_data())
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    try:
+        with deadline(REQUEST_BUDGET):
+            result = run_bundle(finder, operations, response_cache, admission)
+        return cacheable_json(result)
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Error: {str(e)}"}), 500
+
+
 @app.route("/api/countries/<int:title_id>/<media_type>", methods=["GET"])
 def get_netflix_countries(title_id, media_type):
     """
@@ -73,11 +223,19 @@ def get_netflix_countries(title_id, media_type):
     - title_id: TMDB title ID
     - media_type: 'movie' or 'tv'
 
+    Query Parameters (optional):
+    - provider: TMDB provider id to check instead of Netflix, e.g. 337
+    - offer: flatrate (default), free, ads, rent or buy
+    - format: names (default); codes for ISO codes; packed for a base64
+      bitmap over the country table (see /api/country-table)
+
     Returns:
     {
         "success": true,
         "data": ["United States", "United Kingdom", "Canada", "Australia"]
     }
+    With format=codes or packed, "table" names the country table version
+    and "unlisted" holds codes missing from it, if any.
     """
     try:
         if media_type not in ["movie", "tv"]:
@@ -90,12 +248,30 @@ def get_netflix_countries(title_id, media_type):
                 ),
                 400,
             )
+        try:
+            provider, offer = offer_filters(request.args)
+            fmt = country_format(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
 
         # Get countries from finder
-        countries_response = finder.get_countries(title_id, media_type)
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "availability", finder.is_cached("providers", media_type, title_id)
+        ):
+            countries_response = response_cache.get_or_encode(
+                ("countries", media_type, title_id, provider, offer, fmt),
+                lambda: finder.get_countries(title_id, media_type, provider, offer, fmt),
+                lambda: finder.cached_ttl("providers", media_type, title_id),
+            )
 
-        return jsonify(countries_response), 200
+        return cacheable_json(
+            countries_response,
+            "countries",
+            finder.cached_ttl("providers", media_type, title_id),
+        )
 
+    except Overloaded:
+        raise
     except Exception as e:
         return (
             jsonify({"success": False, "message": f"Error: {str(e)}"}),
@@ -105,20 +281,103 @@ def get_netflix_countries(title_id, media_type):
 
 @app.route("/api/trending", methods=["GET"])
 def get_trending():
+    """
+    Trending titles this week
+
+    Query Parameters (optional):
+    - country: ISO code; each title gets "available": true/false, or null
+      while its provider lookup is still being precomputed ("complete"
+      is then false)
+    - provider: TMDB provider id to check, default 8 (Netflix)
+    - offer: flatrate (default), free, ads, rent or buy
+    - only_available: 'true' to drop titles not available
+    """
     try:
-        result = finder.get_trending()
-        return jsonify(result), 200
+        try:
+            country, provider, only_available, offer = trending_filters(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "trending", finder.is_cached("trending")
+        ):
+            result = response_cache.get_or_encode(
+                ("trending", country, provider, only_available, offer),
+                lambda: finder.get_trending(country, provider, only_available, offer),
+                lambda: finder.cached_ttl("trending", country),
+            )
+        # Partly annotated responses must not be cached downstream either
+        return cacheable_json(
+            result,
+            "trending" if result.complete else None,
+            finder.cached_ttl("trending", country),
+        )
+    except Overloaded:
+        raise
     except Exception as e:
         return jsonify({"success": False, "data": [], "message": str(e)}), 500
 
 
+@app.route("/api/rankings", methods=["GET"])
+def get_rankings():
+    """
+    Top titles of a major provider, from the providers data fetched so far
+    (no TMDB calls; see rankings.py)
+
+    Query Parameters (optional):
+    - provider: TMDB provider id of a major provider, default 8 (Netflix)
+    - k: titles per ranking, 1-100, default 20
+
+    Returns:
+    {
+        "success": true,
+        "provider": 8,
+        "offer": "flatrate",
+        "tracked_titles": 1520,
+        "widest": [{"id": 27205, "type": "movie", "title": "Inception", "countries": 93}],
+        "exclusive": [
+            {"id": 1399, "type": "tv", "title": "Game of Thrones", "countries": 1, "country": "JP"}
+        ]
+    }
+    """
+    try:
+        provider, k = ranking_filters(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return cacheable_json(finder.get_rankings(provider, k))
+
+
 @app.route("/api/providers/<int:title_id>/<media_type>", methods=["GET"])
 def get_providers(title_id, media_type):
+    """
+    Countries and logo per major streaming provider of a title
+
+    Query Parameters (optional):
+    - provider: TMDB provider id; only this provider, major or not
+    - offer: flatrate (default), free, ads, rent or buy
+    - format: names (default), codes or packed, as for /api/countries
+    """
     try:
         if media_type not in ["movie", "tv"]:
             return jsonify({"success": False, "message": "Invalid media_type"}), 400
-        result = finder.get_all_providers(title_id, media_type)
-        return jsonify(result), 200
+        try:
+            provider, offer = offer_filters(request.args)
+            fmt = country_format(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "availability", finder.is_cached("providers", media_type, title_id)
+        ):
+            result = response_cache.get_or_encode(
+                ("providers", media_type, title_id, provider, offer, fmt),
+                lambda: finder.get_all_providers(title_id, media_type, provider, offer, fmt),
+                lambda: finder.cached_ttl("providers", media_type, title_id),
+            )
+        return cacheable_json(
+            result, "providers", finder.cached_ttl("providers", media_type, title_id)
+        )
+    except Overloaded:
+        raise
     except Exception as e:
         return jsonify({"success": False, "data": {}, "message": str(e)}), 500
 
@@ -128,12 +387,85 @@ def get_title_details(title_id, media_type):
     try:
         if media_type not in ["movie", "tv"]:
             return jsonify({"success": False, "message": "Invalid media_type"}), 400
-        result = finder.get_title_details(title_id, media_type)
-        return jsonify(result), 200
+        with deadline(REQUEST_BUDGET), admission.admit(
+            "details", finder.is_cached("details", media_type, title_id)
+        ):
+            result = response_cache.get_or_encode(
+                ("details", media_type, title_id),
+                lambda: finder.get_title_details(title_id, media_type),
+                lambda: finder.cached_ttl("details", media_type, title_id),
+            )
+        return cacheable_json(result, "details")
+    except Overloaded:
+        raise
     except Exception as e:
         return jsonify({"success": False, "data": {}, "message": str(e)}), 500
 
 
+@app.route("/api/country-table/<version>", methods=["GET"])
+def get_country_table(version):
+    """
+    Country table for format=codes and format=packed responses
+
+    URL Parameters:
+    - version: The "table" value of such a response. Tables never change
+      under a version, so they are cached for good.
+
+    Returns:
+    {
+        "success": true,
+        "version": "3f9a0c21b7e4",
+        "codes": ["AD", "AE", ...],
+        "names": ["Andorra", "United Arab Emirates", ...]
+    }
+    """
+    table = finder.country_table()
+    if version != table["version"]:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": "Unknown country table version",
+                    "version": table["version"],
+                }
+            ),
+            404,
+        )
+    result = response_cache.get_or_encode(
+        ("country_table",), finder.country_table, lambda: IMMUTABLE_MAX_AGE
+    )
+    return cacheable_json(result, "country_table")
+
+
+@app.route("/api/img/<size>/<filename>", methods=["GET"])
+def get_image(size, filename):
+    """
+    Proxy a TMDB image, downscaled to the requested width
+
+    URL Parameters:
+    - size: 'original' or 'w<width>', e.g. 'w342'
+    - filename: TMDB image file name, e.g. '9gk7adHYeDMNNGceKPn30Up0HwU.jpg'
+    """
+    with deadline(REQUEST_BUDGET), admission.admit(
+        "images", image_proxy.is_cached(size, filename)
+    ):
+        try:
+            image = image_proxy.get(size, filename)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        except ImageNotFound:
+            return jsonify({"success": False, "message": "Image not found"}), 404
+        except Exception as e:
+            return jsonify({"success": False, "message": f"Error: {str(e)}"}), 502
+
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": image.etag}
+    if etag_matches(request.headers.get("If-None-Match"), image.etag):
+        return Response(status=304, headers=headers)
+    return Response(
+        image.body, mimetype=image.content_type, headers={**headers, **SECURITY_HEADERS}
+    )
+
+
 @app.route("/api/health", methods=["GET"])
 def health_check():
     """
@@ -142,14 +474,37 @@ def health_check():
     Returns:
     {
         "status": "ok",
-        "api_key_configured": true/false
+        "api_key_configured": true/false,
+        "data_source": "tmdb",
+        "upstream": {"requests": 120, "hedged": 4, "hedge_wins": 3, "p95_ms": 410.0},
+        "provider_ttl": {
+            "histogram": {"le_1h": 3, "le_6h": 40, "le_24h": 51, "le_72h": 6, "inf": 0},
+            "tracked_titles": 100, "titles_changed": 7,
+            "p50_s": 21600, "p90_s": 43200, "p99_s": 86400
+        },
+        "revalidation": {"not_modified": 40, "unchanged": 2, "changed": 5},
+        "warmup": {
+            "status": "running", "seed": "trending", "titles": 20,
+            "warmed": 12, "failed": 0, "elapsed_s": 1.4
+        },
+        "logging": {"queued": 0, "written": 812, "dropped": 0}
     }
+    data_source is "tmdb" with a TMDB_API_KEY, "sample_catalog" when
+    serving SAMPLE_CATALOG and "sample_data" otherwise; only "tmdb" sets
+    api_key_configured. warmup.status is "off" without WARMUP_SEED, then
+    "running", then "done" (or "failed" if the seed could not be loaded).
     """
     return (
         jsonify(
             {
                 "status": "ok",
-                "api_key_configured": bool(finder.api_key),
+                "api_key_configured": finder.api_key_configured,
+                "data_source": finder.data_source,
+                "upstream": finder.upstream.snapshot(),
+                "provider_ttl": finder.provider_ttls.snapshot(),
+                "revalidation": dict(finder.revalidation),
+                "warmup": warmup.snapshot(),
+                "logging": log_stats(),
             }
         ),
         200,
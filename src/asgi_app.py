@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+ASGI variant of the API server, on AsyncNetflixTitleFinder.
+
+Serves the same routes, status codes and headers as api_server.py, but
+upstream calls are awaited on one event loop instead of holding a worker
+thread each, so a single process can keep hundreds of TMDB calls in
+flight. Run it with any ASGI server:
+
+    uvicorn asgi_app:app --app-dir src --port 5000
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from async_finder import AsyncNetflixTitleFinder
+from netflix_finder import (
+    availability_options,
+    country_format,
+    offer_filters,
+    ranking_filters,
+    trending_filters,
+)
+from admission import AsyncAdmissionController, Overloaded
+from bundle import parse_bundle, run_bundle_async
+from upstream import REQUEST_BUDGET, deadline
+from image_proxy import CACHE_CONTROL, SECURITY_HEADERS, ImageNotFound, ImageProxy
+from responses import (
+    IMMUTABLE_MAX_AGE,
+    EncodedResponse,
+    ResponseCache,
+    build_response,
+    etag_matches,
+)
+from cache import normalize_query
+from jsonlog import get_logger, log_stats, request_context, route_name
+from warmup import Warmup
+
+finder = AsyncNetflixTitleFinder()
+image_proxy = ImageProxy()
+response_cache = ResponseCache()
+admission = AsyncAdmissionController()
+log = get_logger("api")
+# Started with the event loop, on lifespan startup (WARMUP_SEED, see warmup.py)
+warmup = Warmup()
+
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+PREFLIGHT_HEADERS = {
+    **CORS_HEADERS,
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+_TITLE = r"(?P<title_id>\d+)/(?P<media_type>[^/]+)"
+
+
+class Request:
+    """The parts of an ASGI HTTP request the views need."""
+
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = {
+            name.decode("latin-1").lower(): value.decode("latin-1")
+            for name, value in scope.get("headers", [])
+        }
+        self.query = {
+            k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()
+        }
+        self.body = body
+
+
+# (status, headers, body)
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+def json_response(status: int, payload: Dict, headers: Optional[Dict] = None) -> Response:
+    body = json.dumps(payload).encode()
+    return status, {"Content-Type": "application/json", **(headers or {})}, body
+
+
+def cacheable_json(
+    request: Request, payload, endpoint: Optional[str] = None, ttl: Optional[float] = None
+) -> Response:
+    """ASGI counterpart of api_server.cacheable_json."""
+    return build_response(
+        payload,
+        endpoint,
+        request.headers.get("accept-encoding"),
+        request.headers.get("if-none-match"),
+        ttl,
+    )
+
+
+async def cached_or_build(key, build, ttl) -> EncodedResponse:
+    """Async ResponseCache.get_or_encode: `build` is awaited on a miss."""
+    encoded = response_cache.get(key)
+    if encoded is None:
+        encoded = EncodedResponse.from_payload(await build())
+        response_cache.store(key, encoded, ttl)
+    return encoded
+
+
+async def search(request: Request) -> Response:
+    try:
+        data = json.loads(request.body) if request.body else {}
+        query = data.get("query", "").strip()
+    except (ValueError, AttributeError):
+        return json_response(400, {"success": False, "message": "Invalid request body"})
+
+    if not query:
+        return json_response(400, {"success": False, "message": "Query is required"})
+    try:
+        availability, country = availability_options(data)
+    except ValueError as e:
+        return json_response(400, {"success": False, "message": str(e)})
+
+    async def build():
+        response = finder.display_results(await finder.search_titles(query))
+        if availability:
+            response = await finder.search_availability(response, country)
+        return response
+
+    key = ("search", normalize_query(query))
+    if availability:
+        key += ("availability", country)
+    with deadline(REQUEST_BUDGET):
+        async with admission.admit("search", finder.is_cached("search", query)):
+            response = await cached_or_build(
+                key,
+                build,
+                lambda: finder.cached_ttl("availability" if availability else "search", query),
+            )
+    return cacheable_json(request, response)
+
+
+async def bundle(request: Request) -> Response:
+    try:
+        operations = parse_bundle(request.body)
+    except ValueError as e:
+        return json_response(400, {"success": False, "message": str(e)})
+
+    with deadline(REQUEST_BUDGET):
+        result = await run_bundle_async(finder, operations, response_cache, admission)
+    return cacheable_json(request, result)
+
+
+async def trending(request: Request) -> Response:
+    try:
+        country, provider, only_available, offer = trending_filters(request.query)
+    except ValueError as e:
+        return json_response(400, {"success": False, "message": str(e)})
+
+    with deadline(REQUEST_BUDGET):
+        async with admission.admit("trending", finder.is_cached("trending")):
+            result = await cached_or_build(
+                ("trending", country, provider, only_available, offer),
+                lambda: finder.get_trending(country, provider, only_available, offer),
+                lambda: finder.cached_ttl("trending", country),
+            )
+    # Partly annotated responses must not be cached downstream either
+    return cacheable_json(
+        request,
+        result,
+        "trending" if result.complete else None,
+        finder.cached_ttl("trending", country),
+    )
+
+
+async def rankings(request: Request) -> Response:
+    try:
+        provider, k = ranking_filters(request.query)
+    except ValueError as e:
+        return json_response(400, {"success": False, "message": str(e)})
+    return cacheable_json(request, finder.get_rankings(provider, k))
+
+
+async def countries(request: Request, title_id: int, media_type: str) -> Response:
+    try:
+        provider, offer = offer_filters(request.query)
+        fmt = country_format(request.query)
+    except ValueError as e:
+        return json_response(400, {"success": False, "message": str(e)})
+
+    with deadline(REQUEST_BUDGET):
+        async with admission.admit(
+            "availability", finder.is_cached("providers", media_type, title_id)
+        ):
+            result = await cached_or_build(
+                ("countries", media_type, title_id, provider, offer, fmt),
+                lambda: finder.get_countries(title_id, media_type, provider, offer, fmt),
+                lambda: finder.cached_ttl("providers", media_type, title_id),
+            )
+    return cacheable_json(
+        request, result, "countries", finder.cached_ttl("providers", media_type, title_id)
+    )
+
+
+async def providers(request: Request, title_id: int, media_type: str) -> Response:
+    try:
+        provider, offer = offer_filters(request.query)
+        fmt = country_format(request.query)
+    except ValueError as e:
+        return json_response(400, {"success": False, "message": str(e)})
+
+    with deadline(REQUEST_BUDGET):
+        async with admission.admit(
+            "availability", finder.is_cached("providers", media_type, title_id)
+        ):
+            result = await cached_or_build(
+                ("providers", media_type, title_id, provider, offer, fmt),
+                lambda: finder.get_all_providers(title_id, media_type, provider, offer, fmt),
+                lambda: finder.cached_ttl("providers", media_type, title_id),
+            )
+    return cacheable_json(
+        request, result, "providers", finder.cached_ttl("providers", media_type, title_id)
+    )
+
+
+async def country_table(request: Request, version: str) -> Response:
+    table = finder.country_table()
+    if version != table["version"]:
+        return json_response(
+            404,
+            {
+                "success": False,
+                "message": "Unknown country table version",
+                "version": table["version"],
+            },
+        )
+    result = response_cache.get_or_encode(
+        ("country_table",), finder.country_table, lambda: IMMUTABLE_MAX_AGE
+    )
+    return cacheable_json(request, result, "country_table")
+
+
+async def details(request: Request, title_id: int, media_type: str) -> Response:
+    with deadline(REQUEST_BUDGET):
+        async with admission.admit(
+            "details", finder.is_cached("details", media_type, title_id)
+        ):
+            result = await cached_or_build(
+                ("details", media_type, title_id),
+                lambda: finder.get_title_details(title_id, media_type),
+                lambda: finder.cached_ttl("details", media_type, title_id),
+            )
+    return cacheable_json(request, result, "details")
+
+
+async def image(request: Request, size: str, filename: str) -> Response:
+    # The proxy does blocking disk and network I/O, keep it off the event loop
+    with deadline(REQUEST_BUDGET):
+        async with admission.admit("images", image_proxy.is_cached(size, filename)):
+            try:
+                proxied = await asyncio.to_thread(image_proxy.get, size, filename)
+            except ValueError as e:
+                return json_response(400, {"success": False, "message": str(e)})
+            except ImageNotFound:
+                return json_response(404, {"success": False, "message": "Image not found"})
+            except Exception as e:
+                return json_response(502, {"success": False, "message": f"Error: {str(e)}"})
+
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": proxied.etag}
+    if etag_matches(request.headers.get("if-none-match"), proxied.etag):
+        return 304, headers, b""
+    headers.update(SECURITY_HEADERS)
+    headers["Content-Type"] = proxied.content_type
+    headers["Content-Length"] = str(len(proxied.body))
+    return 200, headers, proxied.body
+
+
+async def health(request: Request) -> Response:
+    return json_response(
+        200,
+        {
+            "status": "ok",
+            "api_key_configured": finder.api_key_configured,
+            "data_source": finder.data_source,
+            "upstream": finder.upstream.snapshot(),
+            "provider_ttl": finder.provider_ttls.snapshot(),
+            "revalidation": dict(finder.revalidation),
+            "warmup": warmup.snapshot(),
+            "logging": log_stats(),
+        },
+    )
+
+
+# (method, compiled path pattern, view, whether the view takes a title)
+ROUTES = [
+    ("GET", re.compile(r"^/api/health/?$"), health, False),
+    ("POST", re.compile(r"^/api/search/?$"), search, False),
+    ("POST", re.compile(r"^/api/bundle/?$"), bundle, False),
+    ("GET", re.compile(r"^/api/trending/?$"), trending, False),
+    ("GET", re.compile(r"^/api/rankings/?$"), rankings, False),
+    ("GET", re.compile(rf"^/api/countries/{_TITLE}/?$"), countries, True),
+    ("GET", re.compile(rf"^/api/providers/{_TITLE}/?$"), providers, True),
+    ("GET", re.compile(rf"^/api/details/{_TITLE}/?$"), details, True),
+    ("GET", re.compile(r"^/api/country-table/(?P<version>[0-9a-f]+)$"), country_table, False),
+    ("GET", re.compile(r"^/api/img/(?P<size>[^/]+)/(?P<filename>[^/]+)$"), image, False),
+]
+
+
+async def dispatch(request: Request) -> Response:
+    if request.method == "OPTIONS":
+        return 200, dict(PREFLIGHT_HEADERS), b""
+
+    path_matched = False
+    for route_method, pattern, view, takes_title in ROUTES:
+        match = pattern.match(request.path)
+        if not match:
+            continue
+        if route_method != request.method:
+            path_matched = True
+            continue
+
+        params = match.groupdict()
+        if takes_title:
+            if params["media_type"] not in ["movie", "tv"]:
+                return json_response(
+                    400,
+                    {"success": False, "message": "Invalid media_type. Use 'movie' or 'tv'"},
+                )
+            params["title_id"] = int(params["title_id"])
+
+        try:
+            return await view(request, **params)
+        except Overloaded as e:
+            return json_response(
+                503,
+                {"success": False, "message": str(e)},
+                {"Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            log.error("unhandled_error", error=str(e))
+            return json_response(500, {"success": False, "message": f"Error: {str(e)}"})
+
+    if path_matched:
+        return json_response(405, {"success": False, "message": "Method not allowed"})
+    return json_response(404, {"success": False, "message": "Not found"})
+
+
+async def _read_body(receive) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            warmup.start_async(finder)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            warmup.cancel()
+            await finder.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI 3 entry point."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    request = Request(scope, await _read_body(receive))
+    start = time.perf_counter()
+    with request_context(
+        route_name(request.path), request.headers.get("x-request-id")
+    ) as request_id:
+        status, headers, body = await dispatch(request)
+        log.info(
+            "request",
+            method=request.method,
+            path=request.path,
+            status=status,
+            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+        )
+    headers = {**CORS_HEADERS, **headers, "X-Request-ID": request_id}
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.getenv("PORT", 5000))
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,301 @@
+"""
+asyncio variant of NetflixTitleFinder.
+
+AsyncNetflixTitleFinder has the same public methods and result shapes as
+NetflixTitleFinder, as coroutines. TMDB calls go through one pooled
+httpx.AsyncClient, so a single process can keep hundreds of upstream
+calls in flight without a thread per call. Caching, the sample-data
+fallback and result formatting are inherited unchanged.
+"""
+
+import contextvars
+import os
+from typing import Dict, List, Optional, Tuple
+
+from netflix_finder import (
+    AVAILABILITY_BUDGET,
+    SAMPLE_CATALOG_KEY,
+    TRENDING_PRECOMPUTE_WORKERS,
+    NetflixTitleFinder,
+    log,
+)
+from cache import normalize_query
+from records import Title, TitleOffers
+from upstream import AsyncUpstreamClient
+
+
+class AsyncNetflixTitleFinder(NetflixTitleFinder):
+    """
+    Args:
+        max_connections: Upper bound on concurrent connections to TMDB
+    """
+
+    def __init__(self, max_connections: int = 256):
+        super().__init__()
+        # The sample catalog transport answers coroutines too; reuse the one
+        # NetflixTitleFinder already loaded
+        sample = self.upstream.transport if self.api_key == SAMPLE_CATALOG_KEY else None
+        self.upstream = AsyncUpstreamClient(
+            hedge=os.getenv("TMDB_HEDGE") == "1",
+            max_connections=max_connections,
+            transport=sample,
+        )
+        self._late_lookups = set()
+
+    async def _get_json(
+        self, cache_key: Optional[Tuple], path: str, params: Optional[Dict] = None
+    ) -> Tuple[int, Optional[Dict]]:
+        """Async NetflixTitleFinder._get_json."""
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
+        stored = self._stored_response(cache_key)
+        query = {"api_key": self.api_key}
+        query.update(params or {})
+        response = await self.upstream.get(
+            f"{self.tmdb_base_url}{path}",
+            params=query,
+            headers=stored.conditional_headers() if stored is not None else None,
+        )
+        return self._accept_response(cache_key, stored, response)
+
+    async def search_titles(self, query: str) -> List[Title]:
+        """Async NetflixTitleFinder.search_titles."""
+        log.debug("search", query=query)
+
+        if not self.api_key:
+            return self._get_sample_data(query)
+
+        query = normalize_query(query)
+        if ("search", query) in self.negative_cache:
+            log.debug("search_empty", query=query, cached=True)
+            return []
+        cached = self.search_cache.get(query)
+        if cached is not None:
+            return cached
+
+        try:
+            status, body = await self._get_json(
+                None, "/search/multi", {"query": query, "page": 1}
+            )
+            if status == 200:
+                return self._search_results(query, body)
+            log.warning("upstream_status", path="/search/multi", status=status)
+            return self._get_sample_data(query)
+        except Exception as e:
+            log.warning("upstream_error", path="/search/multi", error=str(e))
+            return self._get_sample_data(query)
+
+    async def get_netflix_countries(self, title: Title) -> List[str]:
+        """Async NetflixTitleFinder.get_netflix_countries."""
+        if not self.api_key:
+            return self._sample_netflix_countries(title.id)
+
+        try:
+            media_type = title.media_type
+            title_id = title.id
+            if not title_id:
+                return []
+            key = ("providers", media_type, title_id)
+            status, body = await self._get_json(
+                key,
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+            if status != 200:
+                return []
+            return self._derive(key, body, self._netflix_countries)
+        except Exception as e:
+            log.warning("upstream_error", path="watch/providers", error=str(e))
+            return []
+
+    async def get_countries(
+        self,
+        title_id: int,
+        media_type: str,
+        provider: Optional[int] = None,
+        offer: str = "flatrate",
+        country_format: str = "names",
+    ) -> Dict:
+        """Async NetflixTitleFinder.get_countries."""
+        try:
+            key = ("providers", media_type, title_id)
+            status, body = await self._get_json(
+                key,
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+            if status == 200:
+                data, unlisted = self._countries_data(key, body, provider, offer, country_format)
+                return self._with_table({"success": True, "data": data}, country_format, unlisted)
+            return {"success": False, "data": []}
+        except Exception as e:
+            log.warning("upstream_error", path="watch/providers", error=str(e))
+            return {"success": False, "data": []}
+
+    async def search_availability(
+        self,
+        response: Dict,
+        country: Optional[str] = None,
+        budget: float = AVAILABILITY_BUDGET,
+    ) -> Dict:
+        """Async NetflixTitleFinder.search_availability."""
+        titles = response.get("data", [])
+        if not titles or not self.api_key:
+            return self._with_availability(response, {}, country)
+
+        import asyncio
+
+        bodies: Dict[Tuple[str, int], Optional[TitleOffers]] = {}
+        pending = {}
+        for title in titles:
+            key = (title["type"], title["id"])
+            if key in bodies or key in pending:
+                continue
+            if self.is_cached("providers", *key):
+                bodies[key] = await self._title_offers(*key)
+            else:
+                pending[key] = asyncio.ensure_future(self._title_offers(*key))
+        if pending:
+            await asyncio.wait(pending.values(), timeout=self._availability_wait(budget))
+        for key, task in pending.items():
+            if not task.done():
+                # Left running to fill the provider cache, like the sync
+                # finder's late lookups; referenced until it finishes
+                self._late_lookups.add(task)
+                task.add_done_callback(self._discard_late_lookup)
+            elif task.exception() is None:
+                bodies[key] = task.result()
+        return self._with_availability(response, bodies, country)
+
+    def _discard_late_lookup(self, task) -> None:
+        self._late_lookups.discard(task)
+        if not task.cancelled():
+            task.exception()  # retrieved, so a failure is not reported as unhandled
+
+    async def fetch_offers(
+        self, media_type: str, title_id: int
+    ) -> Tuple[int, Optional[TitleOffers]]:
+        """Async NetflixTitleFinder.fetch_offers."""
+        return await self._get_json(
+            ("providers", media_type, title_id),
+            f"/{media_type}/{title_id}/watch/providers",
+        )
+
+    async def _title_offers(self, media_type: str, title_id: int) -> Optional[TitleOffers]:
+        """Async NetflixTitleFinder._title_offers."""
+        try:
+            status, body = await self._get_json(
+                ("providers", media_type, title_id),
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+        except Exception as e:
+            log.debug("availability_lookup_failed", title_id=title_id, error=str(e))
+            raise
+        return body if status == 200 else None
+
+    async def get_trending(
+        self,
+        country: Optional[str] = None,
+        provider: Optional[int] = None,
+        only_available: bool = False,
+        offer: str = "flatrate",
+    ) -> Dict:
+        """Async NetflixTitleFinder.get_trending."""
+        if not self.api_key:
+            return {"success": True, "data": []}
+        try:
+            fresh = ("trending",) not in self.cache
+            status, body = await self._get_json(
+                ("trending",), "/trending/all/week", {"language": "en-US"}
+            )
+            if status != 200:
+                return {"success": False, "data": []}
+            data = self._derive(("trending",), body, self._format_trending)
+        except Exception:
+            return {"success": False, "data": []}
+
+        if fresh:
+            self._refresh_trending_offers(data)
+        expired = self._expire_trending_offers()
+        if fresh or expired or self._precompute_retry_due():
+            self._precompute_trending()
+        if country is None:
+            return {"success": True, "data": data}
+        return self._annotate_trending(data, country, provider, only_available, offer)
+
+    def _precompute_trending(self) -> None:
+        """Async NetflixTitleFinder._precompute_trending, as event loop tasks."""
+        import asyncio
+
+        if self._background is None:
+            self._background = set()
+        # Not awaited by the request: it returns with whatever is known so
+        # far. Tasks start from an empty context so the request deadline
+        # does not apply, and are referenced so they are not garbage collected
+        semaphore = asyncio.Semaphore(TRENDING_PRECOMPUTE_WORKERS)
+        for media_type, title_id in self._trending_to_index():
+            task = contextvars.Context().run(
+                asyncio.create_task,
+                self._index_trending_offers(media_type, title_id, semaphore),
+            )
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _index_trending_offers(self, media_type: str, title_id: int, semaphore) -> None:
+        status, body = None, None
+        try:
+            async with semaphore:
+                status, body = await self._get_json(
+                    ("providers", media_type, title_id),
+                    f"/{media_type}/{title_id}/watch/providers",
+                )
+            if status not in (200, 404):
+                log.warning("trending_precompute_failed", title_id=title_id, status=status)
+        except Exception as e:
+            log.warning("trending_precompute_failed", title_id=title_id, error=str(e))
+        finally:
+            self._store_trending_offers((media_type, title_id), status, body)
+
+    async def get_all_providers(
+        self,
+        title_id: int,
+        media_type: str,
+        provider: Optional[int] = None,
+        offer: str = "flatrate",
+        country_format: str = "names",
+    ) -> Dict:
+        """Async NetflixTitleFinder.get_all_providers."""
+        if not self.api_key:
+            return {"success": True, "data": {}}
+        try:
+            key = ("providers", media_type, title_id)
+            status, body = await self._get_json(
+                key,
+                f"/{media_type}/{title_id}/watch/providers",
+            )
+            if status != 200:
+                return {"success": False, "data": {}}
+            data = self._providers_data(key, body, provider, offer, country_format)
+            return self._with_table({"success": True, "data": data}, country_format)
+        except Exception:
+            return {"success": False, "data": {}}
+
+    async def get_title_details(self, title_id: int, media_type: str) -> Dict:
+        """Async NetflixTitleFinder.get_title_details."""
+        if not self.api_key:
+            return {"success": True, "data": {}}
+        try:
+            status, d = await self._get_json(
+                ("details", media_type, title_id),
+                f"/{media_type}/{title_id}",
+                {"append_to_response": "credits"},
+            )
+            if status != 200:
+                return {"success": False, "data": {}}
+            return {"success": True, "data": d.display()}
+        except Exception:
+            return {"success": False, "data": {}}
+
+    async def aclose(self) -> None:
+        """Close the pooled TMDB connections."""
+        await self.upstream.aclose()
@@ -0,0 +1,189 @@
+"""
+In-memory caches shared by the finder and the API handlers
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from records import Title
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live.
+
+    Args:
+        maxsize: Maximum number of entries kept before the least recently
+            used one is evicted
+        ttl: Default time-to-live in seconds for new entries
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (defaults to the cache TTL)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def ttl_left(self, key: Hashable) -> Optional[float]:
+        """Seconds until key expires, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        remaining = entry[1] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class StoredResponse:
+    """
+    A TMDB response body kept past its cache TTL for revalidation.
+
+    Holds the upstream validators and a digest of the raw bytes, so an
+    expired entry can be refreshed with a conditional GET, and an
+    unchanged body reused without parsing it again. `derived` keeps
+    results computed from this exact body (formatted API outputs), which
+    stay valid for as long as the body does.
+    """
+
+    __slots__ = ("body", "digest", "etag", "last_modified", "derived")
+
+    def __init__(self, body: Any, digest: bytes):
+        self.body = body
+        self.digest = digest
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.derived: Dict[str, Any] = {}
+
+    @staticmethod
+    def digest_of(content: bytes) -> bytes:
+        return hashlib.blake2b(content, digest_size=16).digest()
+
+    def update_validators(self, headers) -> None:
+        """Take ETag / Last-Modified from a response, keeping known ones."""
+        self.etag = headers.get("ETag") or self.etag
+        self.last_modified = headers.get("Last-Modified") or self.last_modified
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query: NFKC, case-folded, trimmed, single spaces.
+
+    "Inception", " inception " and "INCEPTION" all normalize to "inception".
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query).casefold()).strip()
+
+
+def _searchable_text(result: "Title") -> str:
+    names = (result.title, result.original_title)
+    return " ".join(normalize_query(n) for n in names if n)
+
+
+class SearchCache:
+    """
+    Search results (records.Title lists) keyed by normalized query, with
+    prefix reuse.
+
+    An entry is "complete" when TMDB returned every match on one page. A
+    longer query that extends a complete entry's query can then be answered
+    by filtering that entry locally, without another /search/multi call.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 900):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _prefix_entry(self, key: str) -> Optional[Tuple[str, List["Title"]]]:
+        """The longest cached complete prefix of key and its results."""
+        for end in range(len(key) - 1, 0, -1):
+            entry = self._entries.get(key[:end])
+            if entry is not None and entry[1]:
+                return key[:end], entry[0]
+        return None
+
+    def get(self, query: str) -> Optional[List["Title"]]:
+        """Return cached results for query, derived from a prefix if possible."""
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+
+        entry = self._prefix_entry(key)
+        if entry is None:
+            return None
+        parent_key, parent_results = entry
+        results = [r for r in parent_results if key in _searchable_text(r)]
+        # Expires with the parent, so chains of longer queries cannot keep
+        # serving results older than the cache TTL
+        ttl = self._entries.ttl_left(parent_key)
+        if ttl is not None:
+            self._entries.set(key, (results, True), ttl=ttl)
+        return results
+
+    def set(self, query: str, results: List["Title"], complete: bool) -> None:
+        self._entries.set(normalize_query(query), (results, complete))
+
+    def __contains__(self, query: str) -> bool:
+        key = normalize_query(query)
+        return key in self._entries or self._prefix_entry(key) is not None
+
+    def ttl_left(self, query: str) -> Optional[float]:
+        """Seconds until the entry for query expires, or None if not cached."""
+        return self._entries.ttl_left(normalize_query(query))
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,208 @@
+"""
+Structured JSON logging that stays off the request path.
+
+Log calls build a small dict and push it onto a bounded queue; a daemon
+thread (started on the first record) serializes and writes one JSON object
+per line. When the queue is full, records are dropped and counted instead
+of blocking the request.
+
+Every record carries the request id and route set by request_context(),
+so all lines of one request can be correlated. Below WARNING, records are
+sampled per route (see ROUTE_SAMPLE_RATES). The decision is made once per
+request from its id, so a sampled request is logged in full and a skipped
+one costs almost nothing.
+
+    LOG_LEVEL=DEBUG            # threshold, default INFO
+    LOG_SAMPLE_RATE=0.5        # default rate for routes without their own
+    LOG_SAMPLE_SEARCH=0.1      # per-route rate, LOG_SAMPLE_<ROUTE>
+"""
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, TextIO
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Route -> fraction of requests whose DEBUG/INFO records are written.
+# Warnings and errors are always written.
+ROUTE_SAMPLE_RATES: Dict[str, float] = {
+    "health": 0.01,
+    "img": 0.1,
+}
+
+# Records waiting for the writer thread; more are dropped
+MAX_QUEUED = 10000
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_route: ContextVar[Optional[str]] = ContextVar("route", default=None)
+_sampled: ContextVar[bool] = ContextVar("sampled", default=True)
+
+
+def route_name(path: str) -> str:
+    """Route name used for sampling: 'search' for /api/search, 'img' for /api/img/..."""
+    parts = path.strip("/").split("/")
+    return parts[1] if len(parts) > 1 and parts[0] == "api" else "unknown"
+
+
+def sample_rate(route: Optional[str]) -> float:
+    if route is None:
+        return 1.0
+    default = ROUTE_SAMPLE_RATES.get(route)
+    if default is None:
+        default = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+    return float(os.getenv(f"LOG_SAMPLE_{route.upper()}", default))
+
+
+def new_request_id() -> str:
+    return os.urandom(8).hex()
+
+
+def _is_sampled(request_id: str, rate: float) -> bool:
+    """Sample by request id, so every log line of a request agrees."""
+    if rate >= 1:
+        return True
+    try:
+        bucket = int(request_id[-8:], 16) / 0x100000000
+    except ValueError:
+        bucket = (hash(request_id) & 0xFFFFFFFF) / 0x100000000
+    return bucket < rate
+
+
+@contextmanager
+def request_context(route: str, request_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Tag every record logged inside the block with a request id and route.
+
+    Args:
+        route: Route name (see route_name); selects the sample rate
+        request_id: Incoming X-Request-ID to propagate, or None to mint one
+
+    Yields:
+        The request id, to echo back in the response
+    """
+    request_id = request_id or new_request_id()
+    tokens = (
+        _request_id.set(request_id),
+        _route.set(route),
+        _sampled.set(_is_sampled(request_id, sample_rate(route))),
+    )
+    try:
+        yield request_id
+    finally:
+        for var, token in zip((_request_id, _route, _sampled), tokens):
+            var.reset(token)
+
+
+class _Writer:
+    """Background thread draining the record queue to a stream."""
+
+    def __init__(self, stream: Optional[TextIO] = None, max_queued: int = MAX_QUEUED):
+        self.stream = stream
+        self._queue: "queue.Queue[Dict]" = queue.Queue(max_queued)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def put(self, record: Dict) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="jsonlog", daemon=True)
+                thread.start()
+                self._thread = thread
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            try:
+                stream = self.stream or sys.stdout
+                stream.write(json.dumps(record, default=str) + "\n")
+                if self._queue.empty():
+                    stream.flush()
+                self.written += 1
+            except Exception:
+                self.dropped += 1
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 2.0) -> None:
+        """Wait until queued records are written (used at interpreter exit)."""
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+
+_writer = _Writer()
+
+
+class JsonLogger:
+    """
+    Logger writing structured records: logger.info("event", key=value, ...).
+
+    Args:
+        name: Component name, written as "logger"
+    """
+
+    def __init__(self, name: str, writer: Optional[_Writer] = None):
+        self.name = name
+        self.writer = writer or _writer
+        self.level = LEVELS.get(os.getenv("LOG_LEVEL", "INFO").upper(), LEVELS["INFO"])
+
+    def log(self, level: str, event: str, **fields) -> None:
+        levelno = LEVELS[level]
+        if levelno < self.level:
+            return
+        if levelno < LEVELS["WARNING"] and not _sampled.get():
+            return
+        record = {
+            "ts": round(time.time(), 3),
+            "level": level,
+            "logger": self.name,
+            "event": event,
+            "request_id": _request_id.get(),
+            "route": _route.get(),
+        }
+        record.update(fields)
+        self.writer.put(record)
+
+    def debug(self, event: str, **fields) -> None:
+        self.log("DEBUG", event, **fields)
+
+    def info(self, event: str, **fields) -> None:
+        self.log("INFO", event, **fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self.log("WARNING", event, **fields)
+
+    def error(self, event: str, **fields) -> None:
+        self.log("ERROR", event, **fields)
+
+
+def get_logger(name: str) -> JsonLogger:
+    return JsonLogger(name)
+
+
+def log_stats() -> Dict[str, int]:
+    """Counters of the shared writer, for /api/health."""
+    return _writer.stats()
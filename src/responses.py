@@ -0,0 +1,303 @@
+"""
+HTTP response helpers shared by the Flask server and the Vercel handlers.
+
+Successful GET responses get a strong ETag computed from the serialized
+body and a Cache-Control header whose s-maxage / stale-while-revalidate
+follow the finder's cache TTLs (for provider data, the time left on the
+entry served, whose TTL adapts per title), so the CDN and browsers can
+reuse them.
+Bodies above a size threshold are compressed with the best encoding the
+client accepts (brotli, then gzip).
+
+Responses are serialized once into an EncodedResponse holding the JSON
+bytes, their digest and any compressed variants. ResponseCache keeps these
+for as long as the finder's underlying cache entry lives, so a hot request
+is answered by writing a ready buffer without touching json.dumps.
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import json
+from http.server import BaseHTTPRequestHandler
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from cache import TTLCache
+from netflix_finder import CACHE_TTLS
+
+
+# Browsers revalidate after this many seconds; the CDN keeps responses for
+# the matching finder TTL and may serve them stale while it refreshes
+BROWSER_MAX_AGE = 60
+
+# Endpoint -> finder cache kind whose TTL drives the CDN lifetime, unless
+# the route passes the time left on the entry it served
+ENDPOINT_CACHE_KINDS = {
+    "trending": "trending",
+    "countries": "providers",
+    "providers": "providers",
+    "details": "details",
+}
+
+# Endpoints served at URLs that name their content version (the country
+# table), so caches may keep them for good
+IMMUTABLE_ENDPOINTS = ("country_table",)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Supported encodings, most preferred first
+# (brotli is optional and only imported when first used; gzip is always available)
+ENCODINGS = ("br", "gzip") if importlib.util.find_spec("brotli") else ("gzip",)
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong ETag for a serialized response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against etag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    W/"x" matches "x".
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cache_control(endpoint: str, success: bool = True, ttl: Optional[float] = None) -> str:
+    """
+    Cache-Control value for an endpoint's response.
+
+    Args:
+        ttl: Seconds the data behind the response stays cached (see
+            NetflixTitleFinder.cached_ttl); the endpoint's CACHE_TTLS entry
+            if None
+    """
+    if not success:
+        return "no-store"
+    if endpoint in IMMUTABLE_ENDPOINTS:
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    if ttl is None:
+        ttl = CACHE_TTLS[ENDPOINT_CACHE_KINDS[endpoint]]
+    ttl = max(1, int(ttl))
+    return (
+        f"public, max-age={BROWSER_MAX_AGE}, s-maxage={ttl}, "
+        f"stale-while-revalidate={ttl}"
+    )
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding to use from an Accept-Encoding header.
+
+    Returns 'br', 'gzip' or None for identity.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(body, quality=9)
+    return gzip.compress(body, compresslevel=9)
+
+
+class EncodedResponse:
+    """
+    A JSON payload serialized once, with its ETag and compressed variants.
+    `complete` is false for a payload marked "complete": false, e.g. a
+    partly annotated trending list, which must not be cached anywhere.
+
+    Compressed variants are built on first use and kept on the object, so
+    a cached response is compressed at most once per encoding.
+    """
+
+    __slots__ = ("body", "etag", "success", "complete", "_variants")
+
+    def __init__(self, body: bytes, success: bool, complete: bool = True):
+        self.body = body
+        self.etag = strong_etag(body)
+        self.success = success
+        self.complete = complete
+        self._variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "EncodedResponse":
+        return cls(
+            json.dumps(payload).encode(),
+            bool(payload.get("success", False)),
+            payload.get("complete", True) is not False,
+        )
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        """Body bytes for a content coding (None for identity)."""
+        if encoding is None:
+            return self.body
+        data = self._variants.get(encoding)
+        if data is None:
+            data = self._variants[encoding] = compress(self.body, encoding)
+        return data
+
+
+class ResponseCache:
+    """
+    EncodedResponses keyed by request, e.g. ("providers", "movie", 27205).
+
+    Only successful, complete responses are kept, and each entry expires
+    together with the finder cache entry it was derived from.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._entries = TTLCache(maxsize=maxsize)
+
+    def get(self, key: Hashable) -> Optional[EncodedResponse]:
+        return self._entries.get(key)
+
+    def get_or_encode(
+        self,
+        key: Hashable,
+        build: Callable[[], Dict],
+        ttl: Callable[[], Optional[float]],
+    ) -> EncodedResponse:
+        """
+        Return the cached response for key, or build and encode a new one.
+
+        Args:
+            key: Cache key for the response
+            build: Produces the payload dict on a miss
+            ttl: Called after build; seconds the response may be cached,
+                or None if the data behind it was not cached
+        """
+        encoded = self._entries.get(key)
+        if encoded is not None:
+            return encoded
+        encoded = EncodedResponse.from_payload(build())
+        self.store(key, encoded, ttl)
+        return encoded
+
+    def store(
+        self,
+        key: Hashable,
+        encoded: EncodedResponse,
+        ttl: Callable[[], Optional[float]],
+    ) -> None:
+        """
+        Keep a freshly built response if it succeeded, is complete and its
+        data is cached. For callers that build the payload themselves, e.g.
+        with await.
+        """
+        if encoded.success and encoded.complete:
+            lifetime = ttl()
+            if lifetime:
+                self._entries.set(key, encoded, lifetime)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def build_response(
+    payload,
+    endpoint: Optional[str] = None,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    ttl: Optional[float] = None,
+) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Turn a payload into a 200 (or 304) JSON response.
+
+    Args:
+        payload: Response dict, or an already EncodedResponse
+        endpoint: Key of ENDPOINT_CACHE_KINDS or IMMUTABLE_ENDPOINTS for
+            cacheable GET responses, or None for responses that must not
+            get caching headers
+        accept_encoding: Client Accept-Encoding header
+        if_none_match: Client If-None-Match header
+        ttl: Seconds left on the data behind the response, for its
+            Cache-Control (see cache_control)
+
+    Returns:
+        Tuple of (status, headers, body bytes)
+    """
+    if not isinstance(payload, EncodedResponse):
+        payload = EncodedResponse.from_payload(payload)
+    headers = {"Content-Type": "application/json"}
+    etag = None
+    if endpoint is not None:
+        etag = payload.etag
+        headers["Cache-Control"] = cache_control(endpoint, payload.success, ttl)
+
+    encoding = None
+    if len(payload.body) >= MIN_COMPRESS_SIZE:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate_encoding(accept_encoding)
+
+    body = payload.variant(encoding)
+    if encoding is not None:
+        # Each encoded representation needs its own strong validator
+        headers["Content-Encoding"] = encoding
+        if etag is not None:
+            etag = f'{etag[:-1]}-{encoding}"'
+
+    if etag is not None:
+        headers["ETag"] = etag
+        if etag_matches(if_none_match, etag):
+            del headers["Content-Type"]
+            headers.pop("Content-Encoding", None)
+            return 304, headers, b""
+
+    headers["Content-Length"] = str(len(body))
+    return 200, headers, body
+
+
+def write_json(
+    handler: BaseHTTPRequestHandler,
+    payload,
+    endpoint: Optional[str] = None,
+    ttl: Optional[float] = None,
+) -> None:
+    """
+    Send a 200 JSON response from a BaseHTTPRequestHandler, compressed if
+    the client allows it, or a bodiless 304 when the client already has
+    this version. payload may be a dict or an EncodedResponse.
+    """
+    status, headers, body = build_response(
+        payload,
+        endpoint,
+        handler.headers.get("Accept-Encoding"),
+        handler.headers.get("If-None-Match"),
+        ttl,
+    )
+    handler.send_response(status)
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.send_header("Access-Control-Allow-Origin", "*")
+    handler.end_headers()
+    handler.wfile.write(body)
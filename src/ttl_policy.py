@@ -0,0 +1,183 @@
+"""
+Adaptive cache lifetimes for TMDB watch/providers responses.
+
+Availability of a new release churns weekly, while a decades-old catalog
+title can go months without a change, so one fixed TTL is either too
+short for the one or too long for the other. ProviderTTLPolicy scales
+the base providers TTL by three signals:
+
+- age: titles released recently get shorter TTLs, old ones longer
+- popularity: popular titles are requested often, so staleness in them
+  is seen by more users and refreshing them costs less per request
+- observed churn: every refresh is fingerprinted (the content digest
+  kept for revalidation, see cache.StoredResponse), and titles whose
+  providers keep coming back unchanged get longer TTLs, while titles
+  that changed recently get shorter ones
+
+Release dates and popularity are not part of the providers response;
+the finder reports them with observe_title() whenever a title passes
+through search, trending or details. Titles it knows nothing about get
+the base TTL.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from datetime import date
+from typing import Dict, Hashable, Optional, Tuple
+
+# Bounds for any computed TTL, in seconds
+MIN_TTL = 30 * 60
+MAX_TTL = 7 * 24 * 3600
+
+# (max age in days, TTL factor), first match wins; older titles get the last factor
+AGE_FACTORS = ((30, 0.25), (180, 0.5), (2 * 365, 1.0), (10 * 365, 2.0))
+OLD_TITLE_FACTOR = 4.0
+
+# TMDB popularity above which a title counts as popular
+POPULAR = 100.0
+POPULAR_FACTOR = 0.5
+
+# Unchanged refreshes in a row that keep doubling the TTL
+MAX_STABLE_DOUBLINGS = 3
+# Factor for a title whose providers changed on every refresh
+CHURN_FACTOR = 0.5
+
+# Upper bounds of the TTL histogram buckets, in seconds
+TTL_BUCKETS = (3600, 6 * 3600, 24 * 3600, 3 * 24 * 3600)
+
+# Titles whose metadata and refresh history are remembered
+MAX_TRACKED = 10000
+
+
+def _release_age_days(release_date: Optional[str]) -> Optional[int]:
+    try:
+        return (date.today() - date.fromisoformat(release_date)).days
+    except (TypeError, ValueError):
+        return None
+
+
+class _History:
+    """Refresh history of one title's providers response."""
+
+    __slots__ = ("fingerprint", "comparisons", "changes", "stable_streak")
+
+    def __init__(self, fingerprint: bytes):
+        self.fingerprint = fingerprint
+        self.comparisons = 0
+        self.changes = 0
+        self.stable_streak = 0
+
+    def refresh(self, fingerprint: bytes) -> None:
+        self.comparisons += 1
+        if fingerprint == self.fingerprint:
+            self.stable_streak += 1
+        else:
+            self.changes += 1
+            self.stable_streak = 0
+            self.fingerprint = fingerprint
+
+
+class ProviderTTLPolicy:
+    """
+    Chooses the TTL of each cached watch/providers response.
+
+    Args:
+        base_ttl: TTL in seconds for a title with no known age, popularity
+            or history (the finder's CACHE_TTLS["providers"])
+        max_tracked: Titles whose metadata and history are kept (LRU)
+        window: Recent TTL choices kept for the percentiles in snapshot()
+    """
+
+    def __init__(self, base_ttl: float, max_tracked: int = MAX_TRACKED, window: int = 1000):
+        self.base_ttl = base_ttl
+        self.max_tracked = max_tracked
+        self._titles: "OrderedDict[Hashable, Tuple[Optional[int], float]]" = OrderedDict()
+        self._history: "OrderedDict[Hashable, _History]" = OrderedDict()
+        self._recent: deque = deque(maxlen=window)
+        self._buckets = [0] * (len(TTL_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def _remember(self, table: OrderedDict, key: Hashable, value) -> None:
+        table[key] = value
+        table.move_to_end(key)
+        while len(table) > self.max_tracked:
+            table.popitem(last=False)
+
+    def observe_title(
+        self, media_type: str, title_id: int, release_date: Optional[str], popularity: float
+    ) -> None:
+        """
+        Note the release date and TMDB popularity of a title.
+
+        Args:
+            media_type: 'movie' or 'tv'
+            title_id: TMDB title id
+            release_date: ISO date (release_date or first_air_date), if known
+            popularity: TMDB popularity score
+        """
+        if media_type not in ("movie", "tv") or not title_id:
+            return
+        age = _release_age_days(release_date)
+        popularity = float(popularity or 0.0)
+        with self._lock:
+            self._remember(self._titles, (media_type, title_id), (age, popularity))
+
+    def ttl(self, media_type: str, title_id: int, fingerprint: bytes) -> float:
+        """
+        Record a freshly fetched providers response and return its TTL.
+
+        Args:
+            media_type: 'movie' or 'tv'
+            title_id: TMDB title id
+            fingerprint: Digest of the response content
+                (cache.StoredResponse.digest), compared across refreshes
+        """
+        key = (media_type, title_id)
+        with self._lock:
+            history = self._history.get(key)
+            if history is None:
+                history = _History(fingerprint)
+            else:
+                history.refresh(fingerprint)
+            self._remember(self._history, key, history)
+            age, popularity = self._titles.get(key, (None, 0.0))
+            ttl = self._compute(age, popularity, history)
+            self._recent.append(ttl)
+            self._buckets[self._bucket(ttl)] += 1
+        return ttl
+
+    def _compute(self, age: Optional[int], popularity: float, history: _History) -> float:
+        ttl = self.base_ttl
+        if age is not None:
+            ttl *= next((f for days, f in AGE_FACTORS if age <= days), OLD_TITLE_FACTOR)
+        if popularity >= POPULAR:
+            ttl *= POPULAR_FACTOR
+        if history.comparisons:
+            # Blend of "stays the same" (doubling per unchanged refresh in
+            # a row) and "keeps changing", weighted by the change rate
+            rate = history.changes / history.comparisons
+            stable = 2 ** min(history.stable_streak, MAX_STABLE_DOUBLINGS)
+            ttl *= (1 - rate) * stable + rate * CHURN_FACTOR
+        return float(min(MAX_TTL, max(MIN_TTL, ttl)))
+
+    @staticmethod
+    def _bucket(ttl: float) -> int:
+        return next((i for i, bound in enumerate(TTL_BUCKETS) if ttl <= bound), len(TTL_BUCKETS))
+
+    def snapshot(self) -> Dict:
+        """TTLs chosen so far: a histogram, plus percentiles of the recent ones."""
+        with self._lock:
+            recent = sorted(self._recent)
+            buckets = list(self._buckets)
+            tracked = len(self._history)
+            churning = sum(1 for h in self._history.values() if h.changes)
+        labels = [f"le_{bound // 3600}h" for bound in TTL_BUCKETS] + ["inf"]
+        stats = {
+            "histogram": dict(zip(labels, buckets)),
+            "tracked_titles": tracked,
+            "titles_changed": churning,
+        }
+        for pct in (50, 90, 99):
+            value = recent[min(len(recent) - 1, len(recent) * pct // 100)] if recent else None
+            stats[f"p{pct}_s"] = round(value) if value is not None else None
+        return stats
@@ -0,0 +1,353 @@
+"""
+HTTP clients for TMDB calls: per-request deadlines and optional hedging.
+
+A deadline is set once per incoming API request (see deadline()) and every
+upstream GET made in that request's context (thread or asyncio task) gets a
+timeout no larger than the time left. With hedging enabled, a GET that
+has not answered within the rolling p95 latency of being sent gets a
+second identical request, and whichever answers first wins. Hedging is
+capped twice, so it cannot pile load onto an upstream that is already
+slow: at most HEDGE_WORKERS hedged GETs at once and at most HEDGE_BUDGET
+of all requests; a GET past either cap is sent without a backup.
+
+UpstreamClient is the blocking client used by NetflixTitleFinder;
+AsyncUpstreamClient is its asyncio counterpart built on httpx. Both send
+requests through a transport (see transport.py), which can record
+responses to a cassette or replay them without a network. requests,
+httpx and the hedging thread pool are imported on first use so they do
+not count against serverless cold-start time; so is asyncio, which pulls
+in concurrent.futures.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+from transport import HttpxTransport, RequestsTransport, build_transport
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+# Upper bound for a single TMDB call, whatever the deadline
+DEFAULT_TIMEOUT = 10.0
+
+# Overall time budget for one incoming API request, in seconds
+REQUEST_BUDGET = float(os.getenv("REQUEST_BUDGET", 8.0))
+
+# Most backup requests in flight at once (the blocking client's backup threads)
+HEDGE_WORKERS = 2
+
+# Most backup requests as a fraction of all requests
+HEDGE_BUDGET = float(os.getenv("TMDB_HEDGE_BUDGET", 0.05))
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current request has no time left for an upstream call."""
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Limit all upstream calls made in this context to the next `seconds`.
+
+    Nested deadlines can only shorten the enclosing one.
+    """
+    previous = _deadline.get()
+    expires_at = time.monotonic() + seconds
+    if previous is not None:
+        expires_at = min(expires_at, previous)
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none."""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def call_timeout() -> float:
+    """
+    Timeout for an upstream call made now: DEFAULT_TIMEOUT, capped by the deadline.
+
+    Raises:
+        DeadlineExceeded: The current deadline has passed
+    """
+    remaining = time_remaining()
+    if remaining is None:
+        return DEFAULT_TIMEOUT
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded before upstream call")
+    return min(DEFAULT_TIMEOUT, remaining)
+
+
+class LatencyTracker:
+    """Rolling window of upstream latencies used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the pct-th percentile, or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class _ClientBase:
+    """Deadline handling, latency tracking and load counters shared by both clients."""
+
+    def __init__(self, hedge: bool, max_hedges: int = HEDGE_WORKERS):
+        self.hedge = hedge
+        self.max_hedges = max_hedges
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self._hedges_in_flight = 0
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+
+    def _timeout(self) -> float:
+        return call_timeout()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _hedge_after(self, timeout: float) -> Optional[float]:
+        """Seconds after which to hedge a GET, or None not to hedge it."""
+        if not self.hedge:
+            return None
+        hedge_after = self.latency.percentile(95)
+        if hedge_after is None or hedge_after >= timeout:
+            return None
+        return hedge_after
+
+    def _reserve_hedge(self) -> bool:
+        """Take a backup slot, unless all are busy or the hedge budget is spent."""
+        with self._lock:
+            if self._hedges_in_flight >= self.max_hedges:
+                return False
+            if self.stats["hedged"] >= HEDGE_BUDGET * self.stats["requests"]:
+                return False
+            self._hedges_in_flight += 1
+            return True
+
+    def _release_hedge(self) -> None:
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    def snapshot(self) -> Dict:
+        """Upstream load counters, including the extra requests sent by hedging."""
+        with self._lock:
+            stats = dict(self.stats)
+        p95 = self.latency.percentile(95)
+        stats["p95_ms"] = round(p95 * 1000, 1) if p95 is not None else None
+        return stats
+
+
+class UpstreamClient(_ClientBase):
+    """
+    GET requests with deadline-aware timeouts and optional hedging.
+
+    A GET that may be hedged (see _reserve_hedge) sends its primary from a
+    hedge thread and waits for the first successful answer, sending the
+    backup from a second thread if the primary is still pending after
+    hedge_after. Each of the max_hedges slots owns two threads and stays
+    taken until both requests finish, so neither request ever queues.
+    Every other GET is sent by the calling thread.
+
+    Args:
+        hedge: Fire a backup request when the primary is slower than the p95
+        max_hedges: Hedged GETs in flight at once
+        transport: Overrides the transport chosen from TMDB_TRANSPORT
+    """
+
+    def __init__(self, hedge: bool = False, max_hedges: int = HEDGE_WORKERS, transport=None):
+        super().__init__(hedge, max_hedges)
+        self.transport = transport or build_transport(RequestsTransport())
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=2 * self.max_hedges, thread_name_prefix="hedge"
+                    )
+        return self._pool
+
+    def _timed_get(
+        self, url: str, params: Dict, timeout: float, headers: Optional[Dict] = None
+    ) -> "requests.Response":
+        start = time.monotonic()
+        response = self.transport.get(url, params, timeout, headers)
+        self.latency.record(time.monotonic() - start)
+        return response
+
+    def _release_when_done(self, futures) -> None:
+        """Free the hedge slot once every request sent for it has finished."""
+        left = [len(futures)]
+
+        def finished(_future) -> None:
+            with self._lock:
+                left[0] -= 1
+                if left[0]:
+                    return
+            self._release_hedge()
+
+        for future in futures:
+            future.add_done_callback(finished)
+
+    def get(
+        self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None
+    ) -> "requests.Response":
+        """GET url within the current deadline, hedging slow requests if enabled."""
+        timeout = self._timeout()
+        self._count("requests")
+
+        hedge_after = self._hedge_after(timeout)
+        if hedge_after is None or not self._reserve_hedge():
+            return self._timed_get(url, params, timeout, headers)
+
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        start = time.monotonic()
+        try:
+            primary = self.pool.submit(self._timed_get, url, params, timeout, headers)
+        except RuntimeError:
+            self._release_hedge()
+            return self._timed_get(url, params, timeout, headers)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            self._release_when_done([primary])
+            return primary.result()
+
+        self._count("hedged")
+        backup_timeout = max(0.001, timeout - (time.monotonic() - start))
+        backup = self.pool.submit(self._timed_get, url, params, backup_timeout, headers)
+        self._release_when_done([primary, backup])
+
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            left = timeout - (time.monotonic() - start)
+            done, pending = wait(pending, timeout=max(0, left), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        if error is None:
+            import requests
+
+            error = requests.Timeout(f"Hedged GET {url} timed out")
+        raise error
+
+
+class AsyncUpstreamClient(_ClientBase):
+    """
+    asyncio counterpart of UpstreamClient, on a pooled httpx.AsyncClient.
+
+    Args:
+        hedge: Fire a backup request when the primary is slower than the p95
+        max_connections: Upper bound on pooled connections to TMDB, i.e. on
+            the number of upstream calls in flight at once
+        transport: Overrides the transport chosen from TMDB_TRANSPORT
+    """
+
+    def __init__(self, hedge: bool = False, max_connections: int = 256, transport=None):
+        super().__init__(hedge)
+        self.max_connections = max_connections
+        self.transport = transport or build_transport(
+            HttpxTransport(max_connections, DEFAULT_TIMEOUT)
+        )
+
+    async def _timed_get(
+        self, url: str, params: Dict, timeout: float, headers: Optional[Dict] = None
+    ) -> "httpx.Response":
+        start = time.monotonic()
+        response = await self.transport.aget(url, params, timeout, headers)
+        self.latency.record(time.monotonic() - start)
+        return response
+
+    async def get(
+        self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None
+    ) -> "httpx.Response":
+        """GET url within the current deadline, hedging slow requests if enabled."""
+        timeout = self._timeout()
+        self._count("requests")
+
+        hedge_after = self._hedge_after(timeout)
+        if hedge_after is None:
+            return await self._timed_get(url, params, timeout, headers)
+
+        import asyncio
+
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._timed_get(url, params, timeout, headers))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+        if not self._reserve_hedge():
+            return await primary
+
+        self._count("hedged")
+        backup_timeout = max(0.001, timeout - (time.monotonic() - start))
+        backup = asyncio.ensure_future(
+            self._timed_get(url, params, backup_timeout, headers)
+        )
+
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                left = timeout - (time.monotonic() - start)
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, left), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        if future is backup:
+                            self._count("hedge_wins")
+                        return future.result()
+                    error = future.exception()
+        finally:
+            self._release_hedge()
+            for future in pending:
+                future.cancel()
+        if error is None:
+            import httpx
+
+            error = httpx.TimeoutException(f"Hedged GET {url} timed out")
+        raise error
+
+    async def aclose(self) -> None:
+        if hasattr(self.transport, "aclose"):
+            await self.transport.aclose()
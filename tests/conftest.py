@@ -0,0 +1,72 @@
+"""
+Shared fixtures: src/ and scripts/ on sys.path, and a local TMDB stub
+(scripts/tmdb_stub.py) so nothing here calls the real TMDB.
+
+    pip install pytest
+    python -m pytest tests
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT / "src"
+SCRIPTS_DIR = ROOT / "scripts"
+
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Keep test titles out of the rankings snapshot servers load (see rankings.py)
+os.environ["RANKINGS_SNAPSHOT"] = ""
+
+
+def _start_stub(**kwargs):
+    import tmdb_stub
+
+    server = tmdb_stub.serve(port=0, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope="session")
+def stub_url():
+    """Base URL of a stub with synthetic titles, e.g. http://127.0.0.1:PORT."""
+    server = _start_stub()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def catalog_path(tmp_path_factory):
+    """A small catalog written by scripts/generate_catalog.py."""
+    path = tmp_path_factory.mktemp("catalog") / "cat.jsonl"
+    script = SCRIPTS_DIR / "generate_catalog.py"
+    args = ["--titles", "500", "--seed", "7", "--out", str(path)]
+    subprocess.run([sys.executable, str(script), *args], check=True, capture_output=True)
+    return path
+
+
+@pytest.fixture(scope="session")
+def catalog_stub_url(catalog_path):
+    """Base URL of a stub serving catalog_path (tmdb_stub.py --catalog)."""
+    server = _start_stub(catalog=str(catalog_path))
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tmdb_env(monkeypatch, stub_url):
+    """Point finders created in the test at the synthetic stub."""
+    monkeypatch.setenv("TMDB_API_KEY", "stub")
+    monkeypatch.setenv("TMDB_BASE_URL", f"{stub_url}/3")
+    monkeypatch.delenv("TMDB_TRANSPORT", raising=False)
+    monkeypatch.delenv("SAMPLE_CATALOG", raising=False)
+    return stub_url
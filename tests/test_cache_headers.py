@@ -0,0 +1,56 @@
+"""CDN lifetimes of the Flask routes follow the finder's cache (see cached_ttl)."""
+
+import re
+import time
+
+import pytest
+
+
+@pytest.fixture
+def client(tmdb_env, monkeypatch):
+    import api_server
+    from netflix_finder import NetflixTitleFinder
+    from responses import ResponseCache
+
+    finder = NetflixTitleFinder()
+    monkeypatch.setattr(api_server, "finder", finder)
+    monkeypatch.setattr(api_server, "response_cache", ResponseCache())
+    return api_server.app.test_client(), finder
+
+
+def _s_maxage(response):
+    match = re.search(r"s-maxage=(\d+)", response.headers.get("Cache-Control", ""))
+    return int(match.group(1)) if match else None
+
+
+def _complete_trending(client, query):
+    # Titles are annotated in the background; until then nothing is cached
+    for _ in range(100):
+        response = client.get(f"/api/trending?{query}")
+        if _s_maxage(response) is not None:
+            return response
+        time.sleep(0.05)
+    raise AssertionError("trending titles were never all annotated")
+
+
+def test_trending_expires_with_its_providers_entries(client):
+    client, finder = client
+    _complete_trending(client, "country=US")
+
+    # One title's watch/providers entry now expires in two minutes
+    key = finder._trending_keys[0]
+    offers = finder.cache.get(("providers", *key))
+    finder.cache.set(("providers", *key), offers, ttl=120)
+
+    response = _complete_trending(client, "country=US&offer=rent")
+    assert 100 <= _s_maxage(response) <= 120
+
+
+def test_providers_expire_with_their_cache_entry(client):
+    client, finder = client
+    client.get("/api/providers/27205/movie")
+    offers = finder.cache.get(("providers", "movie", 27205))
+    finder.cache.set(("providers", "movie", 27205), offers, ttl=300)
+
+    response = client.get("/api/providers/27205/movie?offer=rent")
+    assert 280 <= _s_maxage(response) <= 300
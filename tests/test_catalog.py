@@ -0,0 +1,56 @@
+"""Synthetic catalogs (src/catalog.py) and the finder's sample mode."""
+
+from catalog import TRENDING_SIZE, Catalog, tokenize
+
+
+def test_catalog_search_and_trending(catalog_path):
+    catalog = Catalog(str(catalog_path))
+    assert len(catalog) == 500
+
+    title = catalog.record(0)
+    word = tokenize(title["title"])[0]
+    rows = catalog.search(word)
+    assert 0 in rows
+    assert all(word in tokenize(catalog.record(row)["title"]) for row in rows[:20])
+    # Typing: the last word may be a prefix
+    assert 0 in catalog.search(word[:2])
+    assert catalog.search("") == []
+
+    trending = catalog.trending()
+    assert len(trending) == TRENDING_SIZE
+    popularity = [record["popularity"] for record in trending]
+    assert popularity == sorted(popularity, reverse=True)
+    assert catalog.get(title["media_type"], title["id"]) == title
+    assert catalog.get("movie", -1) is None
+
+
+def _answers(finder, title):
+    return {
+        "search": [t.display() for t in finder.search_titles(title["title"])],
+        "details": finder.get_title_details(title["id"], title["media_type"]),
+        "providers": finder.get_all_providers(title["id"], title["media_type"]),
+        "countries": finder.get_countries(title["id"], title["media_type"]),
+    }
+
+
+def test_sample_mode_matches_catalog_stub(catalog_path, catalog_stub_url, monkeypatch):
+    from netflix_finder import NetflixTitleFinder
+
+    title = Catalog(str(catalog_path)).trending()[0]
+
+    # Sample mode: no API key, titles straight from the catalog file
+    monkeypatch.delenv("TMDB_API_KEY", raising=False)
+    monkeypatch.delenv("TMDB_TRANSPORT", raising=False)
+    monkeypatch.setenv("SAMPLE_CATALOG", str(catalog_path))
+    sample = NetflixTitleFinder()
+    assert sample.data_source == "sample_catalog"
+    offline = _answers(sample, title)
+    assert offline["search"][0]["id"] == title["id"]
+
+    # The same catalog over HTTP, through tmdb_stub.py --catalog
+    monkeypatch.delenv("SAMPLE_CATALOG")
+    monkeypatch.setenv("TMDB_API_KEY", "stub")
+    monkeypatch.setenv("TMDB_BASE_URL", f"{catalog_stub_url}/3")
+    remote = NetflixTitleFinder()
+    assert remote.data_source == "tmdb"
+    assert _answers(remote, title) == offline
@@ -0,0 +1,145 @@
+"""fetch_offers() and scripts/crawl_availability.py against the stub."""
+
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+import zlib
+
+from conftest import SCRIPTS_DIR
+from tmdb_stub import MISSING_ID_START, PROVIDER_IDS
+
+IDS = ["movie 27205", "tv/1399", "550", f"movie {MISSING_ID_START + 1}", "# comment", "tv 66732"]
+EXPECTED = [
+    ("movie", 27205, 200),
+    ("tv", 1399, 200),
+    ("movie", 550, 200),
+    ("movie", MISSING_ID_START + 1, 404),
+    ("tv", 66732, 200),
+]
+
+
+def test_fetch_offers_reports_status(tmdb_env):
+    from netflix_finder import NetflixTitleFinder
+
+    finder = NetflixTitleFinder()
+    status, offers = finder.fetch_offers("movie", 27205)
+    assert status == 200
+    assert offers.countries(8)
+    assert finder.fetch_offers("movie", MISSING_ID_START + 1) == (404, None)
+
+
+def test_async_fetch_offers_matches_sync(tmdb_env):
+    from async_finder import AsyncNetflixTitleFinder
+    from netflix_finder import NetflixTitleFinder
+
+    async def fetch():
+        finder = AsyncNetflixTitleFinder()
+        try:
+            return [await finder.fetch_offers(*key) for key in keys]
+        finally:
+            await finder.aclose()
+
+    keys = [("movie", 27205), ("tv", 1399), ("movie", MISSING_ID_START + 1)]
+    finder = NetflixTitleFinder()
+    expected = [finder.fetch_offers(*key) for key in keys]
+    results = asyncio.run(fetch())
+    assert [status for status, _ in results] == [200, 200, 404]
+    for (_, offers), (_, sync_offers) in zip(results[:2], expected):
+        for provider_id in PROVIDER_IDS:
+            assert offers.countries(provider_id) == sync_offers.countries(provider_id)
+
+
+def _crawl(ids_path, output, stub_url, *extra):
+    env = dict(os.environ, TMDB_API_KEY="stub", TMDB_BASE_URL=f"{stub_url}/3")
+    env.pop("TMDB_TRANSPORT", None)
+    args = [str(ids_path), "-o", str(output), "--batch", "2", "--rate", "0", *extra]
+    return subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "crawl_availability.py"), *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+def _rows(output):
+    with gzip.open(output, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_crawl_writes_rows_in_input_order(stub_url, tmp_path):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("\n".join(IDS) + "\n")
+    output = tmp_path / "avail.jsonl.gz"
+
+    result = _crawl(ids, output, stub_url)
+    assert result.returncode == 0, result.stderr
+    rows = _rows(output)
+    assert [(r["type"], r["id"], r["status"]) for r in rows] == EXPECTED
+    assert all(isinstance(r["providers"], dict) for r in rows if r["status"] == 200)
+
+    checkpoint = json.loads((tmp_path / "avail.jsonl.gz.checkpoint").read_text())
+    assert checkpoint["done"] == len(IDS)
+    assert checkpoint["bytes"] == output.stat().st_size
+    assert checkpoint["counts"] == {"ok": 4, "missing": 1, "failed": 0, "skipped": 1}
+
+
+def test_crawl_resumes_from_checkpoint(stub_url, tmp_path):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("\n".join(IDS) + "\n")
+    output = tmp_path / "avail.jsonl.gz"
+    assert _crawl(ids, output, stub_url).returncode == 0
+    rows = _rows(output)
+
+    # Rewind to just after the first gzip member (2 titles), as if the crawl
+    # had been interrupted while writing the second one
+    data = output.read_bytes()
+    decompressor = zlib.decompressobj(wbits=31)
+    decompressor.decompress(data)
+    first_member = len(data) - len(decompressor.unused_data)
+    output.write_bytes(data[:first_member] + data[first_member : first_member + 10])
+    checkpoint_path = tmp_path / "avail.jsonl.gz.checkpoint"
+    checkpoint = json.loads(checkpoint_path.read_text())
+    checkpoint.update(
+        done=2, bytes=first_member, counts={"ok": 2, "missing": 0, "failed": 0, "skipped": 0}
+    )
+    checkpoint_path.write_text(json.dumps(checkpoint))
+
+    result = _crawl(ids, output, stub_url)
+    assert result.returncode == 0, result.stderr
+    assert "Resuming after line 2" in result.stderr
+    assert _rows(output) == rows
+    assert json.loads(checkpoint_path.read_text())["counts"]["ok"] == 4
+
+
+def test_crawl_refuses_output_without_checkpoint(stub_url, tmp_path):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("movie 27205\n")
+    output = tmp_path / "avail.jsonl.gz"
+    output.write_bytes(b"")
+
+    result = _crawl(ids, output, stub_url)
+    assert result.returncode != 0
+    assert "--restart" in result.stderr
+
+
+def test_crawl_restart_discards_checkpoint(stub_url, tmp_path):
+    ids = tmp_path / "ids.txt"
+    ids.write_text("\n".join(IDS) + "\n")
+    output = tmp_path / "avail.jsonl.gz"
+    assert _crawl(ids, output, stub_url).returncode == 0
+
+    # A restart that dies before its first checkpoint (here: input missing)
+    # must not leave the old checkpoint to be resumed against a new output
+    moved = ids.rename(tmp_path / "moved.txt")
+    assert _crawl(ids, output, stub_url, "--restart").returncode != 0
+    assert not (tmp_path / "avail.jsonl.gz.checkpoint").exists()
+
+    moved.rename(ids)
+    result = _crawl(ids, output, stub_url)
+    assert result.returncode == 0, result.stderr
+    assert "Resuming" not in result.stderr
+    assert [(r["type"], r["id"], r["status"]) for r in _rows(output)] == EXPECTED
@@ -0,0 +1,52 @@
+"""Image proxy (src/image_proxy.py) against the stub's images."""
+
+import hashlib
+import io
+
+import pytest
+
+from image_proxy import ImageNotFound, ImageProxy
+
+
+def test_resizes_and_serves_from_disk(stub_url, tmp_path):
+    from PIL import Image
+
+    proxy = ImageProxy(tmp_path, upstream=f"{stub_url}/t/p")
+    image = proxy.get("w200", "poster1.jpg")
+    assert image.content_type == "image/jpeg"
+    assert image.etag == f'"{hashlib.sha256(image.body).hexdigest()}"'
+    with Image.open(io.BytesIO(image.body)) as img:
+        assert img.width == 200
+
+    # A new process finds it on disk and never calls the (now unreachable) upstream
+    offline = ImageProxy(tmp_path, upstream="http://127.0.0.1:9/t/p")
+    assert offline.is_cached("w200", "poster1.jpg")
+    assert offline.get("w200", "poster1.jpg") == image
+
+
+def test_evicts_least_recently_served(stub_url, tmp_path):
+    upstream = f"{stub_url}/t/p"
+    # Same-size stub images are identical, so vary the width to get distinct blobs
+    warm = ImageProxy(tmp_path, upstream)
+    sizes = {size: len(warm.get(size, "a.png").body) for size in ("w92", "w100", "w110")}
+    # Room for two of them, plus their small ref entries
+    max_bytes = sizes["w92"] + max(sizes["w100"], sizes["w110"]) + 256
+    proxy = ImageProxy(tmp_path / "small", upstream, max_bytes=max_bytes)
+    proxy.get("w92", "a.png")
+    proxy.get("w100", "a.png")
+    proxy.get("w92", "a.png")
+    proxy.get("w110", "a.png")
+    assert proxy.is_cached("w92", "a.png")
+    assert not proxy.is_cached("w100", "a.png")
+    assert proxy.is_cached("w110", "a.png")
+
+
+def test_rejects_bad_requests(stub_url, tmp_path):
+    proxy = ImageProxy(tmp_path, upstream=f"{stub_url}/t/p")
+    with pytest.raises(ValueError):
+        proxy.get("w5000", "poster1.jpg")
+    with pytest.raises(ValueError):
+        proxy.get("w200", "../secret.jpg")
+    # The stub serves no webp
+    with pytest.raises(ImageNotFound):
+        proxy.get("w200", "poster1.webp")
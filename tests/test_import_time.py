@@ -0,0 +1,15 @@
+"""Cold-start budget of the serverless entry point (see scripts/check_import_time.py)."""
+
+from check_import_time import STARTUP_BUDGET_MS, eager_modules, import_profile, index_ms
+
+RUNS = 5
+
+
+def test_startup_imports_stay_lazy():
+    assert eager_modules(import_profile()) == []
+
+
+def test_startup_import_time_within_budget():
+    # Best of a few runs, as a single run is at the mercy of the machine
+    best_ms = min(index_ms(import_profile()) for _ in range(RUNS))
+    assert best_ms <= STARTUP_BUDGET_MS
@@ -0,0 +1,36 @@
+"""Provider rankings (src/rankings.py) and their snapshot."""
+
+import tempfile
+
+from rankings import ProviderRankings
+from records import TitleOffers
+from tmdb_stub import PROVIDER_IDS, _providers
+
+
+def _observe(rankings, title_ids):
+    for title_id in title_ids:
+        rankings.observe_title("movie", title_id, f"Movie {title_id}", float(title_id))
+        rankings.observe_offers("movie", title_id, TitleOffers.from_tmdb(_providers(title_id)))
+
+
+def test_snapshot_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("RANKINGS_SNAPSHOT", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    rankings = ProviderRankings(PROVIDER_IDS)
+    _observe(rankings, range(1, 30))
+    rankings.save()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_snapshot_restores_rankings(monkeypatch, tmp_path):
+    path = tmp_path / "rankings.json"
+    monkeypatch.setenv("RANKINGS_SNAPSHOT", str(path))
+    rankings = ProviderRankings(PROVIDER_IDS)
+    _observe(rankings, range(1, 30))
+    rankings.save()
+    assert path.exists()
+
+    restored = ProviderRankings(PROVIDER_IDS)
+    assert restored.tracked() == rankings.tracked()
+    assert restored.rankings(8, 10) == rankings.rankings(8, 10)
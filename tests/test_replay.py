@@ -0,0 +1,53 @@
+"""Record/replay transports (see src/transport.py) against the stub."""
+
+import pytest
+
+from transport import Cassette, CassetteMiss, ReplayTransport
+
+
+def _answers(finder):
+    titles = finder.search_titles("Inception")
+    title = titles[0]
+    return {
+        "search": [t.display() for t in titles],
+        "details": finder.get_title_details(title.id, title.media_type),
+        "providers": finder.get_all_providers(title.id, title.media_type),
+    }
+
+
+def test_replay_matches_recording_without_network(tmdb_env, monkeypatch, tmp_path):
+    from netflix_finder import NetflixTitleFinder
+
+    cassette = tmp_path / "tmdb.cassette"
+    monkeypatch.setenv("TMDB_CASSETTE", str(cassette))
+    monkeypatch.setenv("TMDB_TRANSPORT", "record")
+    recorded = _answers(NetflixTitleFinder())
+    assert recorded["details"]["success"] and recorded["providers"]["success"]
+    assert len(Cassette.open(str(cassette))) > 0
+
+    # Nothing listens on port 9: any request that reached the network would fail
+    monkeypatch.setenv("TMDB_TRANSPORT", "replay")
+    monkeypatch.setenv("TMDB_BASE_URL", "http://127.0.0.1:9/3")
+    finder = NetflixTitleFinder()
+    assert _answers(finder) == recorded
+    assert finder.upstream.transport.misses == 0
+
+
+def test_replay_miss_raises(tmp_path):
+    transport = ReplayTransport(Cassette.open(str(tmp_path / "empty.cassette")))
+    with pytest.raises(CassetteMiss):
+        transport.get("http://127.0.0.1:9/3/movie/1", {"api_key": "stub"}, timeout=1.0)
+    assert transport.misses == 1
+
+
+def test_replay_ignores_host_and_api_key(tmdb_env, tmp_path):
+    from transport import RecordingTransport, RequestsTransport
+
+    cassette = Cassette.open(str(tmp_path / "key.cassette"))
+    live = RecordingTransport(RequestsTransport(), cassette)
+    recorded = live.get(f"{tmdb_env}/3/movie/27205", {"api_key": "stub"}, timeout=5.0)
+
+    replay = ReplayTransport(cassette)
+    response = replay.get("https://api.themoviedb.org/3/movie/27205", {"api_key": "x"}, 1.0)
+    assert response.status_code == 200
+    assert response.json() == recorded.json()